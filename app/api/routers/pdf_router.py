@@ -1,31 +1,290 @@
 # api/handlers/pdf_handler.py
 
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+import asyncio
+import io
+import json
+import zipfile
+from typing import List
 
-from app.dependencies import get_pdf_service
-from app.exceptions import CustomException, ErrorType
+import pydantic_core
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
+
+from app.dependencies import get_job_queue_dependency, get_pdf_service
+from app.exceptions import ConflictError, CustomException, ErrorType
 from app.models.file_model import FileModel
+from app.models.processed_data_model import ProcessedDataModel
+from app.repositories.result_cache import get_result_cache
+from app.services.archive import is_archive, unpack_archive
+from app.services.job_queue import JobQueue
+from app.services.outbox_sender import get_outbox_sender
 from app.services.pdf_service import PDFService
+from app.services.upload_ingest import spool_upload
+from core.config import config
 
 router = APIRouter()
 
 
 @router.post("/lift/upload_pdf", status_code=status.HTTP_202_ACCEPTED)
 async def upload_pdf(file: UploadFile = File(...), pdf_service: PDFService = Depends(get_pdf_service)):
-    file_content = await file.read()
-    file_model = FileModel(filename=file.filename, content=file_content)
+    if not FileModel(filename=file.filename).is_pdf():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be a PDF")
 
-    if not file_model.is_pdf():
+    file_model = None
+    try:
+        # Файл сохраняется на диск по частям с подсчётом хеш-суммы, размер проверяется до разбора PDF
+        file_model = await spool_upload(file, config.MAX_UPLOAD_BYTES, config.UPLOAD_CHUNK_BYTES,
+                                        config.UPLOAD_SPOOL_DIR)
+        processed_data, response = await pdf_service.process_lift_pdf(file_model)
+        return processed_response(processed_data, response)
+    except CustomException as e:
+        raise to_http_exception(e)
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    finally:
+        if file_model is not None:
+            file_model.cleanup()
+
+
+@router.post("/lift/upload_pdf/stream", status_code=status.HTTP_200_OK)
+async def upload_pdf_stream(file: UploadFile = File(...), submit: bool = False,
+                            pdf_service: PDFService = Depends(get_pdf_service)):
+    """
+    Потоковая обработка: отчёт отдаётся в NDJSON по мере обработки страниц - строка с заголовком отчёта,
+    строка на каждую компанию и строка с итогом. submit=true - отправить отчёт на микросервис отчётов после обработки.
+    Ошибка после начала ответа передаётся последней строкой {"type": "error", ...}.
+    """
+    if not FileModel(filename=file.filename).is_pdf():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be a PDF")
 
+    file_model = None
     try:
-        result = await pdf_service.process_lift_pdf(file_model)
-        return {"message": "PDF file processed successfully", "result": result}
+        file_model = await spool_upload(file, config.MAX_UPLOAD_BYTES, config.UPLOAD_CHUNK_BYTES,
+                                        config.UPLOAD_SPOOL_DIR)
+        # Конфигурация выбирается до начала ответа, чтобы неподходящий документ получил код ошибки, а не строку
+        structure = await pdf_service.select_config(file_model)
     except CustomException as e:
-        if e.error_type == ErrorType.CONFLICT_ERROR:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
-        else:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        if file_model is not None:
+            file_model.cleanup()
+        raise to_http_exception(e)
+    except Exception as e:
+        if file_model is not None:
+            file_model.cleanup()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    async def ndjson():
+        try:
+            # Готовые одновременно строки отправляются одним фрагментом ответа
+            async for items in pdf_service.stream_lift_pdf(file_model, submit, structure):
+                yield "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+        except Exception as e:
+            print(f"Ошибка потоковой обработки PDF '{file_model.filename}': {e}")
+            error_type = "conflict" if isinstance(e, ConflictError) else "error"
+            yield json.dumps({"type": error_type, "detail": str(e)}, ensure_ascii=False) + "\n"
+        finally:
+            file_model.cleanup()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
+
+@router.post("/lift/upload_pdfs", status_code=status.HTTP_200_OK)
+async def upload_pdfs(files: List[UploadFile] = File(...), pdf_service: PDFService = Depends(get_pdf_service)):
+    """
+    Пакетная загрузка: несколько PDF-файлов в одном multipart-запросе и/или zip/tar архивы с PDF-файлами.
+    Ответ - NDJSON, по строке с результатом на каждый файл в порядке завершения обработки.
+    """
+    file_models = []
+    try:
+        for file in files:
+            upload = FileModel(filename=file.filename)
+            if not is_archive(upload) and not upload.is_pdf():
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail=f"File '{file.filename}' must be a PDF or a zip/tar archive")
+            # Количество файлов проверяется по ходу: лишние загрузки не сохраняются на диск и не распаковываются
+            if len(file_models) >= config.BATCH_MAX_FILES:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                    detail=f"Too many files: more than {config.BATCH_MAX_FILES}")
+
+            file_model = await spool_upload(file, config.MAX_UPLOAD_BYTES, config.UPLOAD_CHUNK_BYTES,
+                                            config.UPLOAD_SPOOL_DIR)
+            if file_model.is_pdf():
+                file_models.append(file_model)
+                continue
+
+            try:
+                # Распаковка читает и пишет файлы на диске, поэтому выполняется в потоке, а не в цикле событий
+                file_models.extend(await asyncio.to_thread(unpack_archive, file_model, config.BATCH_MAX_ARCHIVE_BYTES,
+                                                           config.UPLOAD_CHUNK_BYTES, config.UPLOAD_SPOOL_DIR,
+                                                           config.BATCH_MAX_FILES - len(file_models)))
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+            except Exception as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail=f"Cannot unpack archive '{file.filename}': {e}")
+            finally:
+                file_model.cleanup()
+
+        if not file_models:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No PDF files found in the request")
+    except CustomException as e:
+        cleanup_files(file_models)
+        raise to_http_exception(e)
+    except BaseException:
+        cleanup_files(file_models)
+        raise
+
+    results = pdf_service.process_lift_pdfs(file_models, config.BATCH_CONCURRENCY, config.BATCH_SUBMIT_SIZE)
+
+    async def ndjson():
+        try:
+            async for item in results:
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        finally:
+            cleanup_files(file_models)
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.post("/lift/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_pdf_job(file: UploadFile = File(...), job_queue: JobQueue = Depends(get_job_queue_dependency)):
+    """
+    Фоновая обработка: загрузка сохраняется и ставится в очередь, сразу возвращается идентификатор задачи.
+    Статус задачи доступен по GET /lift/jobs/{job_id}.
+    """
+    if not FileModel(filename=file.filename).is_pdf():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be a PDF")
+
+    file_model = None
+    try:
+        file_model = await spool_upload(file, config.MAX_UPLOAD_BYTES, config.UPLOAD_CHUNK_BYTES,
+                                        config.JOB_STORAGE_DIR)
+        job = await job_queue.submit(file_model)
+    except CustomException as e:
+        if file_model is not None:
+            file_model.cleanup()
+        raise to_http_exception(e)
+    except BaseException:
+        # Файл не попал в очередь (ошибка хранилища задач, отмена запроса) - удалять его больше некому
+        if file_model is not None:
+            file_model.cleanup()
+        raise
+    return {"job_id": job.id, "status": job.status, "status_url": f"/lift/jobs/{job.id}"}
+
+
+@router.get("/lift/jobs/{job_id}")
+async def get_pdf_job(job_id: str, job_queue: JobQueue = Depends(get_job_queue_dependency)):
+    """
+    Статус задачи фоновой обработки
+    """
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+
+@router.post("/lift/debug/overlay")
+async def render_pdf_overlay(file: UploadFile = File(...), pages: List[int] = Query(None),
+                             image_format: str = Query("pdf", alias="format", pattern="^(pdf|png)$"),
+                             dpi: int = Query(96, ge=36, le=600), pdf_service: PDFService = Depends(get_pdf_service)):
+    """
+    Отладочная разметка: найденные текстовые поля (синий), указатели (красный) и ячейки (зелёный).
+    pages - номера страниц с 0 (по умолчанию все), format=pdf - PDF с этими страницами,
+    format=png - PNG страницы или zip с PNG, если страниц несколько. Данные никуда не отправляются.
+    """
+    if not FileModel(filename=file.filename).is_pdf():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be a PDF")
+
+    file_model = None
+    try:
+        file_model = await spool_upload(file, config.MAX_UPLOAD_BYTES, config.UPLOAD_CHUNK_BYTES,
+                                        config.UPLOAD_SPOOL_DIR)
+        rendered = await pdf_service.render_lift_overlay(file_model, pages, image_format, dpi)
+    except CustomException as e:
+        raise to_http_exception(e)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    finally:
+        if file_model is not None:
+            file_model.cleanup()
+
+    if image_format == "pdf":
+        return Response(content=rendered, media_type="application/pdf")
+    if len(rendered) == 1:
+        return Response(content=rendered[0][1], media_type="image/png")
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for page_num, png in rendered:
+            zf.writestr(f"page_{page_num}.png", png)
+    return Response(content=archive.getvalue(), media_type="application/zip")
+
+
+@router.get("/lift/cache_stats")
+async def cache_stats():
+    """
+    Счётчики кэша результатов извлечения (попадания, промахи, размер)
+    """
+    result_cache = get_result_cache()
+    if result_cache is None:
+        return {"backend": None}
+    # Размер кэша SQLite - запрос к базе, он выполняется в потоке
+    return await asyncio.to_thread(result_cache.stats)
+
+
+@router.get("/lift/outbox_stats")
+async def outbox_stats():
+    """
+    Количество отчётов в outbox по статусам (pending, delivered, conflict, failed)
+    """
+    outbox_sender = get_outbox_sender()
+    if outbox_sender is None:
+        return {"backend": None}
+    return await outbox_sender.stats()
+
+
+@router.get("/lift/outbox/{file_sha256}")
+async def get_outbox_entry(file_sha256: str):
+    """
+    Статус доставки отчёта на микросервис отчётов по хеш-сумме файла
+    """
+    outbox_sender = get_outbox_sender()
+    entry = await outbox_sender.get(file_sha256) if outbox_sender is not None else None
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Report '{file_sha256}' not found")
+    return entry.to_dict()
+
+
+def to_http_exception(e: CustomException) -> HTTPException:
+    """
+    Преобразует исключение сервиса в HTTP-ответ с соответствующим кодом
+    """
+    if e.error_type == ErrorType.CONFLICT_ERROR:
+        return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if e.error_type == ErrorType.PAYLOAD_TOO_LARGE_ERROR:
+        return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    if e.error_type == ErrorType.TEMPLATE_MISMATCH_ERROR:
+        return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if e.error_type == ErrorType.QUEUE_FULL_ERROR:
+        return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e),
+                             headers={"Retry-After": "5"})
+    return HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+def processed_response(processed_data: ProcessedDataModel, response) -> Response:
+    """
+    Ответ на загрузку: {"message": ..., "result": [отчёт, ответ микросервиса]}
+    Отчёт вставляется в тело уже сериализованным - это те же байты, что были отправлены микросервису
+    """
+    body = b"".join((b'{"message":"PDF file processed successfully","result":[', processed_data.to_json(), b",",
+                     pydantic_core.to_json(response), b"]}"))
+    return Response(content=body, status_code=status.HTTP_202_ACCEPTED, media_type="application/json")
+
+
+def cleanup_files(file_models: list[FileModel]):
+    """
+    Удаляет временные файлы загрузки
+    """
+    for file_model in file_models:
+        file_model.cleanup()
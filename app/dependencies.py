@@ -1,15 +1,51 @@
 # api/dependencies.py
+import httpx
+from fastapi import Depends
+
+from app.repositories.http_client import get_http_client
 from app.repositories.pdf_repository import PDFRepository
-from app.services.config_loader import ConfigLoader
+from app.repositories.processed_data_repository import ProcessedDataRepository
+from app.repositories.result_cache import get_result_cache
+from app.services.config_registry import get_config_registry
+from app.services.executor import get_extraction_executor
+from app.services.job_queue import JobQueue, get_job_queue
+from app.services.outbox_sender import get_outbox_sender
 from app.services.pdf_service import PDFService
+from core.config import config
 
 
-def get_pdf_service() -> PDFService:
+def get_processed_data_repository(client: httpx.AsyncClient = Depends(get_http_client)) -> ProcessedDataRepository:
+    """
+    Dependency for getting the ProcessedDataRepository instance backed by the shared HTTP client.
+    """
+    return ProcessedDataRepository(client)
+
+
+def get_pdf_service(processed_data_repository: ProcessedDataRepository = Depends(get_processed_data_repository)) \
+        -> PDFService:
     """
     Dependency for getting the PDFService instance.
     """
-    repo = PDFRepository()
-    config_loader = ConfigLoader()
-    pdf_service = PDFService(config_loader, repo)
+    repo = PDFRepository(page_cache_size=config.PDF_PAGE_CACHE_SIZE,
+                         store_shrink_percent=config.MUPDF_STORE_SHRINK_PERCENT)
+    pdf_service = PDFService(get_config_registry(), repo, get_extraction_executor(), processed_data_repository,
+                             get_result_cache(), get_outbox_sender())
 
     return pdf_service
+
+
+def create_pdf_service() -> PDFService:
+    """
+    Creates a PDFService outside of a request (background workers).
+    """
+    return get_pdf_service(get_processed_data_repository(get_http_client()))
+
+
+def get_job_queue_dependency() -> JobQueue:
+    """
+    Dependency for getting the background job queue started in the lifespan.
+    """
+    job_queue = get_job_queue()
+    if job_queue is None:
+        raise RuntimeError("Job queue is not started")
+    return job_queue
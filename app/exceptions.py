@@ -5,6 +5,9 @@ from enum import Enum
 
 class ErrorType(Enum):
     CONFLICT_ERROR = "ConflictError"
+    PAYLOAD_TOO_LARGE_ERROR = "PayloadTooLargeError"
+    QUEUE_FULL_ERROR = "QueueFullError"
+    TEMPLATE_MISMATCH_ERROR = "TemplateMismatchError"
     # Добавляем другие типы ошибок по мере необходимости
 
 
@@ -18,3 +21,18 @@ class CustomException(Exception):
 class ConflictError(CustomException):
     def __init__(self, message: str):
         super().__init__(ErrorType.CONFLICT_ERROR, message)
+
+
+class PayloadTooLargeError(CustomException):
+    def __init__(self, message: str):
+        super().__init__(ErrorType.PAYLOAD_TOO_LARGE_ERROR, message)
+
+
+class QueueFullError(CustomException):
+    def __init__(self, message: str):
+        super().__init__(ErrorType.QUEUE_FULL_ERROR, message)
+
+
+class TemplateMismatchError(CustomException):
+    def __init__(self, message: str):
+        super().__init__(ErrorType.TEMPLATE_MISMATCH_ERROR, message)
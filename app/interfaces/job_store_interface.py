@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+
+from app.models.job_model import Job
+
+
+class JobStoreInterface(ABC):
+    """
+    Интерфейс хранилища задач фоновой обработки PDF
+    """
+
+    @abstractmethod
+    def save(self, job: Job) -> None:
+        """
+        Сохраняет новую задачу или обновляет существующую
+        :param job: Задача
+        """
+        pass
+
+    @abstractmethod
+    def get(self, job_id: str) -> Job | None:
+        """
+        Возвращает задачу по идентификатору
+        :param job_id: Идентификатор задачи
+        :return: Задача или None, если её нет
+        """
+        pass
+
+    @abstractmethod
+    def list_unfinished(self) -> list[Job]:
+        """
+        Возвращает незавершённые задачи в порядке создания (для восстановления очереди после перезапуска)
+        """
+        pass
+
+    @abstractmethod
+    def prune(self, finished_before: float) -> None:
+        """
+        Удаляет завершённые задачи, обновлённые раньше указанного времени
+        :param finished_before: Время (unix timestamp)
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы хранилища
+        """
+        pass
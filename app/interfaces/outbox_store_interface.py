@@ -0,0 +1,77 @@
+from abc import ABC, abstractmethod
+
+from app.models.outbox_model import OutboxEntry
+
+
+class OutboxStoreInterface(ABC):
+    """
+    Интерфейс хранилища outbox: отчётов, ожидающих отправки на микросервис отчётов
+    """
+
+    @abstractmethod
+    def add(self, entry: OutboxEntry) -> bool:
+        """
+        Сохраняет новый отчёт, если отчёта с такой хеш-суммой файла ещё нет
+        :param entry: Отчёт
+        :return: True, если отчёт добавлен, False, если он уже есть
+        """
+        pass
+
+    @abstractmethod
+    def save(self, entry: OutboxEntry) -> None:
+        """
+        Обновляет отчёт (статус, количество попыток, время следующей попытки)
+        :param entry: Отчёт
+        """
+        pass
+
+    def save_many(self, entries: list[OutboxEntry]) -> None:
+        """
+        Обновляет несколько отчётов (результат отправки одной пачки)
+        :param entries: Отчёты
+        """
+        for entry in entries:
+            self.save(entry)
+
+    @abstractmethod
+    def get(self, file_sha256: str) -> OutboxEntry | None:
+        """
+        Возвращает отчёт по хеш-сумме файла
+        :param file_sha256: Хеш-сумма файла
+        :return: Отчёт или None, если его нет
+        """
+        pass
+
+    @abstractmethod
+    def claim_due(self, now: float, limit: int, lease_seconds: float) -> list[OutboxEntry]:
+        """
+        Забирает отчёты, время попытки которых наступило, и откладывает их следующую попытку на lease_seconds
+        Забор атомарный: другой отправитель (например, в другом воркере) эти отчёты не получит,
+        а если отправитель упадёт, не сохранив результат, отчёты вернутся в очередь по истечении lease_seconds
+        :param now: Текущее время (unix timestamp)
+        :param limit: Максимальное количество отчётов
+        :param lease_seconds: На сколько отложить следующую попытку
+        :return: Отчёты в порядке создания
+        """
+        pass
+
+    @abstractmethod
+    def counts(self) -> dict[str, int]:
+        """
+        Возвращает количество отчётов по статусам
+        """
+        pass
+
+    @abstractmethod
+    def prune(self, finished_before: float) -> None:
+        """
+        Удаляет отправленные и окончательно неотправленные отчёты, обновлённые раньше указанного времени
+        :param finished_before: Время (unix timestamp)
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы хранилища
+        """
+        pass
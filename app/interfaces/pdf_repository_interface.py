@@ -22,6 +22,13 @@ class PDFRepositoryInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def close(self):
+        """
+        Закрывает документ и освобождает загруженные страницы и построенные по ним данные
+        """
+        pass
+
     @abstractmethod
     def get_page(self, page_num):
         """
@@ -48,6 +55,15 @@ class PDFRepositoryInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_page_drawings(self, page_num):
+        """
+        Возвращает рисунки страницы в виде массивов для векторной проверки критериев
+        :param page_num: Номер страницы
+        :return: Рисунки страницы PageDrawings
+        """
+        pass
+
     @abstractmethod
     def get_text(self, rect):
         """
@@ -58,10 +74,22 @@ class PDFRepositoryInterface(ABC):
         pass
 
     @abstractmethod
-    def draw_rectangle(self, rect, color):
+    def render_overlay_pdf(self, overlay, pages=None):
         """
-        Рисует прямоугольник на странице PDF с указанным цветом
-        :param rect: Прямоугольник с координатами и номером страницы models.Rect
-        :param color: Цвет в формате RGB (0, 0, 0)
+        Рисует отладочную разметку на копии страниц документа, загруженный документ не изменяется
+        :param overlay: Геометрия OverlayGeometry, записанная при обработке документа
+        :param pages: Номера страниц (None - все страницы)
+        :return: PDF с запрошенными страницами в байтах
+        """
+        pass
+
+    @abstractmethod
+    def render_overlay_png(self, overlay, pages=None, dpi=96):
+        """
+        Рисует отладочную разметку на копии страниц документа и растеризует их в PNG
+        :param overlay: Геометрия OverlayGeometry, записанная при обработке документа
+        :param pages: Номера страниц (None - все страницы)
+        :param dpi: Разрешение изображений
+        :return: Список пар (номер страницы, PNG)
         """
         pass
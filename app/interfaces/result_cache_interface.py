@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+
+
+class ResultCacheInterface(ABC):
+    """
+    Интерфейс кэша результатов извлечения данных из PDF
+    Ключ - (SHA-256 файла, имя конфигурации, версия конфигурации), значение - извлечённые данные (простой словарь)
+    Методы get и put асинхронные: реализация с записью на диск сама выносит запросы в поток
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    async def get(self, key: tuple[str, str, str]) -> dict | None:
+        """
+        Возвращает сохранённый результат или None, если его нет
+        :param key: (sha256, имя конфигурации, версия конфигурации)
+        :return: Извлечённые данные или None
+        """
+        pass
+
+    @abstractmethod
+    async def put(self, key: tuple[str, str, str], value: dict) -> None:
+        """
+        Сохраняет результат извлечения
+        :param key: (sha256, имя конфигурации, версия конфигурации)
+        :param value: Извлечённые данные
+        """
+        pass
+
+    @abstractmethod
+    def size(self) -> int:
+        """
+        Возвращает количество сохранённых результатов
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы кэша (соединения, файлы)
+        """
+        pass
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики попаданий и промахов
+        """
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": self.size()
+        }
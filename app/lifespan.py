@@ -5,17 +5,71 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.dependencies import create_pdf_service
+from app.repositories.http_client import close_http_client, get_http_client
+from app.repositories.result_cache import close_result_cache, get_result_cache
+from app.services.config_registry import get_config_registry
+from app.services.executor import get_extraction_executor, shutdown_extraction_executor
+from app.services.job_queue import start_job_queue, stop_job_queue
+from app.services.outbox_sender import start_outbox_sender, stop_outbox_sender
+from app.services.pdf_extraction import warm_up
+from core.config import config as app_config
+
 logger = logging.getLogger(__name__)
 
+_preloaded = False
+
+
+def preload():
+    """
+    Загружает состояние, которое не зависит от процесса: конфигурации структуры PDF и прогретый конвейер извлечения.
+    В продакшен-запуске вызывается в главном процессе gunicorn до запуска воркеров (см. gunicorn.conf.py),
+    воркеры получают загруженные модули и конфигурации через fork и делят эти страницы памяти (copy-on-write).
+    Потоки, пулы и соединения здесь не создаются: они не переживают fork и создаются в каждом воркере в lifespan.
+    """
+    global _preloaded
+    if _preloaded:
+        return
+    # Все конфигурации структуры PDF загружаются и проверяются один раз, ошибка в конфигурации не даст стартовать
+    registry = get_config_registry()
+    config_names = registry.load_all()
+    logger.info(f"PDF structure configs loaded: {', '.join(config_names)}")
+    index = registry.fingerprint_index()
+    candidates = ", ".join(structure.name for structure in index.candidates) or "none"
+    default = index.default.name if index.default is not None else "none (unmatched documents are rejected)"
+    logger.info(f"PDF structure auto-detection candidates: {candidates}; default: {default}")
+    if app_config.WARMUP:
+        for name in config_names:
+            try:
+                warm_up(registry.get(name))
+            except Exception as e:
+                # Прогрев только ускоряет первый запрос, его ошибка не мешает старту
+                logger.warning(f"Warm-up with config '{name}' failed: {e}")
+    _preloaded = True
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Инициализация ресурсов
     logger.info("Starting up...")
     # Можно добавить любую инициализацию, например, подключение к БД, кэширование и т.д.
+    preload()  # Уже выполнено до fork, если приложение запущено через gunicorn
+    executor = get_extraction_executor()
+    logger.info(f"PDF extraction executor: {executor.mode}")
+    if app_config.PDF_MEMORY_BUDGET_MB:
+        logger.info(f"PDF extraction memory budget: {app_config.PDF_MEMORY_BUDGET_MB} MB RSS")
+    get_http_client()  # Общий пул соединений к другим микросервисам
+    get_result_cache()  # Кэш результатов извлечения по хеш-сумме файла
+    await start_outbox_sender()  # Фоновая отправка отчётов на микросервис отчётов
+    await start_job_queue(create_pdf_service)  # Воркеры фоновой обработки
 
     yield  # Запуск приложения
 
     # Очистка ресурсов
     logger.info("Shutting down...")
     # Можно добавить код для закрытия подключений к базе данных, завершения кэширования и т.д.
+    await stop_job_queue()
+    await stop_outbox_sender()  # До закрытия HTTP-клиента, через который отправляются отчёты
+    await close_http_client()
+    close_result_cache()
+    shutdown_extraction_executor()
@@ -0,0 +1,37 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class ExtractionStats:
+    """
+    Счётчики и время этапов извлечения одного документа
+    Собираются репозиторием и процессором во время обработки, затем попадают в метрики (см. app/services/metrics.py)
+    Сериализуются через pickle, поэтому возвращаются и из процессов-воркеров
+    """
+    stages: dict[str, float] = field(default_factory=dict)  # Этап -> суммарное время в секундах
+    pages: int = 0
+    pages_loaded: int = 0  # Сколько раз страницы разбирались PyMuPDF (непросмотренные страницы не загружаются)
+    rows: int = 0
+    drawings_scanned: int = 0
+    text_lookups: int = 0
+
+    def add_time(self, stage: str, seconds: float):
+        """
+        Добавляет время к этапу (этап может выполняться много раз, например поиск текста)
+        :param stage: Название этапа
+        :param seconds: Время в секундах
+        """
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def merge(self, other: "ExtractionStats"):
+        """
+        Добавляет статистику части документа, обработанной отдельно (например, диапазона страниц в другом процессе)
+        Количество страниц не суммируется: это свойство всего документа
+        :param other: Статистика части документа
+        """
+        for stage, seconds in other.stages.items():
+            self.add_time(stage, seconds)
+        self.pages_loaded += other.pages_loaded
+        self.rows += other.rows
+        self.drawings_scanned += other.drawings_scanned
+        self.text_lookups += other.text_lookups
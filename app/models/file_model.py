@@ -1,9 +1,26 @@
 # models/file_model.py
 
+import os
+
+
 class FileModel:
-    def __init__(self, filename: str, content: bytes):
+    def __init__(self, filename: str, content: bytes = None, path: str = None, sha256: str = None,
+                 size: int = None, temporary: bool = False):
+        """
+        Загруженный файл: либо байты в памяти (content), либо файл на диске (path)
+        :param filename: Имя файла, как его прислал клиент
+        :param content: Содержимое файла
+        :param path: Путь к файлу на диске (если содержимое не держится в памяти)
+        :param sha256: Уже посчитанная хеш-сумма SHA-256 (если считалась при приёме файла)
+        :param size: Размер файла в байтах
+        :param temporary: Файл на диске временный и удаляется в cleanup()
+        """
         self.filename = filename
         self.content = content
+        self.path = path
+        self.sha256 = sha256
+        self.size = size if size is not None else (len(content) if content is not None else None)
+        self.temporary = temporary
 
     def get_filename(self) -> str:
         return self.filename
@@ -12,4 +29,19 @@ class FileModel:
         return self.filename.endswith('.pdf')
 
     def get_content(self) -> bytes:
+        # Файл на диске читается по требованию и не кэшируется, чтобы не держать лишнюю копию в памяти
+        if self.content is None and self.path is not None:
+            with open(self.path, 'rb') as f:
+                return f.read()
         return self.content
+
+    def cleanup(self) -> None:
+        """
+        Удаляет временный файл на диске, если он был создан при приёме загрузки
+        """
+        if self.temporary and self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
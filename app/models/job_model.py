@@ -0,0 +1,43 @@
+# models/job_model.py
+
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+
+# Статусы задачи обработки PDF
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CONFLICT = "conflict"
+
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED, JOB_CONFLICT)
+
+
+@dataclass
+class Job:
+    """
+    Задача фоновой обработки загруженного PDF-файла
+    """
+    filename: str
+    path: str  # Сохранённая загрузка на диске, удаляется после обработки
+    sha256: str
+    size: int
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = JOB_QUEUED
+    stage: str | None = None  # Текущий этап обработки: extracting, submitting
+    result: dict | None = None  # Ответ микросервиса отчётов
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> dict:
+        """
+        Представление задачи для ответа API (без пути к файлу на диске)
+        """
+        data = asdict(self)
+        del data['path']
+        return data
@@ -0,0 +1,52 @@
+# models/outbox_model.py
+
+import time
+from dataclasses import dataclass, field
+
+# Статусы отчёта в outbox
+OUTBOX_PENDING = "pending"  # Ожидает отправки или повторной попытки
+OUTBOX_DELIVERED = "delivered"
+OUTBOX_CONFLICT = "conflict"  # Микросервис ответил 409: отчёт у него уже есть
+OUTBOX_FAILED = "failed"  # Попытки исчерпаны или ошибка, которую повтор не исправит
+
+FINISHED_STATUSES = (OUTBOX_DELIVERED, OUTBOX_CONFLICT, OUTBOX_FAILED)
+
+
+@dataclass
+class OutboxEntry:
+    """
+    Отчёт, ожидающий отправки на микросервис отчётов
+    Хеш-сумма файла - ключ идемпотентности: один и тот же отчёт хранится и отправляется один раз
+    """
+    file_sha256: str
+    filename: str
+    config_name: str  # Конфигурация структуры PDF, по которой извлечён отчёт (для метрик)
+    url: str  # Адрес приёма одного отчёта
+    batch_url: str | None  # Адрес пакетного приёма (None - микросервис принимает только по одному)
+    payload: bytes  # Отчёт, уже сериализованный в JSON (см. ProcessedDataModel.to_json)
+    status: str = OUTBOX_PENDING
+    attempts: int = 0
+    next_attempt_at: float = field(default_factory=time.time)
+    response: dict | None = None  # Ответ микросервиса отчётов
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> dict:
+        """
+        Представление для ответа API (без самого отчёта)
+        """
+        return {
+            "file_sha256": self.file_sha256,
+            "filename": self.filename,
+            "status": self.status,
+            "attempts": self.attempts,
+            "next_attempt_at": self.next_attempt_at if self.status == OUTBOX_PENDING else None,
+            "response": self.response,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
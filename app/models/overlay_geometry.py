@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.models.pdf_models import RectArray
+from app.models.pdf_structure import Columns
+
+# Виды прямоугольников отладочной разметки, цвет каждого вида задаётся при отрисовке
+OVERLAY_TEXT = "text"  # Текстовые поля
+OVERLAY_POINTER = "pointer"  # Указатели блоков и строк таблиц
+OVERLAY_CELL = "cell"  # Ячейки блоков и строк, из которых извлекается текст
+
+
+@dataclass(slots=True)
+class OverlayLayer:
+    """
+    Прямоугольники одного вида для одного объекта или указателя конфигурации
+    """
+    kind: str  # OVERLAY_TEXT, OVERLAY_POINTER или OVERLAY_CELL
+    name: str  # Имя объекта или указателя из конфигурации
+    rects: RectArray
+
+
+@dataclass(slots=True)
+class OverlayGeometry:
+    """
+    Геометрия отладочной разметки: прямоугольники, найденные при обработке документа
+    Записывается обработчиками только по запросу (см. PDFProcessor.process_pdf), сам документ не изменяется.
+    Разметка рисуется потом на копии нужных страниц (см. PDFRepository.render_overlay_pdf)
+    Сериализуется через pickle, поэтому возвращается и из процессов-воркеров
+    """
+    layers: list[OverlayLayer] = field(default_factory=list)
+
+    def add(self, kind: str, name: str, rects: RectArray):
+        """
+        Добавляет прямоугольники одного вида
+        :param kind: OVERLAY_TEXT, OVERLAY_POINTER или OVERLAY_CELL
+        :param name: Имя объекта или указателя из конфигурации
+        :param rects: Прямоугольники models.RectArray
+        """
+        self.layers.append(OverlayLayer(kind, name, rects))
+
+    def add_cells(self, name: str, rects: RectArray, columns: Columns):
+        """
+        Добавляет ячейки: прямоугольники указателей, разрезанные по границам столбцов
+        Ячейки считаются разом для всех прямоугольников, так же как в TableHandler.extract_data_from_rect
+        :param name: Имя указателя из конфигурации
+        :param rects: Прямоугольники указателей models.RectArray
+        :param columns: Столбцы указателя
+        """
+        parts = []
+        for x0, x1 in columns.bounds:
+            cells = rects.data.copy()
+            cells["x0"] = rects.data["x0"] + x0
+            cells["x1"] = rects.data["x0"] + x1
+            parts.append(cells)
+        self.add(OVERLAY_CELL, name, RectArray(np.concatenate(parts)) if parts else RectArray())
+
+    def merge(self, other: "OverlayGeometry"):
+        """
+        Добавляет геометрию, записанную отдельно (например, в процессе-воркере)
+        """
+        self.layers.extend(other.layers)
+
+    def on_page(self, page_num: int) -> list[tuple[str, np.ndarray]]:
+        """
+        Прямоугольники страницы по слоям
+        :param page_num: Номер страницы
+        :return: Список пар (вид, массив с типом RectArray.DTYPE), пустые слои пропускаются
+        """
+        result = []
+        for layer in self.layers:
+            data = layer.rects.data
+            data = data[data["page"] == page_num]
+            if len(data):
+                result.append((layer.kind, data))
+        return result
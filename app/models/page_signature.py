@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+
+from app.models.pdf_structure import RectTemplate
+
+
+@dataclass(slots=True)
+class PageSignature:
+    """
+    Дешёвая сигнатура первой страницы документа для выбора конфигурации (см. template_detection)
+    Строится без извлечения данных: размер страницы, гистограмма высот рисунков и текст опорных областей
+    """
+    width: float = 0.0
+    height: float = 0.0
+    heights: dict[float, int] = field(default_factory=dict)  # Высота рисунка (с шагом 0.01) -> количество рисунков
+    anchors: dict[RectTemplate, str] = field(default_factory=dict)  # Опорная область -> текст в ней
+
+    def count_heights(self, value: float, tolerance: float) -> int:
+        """
+        Количество рисунков с высотой в пределах погрешности (как у критерия height указателя)
+        """
+        return sum(count for height, count in self.heights.items() if abs(height - value) < tolerance)
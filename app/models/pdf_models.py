@@ -3,6 +3,11 @@
 # Это позволяет разделить логику работы с данными и их представление
 # В данном случае модели используются для хранения данных о метаданных PDF-файла и данных о простое лифтов
 
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
 class PDFMetadata:
     """
     Метаданные PDF-файла
@@ -19,42 +24,121 @@ class Rect:
     Прямоугольник на странице PDF
     Содержит координаты углов и номер страницы,
     так как прямоугольник может быть на разных страницах и его полная идентификация требует страницы
+    Прямоугольники создаются тысячами на документ (строки, блоки, ячейки), поэтому без __dict__
     """
 
+    __slots__ = ("x0", "y0", "x1", "y1", "page")
+
     def __init__(self, x0: float, y0: float, x1: float, y1: float, page: int):
         self.x0 = x0
         self.y0 = y0
         self.x1 = x1
         self.y1 = y1
         self.page = page  # У нас трёхмерное пространство по сути, две координаты на странице и номер страницы
-        self.width = x1 - x0
-        self.height = y1 - y0
 
+    @property
+    def width(self) -> float:
+        return self.x1 - self.x0
 
-class LiftCompanyReport:
+    @property
+    def height(self) -> float:
+        return self.y1 - self.y0
+
+
+class RectArray:
     """
-    Отчет о простое лифтов для компании
+    Набор прямоугольников в структурированном массиве NumPy (по строке на прямоугольник)
+    Используется для указателей блоков и строк: их тысячи на документ, а сортировка и группировка
+    работают со столбцами page и y0 целиком. Отдельные Rect создаются только при обращении к элементу.
     """
 
-    def __init__(self, company_name: str):
-        self.company_name = company_name
-        self.reports = []
+    DTYPE = np.dtype([("page", np.int32), ("x0", np.float64), ("y0", np.float64), ("x1", np.float64),
+                      ("y1", np.float64)])
 
-    def dict(self):
-        return {
-            "company_name": self.company_name,
-            "reports": [report.__dict__ for report in self.reports]
-        }
+    __slots__ = ("data",)
+
+    def __init__(self, data: np.ndarray = None):
+        """
+        :param data: Структурированный массив с типом RectArray.DTYPE (по умолчанию пустой)
+        """
+        self.data = data if data is not None else np.empty(0, dtype=self.DTYPE)
+
+    @classmethod
+    def concatenate(cls, arrays: list["RectArray"]) -> "RectArray":
+        """
+        Склеивает наборы прямоугольников в порядке следования
+        """
+        if not arrays:
+            return cls()
+        return cls(np.concatenate([array.data for array in arrays]))
+
+    @classmethod
+    def from_rects(cls, rects: list[Rect]) -> "RectArray":
+        """
+        Создаёт набор из отдельных прямоугольников Rect
+        """
+        return cls(np.array([(rect.page, rect.x0, rect.y0, rect.x1, rect.y1) for rect in rects], dtype=cls.DTYPE))
 
+    def sorted(self) -> "RectArray":
+        """
+        Возвращает прямоугольники, отсортированные по странице и координате Y
+        Сортировка устойчивая: прямоугольники с одинаковыми страницей и Y остаются в исходном порядке
+        """
+        return RectArray(self.data[np.lexsort((self.data["y0"], self.data["page"]))])
 
+    def to_rects(self) -> list[Rect]:
+        """
+        Создаёт объекты Rect для всех прямоугольников (координаты - обычные float, а не скаляры NumPy)
+        """
+        data = self.data
+        return [Rect(x0, y0, x1, y1, page) for page, x0, y0, x1, y1 in
+                zip(data["page"].tolist(), data["x0"].tolist(), data["y0"].tolist(), data["x1"].tolist(),
+                    data["y1"].tolist())]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index: int) -> Rect:
+        page, x0, y0, x1, y1 = self.data[index].tolist()
+        return Rect(x0, y0, x1, y1, page)
+
+    def __iter__(self):
+        return iter(self.to_rects())
+
+
+@dataclass(slots=True)
 class LiftReport:
     """
     Отчет о простое лифта
     """
+    start_time: str
+    end_time: str
+    downtime_hours: int
+    factory_number: str
+    reg_number: str
+
 
-    def __init__(self, start_time: str, end_time: str, downtime_hours: int, factory_number: str, reg_number: str):
-        self.start_time = start_time
-        self.end_time = end_time
-        self.downtime_hours = downtime_hours
-        self.factory_number = factory_number
-        self.reg_number = reg_number
+@dataclass(slots=True)
+class LiftCompanyReport:
+    """
+    Отчет о простое лифтов для компании
+    Создаётся один раз из извлечённых ячеек и без копирования в словари попадает в ProcessedDataModel,
+    откуда сериализуется в JSON (см. app/models/processed_data_model.py)
+    """
+    company_name: str
+    reports: list[LiftReport] = field(default_factory=list)
+
+    def dict(self):
+        return {
+            "company_name": self.company_name,
+            "reports": [
+                {
+                    "start_time": report.start_time,
+                    "end_time": report.end_time,
+                    "downtime_hours": report.downtime_hours,
+                    "factory_number": report.factory_number,
+                    "reg_number": report.reg_number,
+                }
+                for report in self.reports
+            ]
+        }
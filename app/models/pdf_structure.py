@@ -0,0 +1,211 @@
+# Скомпилированные конфигурации структуры PDF-документов
+# YAML-файлы из core/configs/pdf_structures один раз разбираются, проверяются и превращаются в неизменяемые объекты,
+# в которых уже посчитано всё, что обработчикам нужно в горячих циклах: смещения столбцов, шаблоны прямоугольников,
+# критерии указателей. Объекты сериализуемы через pickle, их можно передавать в процессы-воркеры.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.models.pdf_models import Rect, RectArray
+
+
+@dataclass(frozen=True, slots=True)
+class RectTemplate:
+    """
+    Шаблон прямоугольника: смещение относительно опорной точки и размеры
+    Для объектов с абсолютными координатами опорная точка - начало координат страницы
+    """
+    dx: float
+    dy: float
+    width: float
+    height: float
+
+    def place(self, x: float, y: float, page: int) -> Rect:
+        """
+        Строит прямоугольник models.Rect от опорной точки
+        :param x: Координата X опорной точки
+        :param y: Координата Y опорной точки
+        :param page: Номер страницы
+        :return: Прямоугольник models.Rect
+        """
+        x0 = x + self.dx
+        y0 = y + self.dy
+        return Rect(x0, y0, x0 + self.width, y0 + self.height, page)
+
+    def place_many(self, x: np.ndarray, y: np.ndarray, page) -> RectArray:
+        """
+        Строит прямоугольники от нескольких опорных точек (те же вычисления, что в place)
+        :param x: Координаты X опорных точек
+        :param y: Координаты Y опорных точек
+        :param page: Номер страницы или массив номеров страниц опорных точек
+        :return: Прямоугольники RectArray
+        """
+        data = np.empty(len(x), dtype=RectArray.DTYPE)
+        data["page"] = page
+        data["x0"] = x + self.dx
+        data["y0"] = y + self.dy
+        data["x1"] = data["x0"] + self.width
+        data["y1"] = data["y0"] + self.height
+        return RectArray(data)
+
+
+@dataclass(frozen=True, slots=True)
+class Columns:
+    """
+    Столбцы области с данными: имена и заранее посчитанные границы по X относительно левого края области
+    """
+    names: tuple[str, ...]
+    bounds: tuple[tuple[float, float], ...]  # (x0, x1) каждого столбца относительно левого края
+
+
+@dataclass(frozen=True, slots=True)
+class Criterion:
+    """
+    Критерий поиска рисунка: значение признака и допустимая погрешность
+    """
+    name: str  # Признак рисунка: height, width, line_width, color или fill
+    value: tuple[float, ...]  # Одно число для размеров, три компоненты RGB для цветов
+    tolerance: float  # Рисунок подходит, если каждая компонента отличается от значения меньше, чем на tolerance
+
+
+@dataclass(frozen=True, slots=True)
+class PointerConfig:
+    """
+    Указатель таблицы (блоков, строк и т.д.), который ищется среди рисунков страницы
+    """
+    name: str  # Имя указателя в конфигурации, например "blocks_pointer"
+    type: str
+    criteria: tuple[Criterion, ...]  # Дешёвые критерии идут первыми, см. config_compiler
+    multiple: bool
+    rect: RectTemplate  # Область данных относительно левого верхнего угла найденного рисунка
+    columns: Columns
+
+
+@dataclass(frozen=True, slots=True)
+class EndOfTableMarker:
+    """
+    Маркер конца таблицы: рисунок или текст, ниже и после которого указатели таблицы не ищутся
+    """
+    type: str  # "none" (таблица до конца документа), "drawing" или "text"
+    criteria: tuple[Criterion, ...] = ()  # Критерии рисунка-маркера (для "drawing")
+    text: str = ""  # Текст-маркер, ищется как подстрока строки страницы (для "text")
+    rect: RectTemplate | None = None  # Где искать текст на странице, абсолютные координаты (None - вся страница)
+
+
+@dataclass(frozen=True, slots=True)
+class PageRange:
+    """
+    Страницы документа, на которых ищется объект: срез [start:end] по номерам страниц,
+    отрицательные значения отсчитываются от конца документа, как у срезов Python
+    """
+    start: int = 0
+    end: int | None = None  # Страница после последней (None - до конца документа)
+
+    def resolve(self, num_pages: int) -> range:
+        """
+        Номера страниц для документа с заданным количеством страниц
+        :param num_pages: Количество страниц документа
+        :return: Диапазон номеров страниц
+        """
+        return range(num_pages)[self.start:self.end]
+
+
+@dataclass(frozen=True, slots=True)
+class TextObjectConfig:
+    """
+    Текстовый объект с абсолютными координатами
+    """
+    name: str
+    method: str
+    rect: RectTemplate
+    page_number: int
+    type: str = "text"
+
+
+@dataclass(frozen=True, slots=True)
+class TableObjectConfig:
+    """
+    Табличный объект, определяемый по указателям
+    """
+    name: str
+    method: str
+    pointers: tuple[PointerConfig, ...]
+    end_of_table_marker: EndOfTableMarker
+    pages: PageRange = PageRange()
+    type: str = "table"
+
+    def get_pointer(self, name: str) -> PointerConfig:
+        """
+        Возвращает указатель по имени из конфигурации
+        :param name: Имя указателя, например "row_pointer"
+        :return: Указатель PointerConfig
+        """
+        for pointer in self.pointers:
+            if pointer.name == name:
+                return pointer
+        raise KeyError(f"Pointer '{name}' is not defined in table '{self.name}'")
+
+    @property
+    def blocks_pointer(self) -> PointerConfig:
+        return self.get_pointer("blocks_pointer")
+
+    @property
+    def row_pointer(self) -> PointerConfig:
+        return self.get_pointer("row_pointer")
+
+
+@dataclass(frozen=True, slots=True)
+class ServiceEndpoint:
+    """
+    Адрес микросервиса, куда отправляются обработанные данные
+    """
+    base_url: str
+    endpoint: str
+    batch_endpoint: str | None = None  # Принимает список отчётов одним запросом, если сервис это поддерживает
+
+    @property
+    def url(self) -> str:
+        return self.base_url + self.endpoint
+
+    @property
+    def batch_url(self) -> str | None:
+        return self.base_url + self.batch_endpoint if self.batch_endpoint else None
+
+
+@dataclass(frozen=True, slots=True)
+class AnchorConfig:
+    """
+    Опорный текст первой страницы: область в абсолютных координатах и ожидаемый в ней текст
+    """
+    rect: RectTemplate
+    text: str = ""  # Подстрока текста области
+    pattern: str = ""  # Регулярное выражение, которое должно найтись в тексте области
+
+
+@dataclass(frozen=True, slots=True)
+class Fingerprint:
+    """
+    Признаки первой страницы документа, по которым конфигурация выбирается автоматически (см. template_detection)
+    Документ подходит, если выполнены все заданные признаки
+    """
+    page_size: tuple[float, float] | None  # Ширина и высота страницы (None - не проверяется)
+    page_size_tolerance: float
+    drawing_heights: tuple[Criterion, ...]  # На странице есть хотя бы один рисунок каждой высоты
+    anchors: tuple[AnchorConfig, ...]
+
+    @property
+    def num_checks(self) -> int:
+        return (self.page_size is not None) + len(self.drawing_heights) + len(self.anchors)
+
+
+@dataclass(frozen=True, slots=True)
+class PDFStructure:
+    """
+    Скомпилированная конфигурация структуры PDF-документа
+    """
+    name: str  # Имя конфигурации (имя файла без расширения)
+    version: str  # Короткий хеш содержимого файла, меняется при любом изменении конфигурации
+    objects: tuple[TextObjectConfig | TableObjectConfig, ...]
+    processed_data_service: ServiceEndpoint | None = None
+    fingerprint: Fingerprint | None = None  # None - конфигурация не участвует в автоматическом выборе
@@ -2,14 +2,30 @@
 
 from typing import List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
+
+from app.models.pdf_models import LiftCompanyReport
 
 
 class ProcessedDataModel(BaseModel):
     """
     Модель данных для отправки обработанных данных на другой микросервис.
+    Отчёты по компаниям хранятся объектами LiftCompanyReport как есть, без промежуточных словарей.
     """
     filename: str  # Имя файла
     file_sha256: str  # SHA256 хеш файла
     report_time: str  # Время из отчёта
-    companies: List[dict]  # Пример структуры данн
+    companies: List[LiftCompanyReport]  # Отчёты по компаниям
+
+    _json: bytes | None = PrivateAttr(default=None)
+
+    def to_json(self) -> bytes:
+        """
+        Сериализует модель в JSON (UTF-8, без пробелов) сериализатором pydantic-core.
+        Сериализация выполняется один раз: одни и те же байты отправляются микросервису и возвращаются в ответе API.
+
+        :return: JSON в байтах.
+        """
+        if self._json is None:
+            self._json = self.__pydantic_serializer__.to_json(self)
+        return self._json
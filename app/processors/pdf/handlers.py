@@ -1,4 +1,13 @@
+from collections import deque
+from collections.abc import Iterator
+
+import numpy as np
+
 import app.models.pdf_models as models
+from app.models.overlay_geometry import OVERLAY_POINTER, OVERLAY_TEXT, OverlayGeometry
+from app.models.pdf_structure import (Columns, Criterion, EndOfTableMarker, PointerConfig, TableObjectConfig,
+                                      TextObjectConfig)
+from app.repositories.page_drawings import PageDrawings
 
 
 class TextHandler:
@@ -10,32 +19,29 @@ class TextHandler:
     def __init__(self, repository):
         self.repository = repository
 
-    def handle(self, config, draw_rectangles: bool):
+    def handle(self, config: TextObjectConfig, overlay: OverlayGeometry | None = None):
         """
         Обработка текстового поля в PDF-документе по конфигурации
         :param config: Конфигурация обработки текстового поля
-        :param draw_rectangles: Рисовать ли прямоугольник вокруг обработанного текста (для отладки)
+        :param overlay: Куда записать прямоугольник текста для отладочной разметки (None - не записывать)
         :return: Текст внутри прямоугольника
         """
-        rect = self.calculate_rect(config, config['page_number'])
+        rect = self.calculate_rect(config, config.page_number)
         text = self.repository.get_text(rect)
-        if draw_rectangles:
-            self.repository.draw_rectangle(rect, color=(0, 0, 1))
+        if overlay is not None:
+            overlay.add(OVERLAY_TEXT, config.name, models.RectArray.from_rects([rect]))
         return text
 
     @staticmethod
-    def calculate_rect(config, page):
+    def calculate_rect(config: TextObjectConfig, page):
         """
         Вычисление прямоугольника по конфигурации и номеру страницы (по сути по полным трёхмерным координатам)
         :param config: Конфигурация обработки текстового поля
         :param page: Номер страницы
         :return: Прямоугольник models.Rect
         """
-        x = config['offset']['x']
-        y = config['offset']['y']
-        width = config['dimensions']['width']
-        height = config['dimensions']['height']
-        return models.Rect(x, y, x + width, y + height, page)
+        # Координаты абсолютные, поэтому опорная точка - начало координат страницы
+        return config.rect.place(0, 0, page)
 
 
 class TableHandler:
@@ -45,202 +51,422 @@ class TableHandler:
     Реализован только один, но оставлена возможность добавления других методов
     """
 
-    def __init__(self, repository):
+    def __init__(self, repository, page_pool=None):
+        """
+        :param repository: Репозиторий для работы с PDF-документом
+        :param page_pool: Пул для параллельной обработки диапазонов страниц (см. app/services/page_parallel.py),
+        None - все страницы обрабатываются последовательно
+        """
         self.repository = repository
+        self.page_pool = page_pool
 
-    def handle(self, config, draw_rectangles: bool):
+    def handle(self, config: TableObjectConfig, overlay: OverlayGeometry | None = None):
         """
         Обработка таблицы в PDF-документе по конфигурации
         :param config: Конфигурация обработки таблицы
-        :param draw_rectangles: Рисовать ли прямоугольники вокруг обработанных объектов (для отладки)
+        :param overlay: Куда записать прямоугольники указателей и ячеек для отладочной разметки (None - не записывать)
         :return: Список словарей с данными из таблицы
         """
-        if config['method'] == 'by_pointers':  # Обработка таблицы по указателям, единственный метод пока-что
-            return self.handle_by_pointers(config, draw_rectangles)
+        return list(self.iter_rows(config, overlay))
+
+    def pages(self, config: TableObjectConfig) -> range:
+        """
+        Страницы, на которых ищется таблица (см. PageRange), остальные страницы не загружаются
+        Если задан маркер конца таблицы, просмотр останавливается раньше, на странице маркера
+        :param config: Конфигурация обработки таблицы
+        :return: Диапазон номеров страниц
+        """
+        return config.pages.resolve(self.repository.get_num_pages())
+
+    def iter_rows(self, config: TableObjectConfig, overlay: OverlayGeometry | None = None) -> Iterator[dict]:
+        """
+        Обработка таблицы с выдачей результата по мере готовности
+        :param config: Конфигурация обработки таблицы
+        :param overlay: Куда записать прямоугольники указателей и ячеек для отладочной разметки (None - не записывать)
+        :return: Итератор словарей {"block": данные блока, "rows": данные его строк}
+        """
+        if config.method == 'by_pointers':  # Обработка таблицы по указателям, единственный метод пока-что
+            return self.iter_rows_by_pointers(config, overlay)
         else:
-            raise ValueError(f"Unknown processing type '{config['method']}'")
+            raise ValueError(f"Unknown processing type '{config.method}'")
 
-    def handle_by_pointers(self, config, draw_rectangles: bool):
+    def handle_by_pointers(self, config: TableObjectConfig, overlay: OverlayGeometry | None = None):
         """
         Обработка таблицы по указателям блоков и строк
         Использует указатели блоков и строк для обработки таблицы
         Указателями могут быть любой вид объектов в PDF, которые можно найти по признакам
         :param config: Конфигурация обработки таблицы
-        :param draw_rectangles: Рисовать ли прямоугольники вокруг обработанных объектов (для отладки)
+        :param overlay: Куда записать прямоугольники указателей и ячеек для отладочной разметки (None - не записывать)
         :return: Список словарей с данными из таблицы
         """
-        # 1. Найти и отсортировать указатели блоков на всех страницах
+        return list(self.iter_rows_by_pointers(config, overlay))
+
+    def iter_rows_by_pointers(self, config: TableObjectConfig,
+                              overlay: OverlayGeometry | None = None) -> Iterator[dict]:
+        """
+        Обработка таблицы по указателям блоков и строк с выдачей каждого блока, как только он закончен
+        Страницы обрабатываются по порядку, в памяти остаются только незаконченный блок и ещё не отданные строки,
+        поэтому время до первого блока и занимаемая память не зависят от количества страниц
+        :param config: Конфигурация обработки таблицы
+        :param overlay: Куда записать прямоугольники указателей и ячеек для отладочной разметки (None - не записывать)
+        :return: Итератор словарей {"block": данные блока, "rows": данные его строк} в порядке блоков
+        """
+        # Блоки, ещё не отданные: (страница, координата Y, данные)
+        blocks = deque()
+        # Строки, ещё не отданные ни одному блоку, по столбцам
+        row_pages, row_y0s, row_data = [], [], []
+        # Докуда просмотрены строки первого блока (просмотр продолжается, пока известен следующий блок)
+        group_start, row_index = None, 0
+        block_parts, row_parts = [], []
+        first_block = True
+
+        # 1-2. Найти указатели блоков и строк и извлечь их данные (см. extract_page_range) по диапазонам страниц
+        for block_rects, block_data, row_rects, part_row_data in self.iter_page_ranges(config):
+            if overlay is not None:
+                block_parts.append(block_rects)
+                row_parts.append(row_rects)
+            # Диапазоны идут по порядку страниц, поэтому дописывание сохраняет сортировку по странице и координате Y
+            blocks.extend(zip(block_rects.data["page"].tolist(), block_rects.data["y0"].tolist(), block_data))
+            row_pages.extend(row_rects.data["page"].tolist())
+            row_y0s.extend(row_rects.data["y0"].tolist())
+            row_data.extend(part_row_data)
+            if first_block and blocks:
+                # Строки выше первого блока (продолжение блока со страницы перед pages) не принадлежат ни одному блоку
+                skip = self.count_rows_before(blocks[0][0], blocks[0][1], row_pages, row_y0s)
+                del row_pages[:skip], row_y0s[:skip], row_data[:skip]
+                first_block = False
+
+            # 3-4. Группировка строк по блокам (см. group_rows_by_blocks)
+            # Строка на следующих страницах принадлежит последнему блоку выше неё, поэтому блок закончен, только когда
+            # известен следующий блок и среди строк нашлась первая, которая блоку уже не принадлежит
+            while len(blocks) > 1:
+                block_page, block_y0, data = blocks[0]
+                next_page, next_y0, _ = blocks[1]
+                group_start, row_index, finished = self.assign_rows(block_page, block_y0, next_page, next_y0,
+                                                                    row_pages, row_y0s, row_index, group_start)
+                if not finished:
+                    break
+                yield {"block": data, "rows": row_data[row_index if group_start is None else group_start:row_index]}
+                blocks.popleft()
+                del row_pages[:row_index], row_y0s[:row_index], row_data[:row_index]
+                group_start, row_index = None, 0
+
+        # Документ закончился: оставшиеся строки распределяются между оставшимися блоками
+        while blocks:
+            block_page, block_y0, data = blocks.popleft()
+            next_page, next_y0, _ = blocks[0] if blocks else (None, None, None)
+            group_start, row_index, _ = self.assign_rows(block_page, block_y0, next_page, next_y0,
+                                                         row_pages, row_y0s, row_index, group_start)
+            yield {"block": data, "rows": row_data[row_index if group_start is None else group_start:row_index]}
+            group_start = None
+
+        if overlay is not None:
+            # Ячейки не записываются при извлечении текста, а считаются по указателям и границам столбцов
+            for pointer_config, parts in ((config.blocks_pointer, block_parts), (config.row_pointer, row_parts)):
+                rects = models.RectArray.concatenate(parts)
+                overlay.add(OVERLAY_POINTER, pointer_config.name, rects)
+                overlay.add_cells(pointer_config.name, rects, pointer_config.columns)
+
+    def iter_page_ranges(self, config: TableObjectConfig) -> Iterator[tuple[models.RectArray, list,
+                                                                            models.RectArray, list]]:
+        """
+        Извлекает блоки и строки таблицы по диапазонам страниц в порядке страниц
+        Без пула (или для документа меньше page_pool.min_pages страниц) - по одной странице,
+        с пулом - диапазоны обрабатываются параллельно в процессах
+        Просматриваются только страницы таблицы (см. pages), после диапазона с маркером конца таблицы
+        следующие диапазоны не запрашиваются
+        :param config: Конфигурация обработки таблицы
+        :return: Итератор результатов extract_page_range без страницы маркера
+        """
+        pages = self.pages(config)
+        if self.page_pool is not None and self.page_pool.accepts(self.repository.get_num_pages()):
+            for *part, end_page, stats in self.page_pool.iter_table(self.repository.file, config, pages):
+                self.repository.stats.merge(stats)
+                yield part
+                if end_page is not None:
+                    return
+        else:
+            for page_num in pages:
+                *part, end_page = self.extract_page_range(config, page_num, page_num + 1)
+                yield part
+                if end_page is not None:
+                    return
+
+    def extract_page_range(self, config: TableObjectConfig, page_start: int,
+                           page_end: int) -> tuple[models.RectArray, list, models.RectArray, list, int | None]:
+        """
+        Находит указатели блоков и строк на страницах диапазона и извлекает их данные
+        :param config: Конфигурация обработки таблицы
+        :param page_start: Первая страница диапазона
+        :param page_end: Страница после последней страницы диапазона
+        :return: Прямоугольники блоков, данные блоков, прямоугольники строк, данные строк и страница,
+        на которой найден маркер конца таблицы (None - таблица в диапазоне не закончилась);
+        прямоугольники отсортированы по странице и координате Y, данные идут в том же порядке
+        """
+        # 1. Найти и отсортировать указатели блоков на страницах
         # ( Блоками мы называем части таблицы, которые имеют собственный заголовок и строки с данными )
         # ( В нашем случае с лифтами заголовок блока это просто название компании,
         # но тут может быть что угодно, метод универсальный )
+        # Указатели блоков и строк ищутся за один проход по рисункам страниц
+        # Просмотр страниц останавливается на маркере конца таблицы
+        pointers, end_page = self.scan_pages(config.pointers, page_start, page_end, config.end_of_table_marker)
 
-        block_pointers = self.find_block_pointers(config['blocks_pointer'])
-        block_pointers.sort(key=lambda b: (b.page, b.y0))  # Сортировка по странице и координате Y
+        block_pointers = pointers['blocks_pointer'].sorted()  # Сортировка по странице и координате Y
         # При чём сортировка по странице более приоритетна, чтобы сначала шли блоки с одной страницы
 
-        # 2. Найти и сортировать строки на всех страницах
-        rows = self.find_rows(config['row_pointer'])
-        rows.sort(key=lambda r: (r.page, r.y0))  # Сортировка строк по странице и координате Y
+        # 2. Найти и сортировать строки на страницах
+        rows = pointers['row_pointer'].sorted()  # Сортировка строк по странице и координате Y
 
-        # 3. Группировка строк по блокам
-        blocks = self.group_rows_by_blocks(block_pointers, rows)
+        blocks_columns = config.blocks_pointer.columns
+        rows_columns = config.row_pointer.columns
+        return (block_pointers,
+                [self.extract_data_from_rect(blocks_columns, rect) for rect in block_pointers],
+                rows,
+                [self.extract_data_from_rect(rows_columns, rect) for rect in rows],
+                end_page)
 
-        # 4. Обработать блоки и строки
-        result = []
-        for block in blocks:
-            block_header = self.extract_data_from_rect(config['blocks_pointer']['headers'], block['block_rect'],
-                                                       draw_rectangles)
-            rows_headers = [self.extract_data_from_rect(config['row_pointer']['headers'], row, draw_rectangles) for row
-                            in block['rows']]
-            result.append({
-                "block": block_header,
-                "rows": rows_headers
-            })
-        return result
+    def find_pointers(self, pointer_configs: tuple[PointerConfig, ...], page_start: int = 0, page_end: int = None,
+                      end_of_table_marker: EndOfTableMarker | None = None) -> dict[str, models.RectArray]:
+        """
+        Находит указатели всех видов за один проход по рисункам каждой страницы
+        Рисунки страницы запрашиваются один раз, критерии каждого указателя проверяются векторно по всем рисункам
+        :param pointer_configs: Указатели таблицы (blocks_pointer, row_pointer и любые будущие)
+        :param page_start: Первая страница (по умолчанию первая страница документа)
+        :param page_end: Страница после последней (по умолчанию до конца документа)
+        :param end_of_table_marker: Маркер конца таблицы (None - искать до page_end)
+        :return: Словарь {имя указателя: прямоугольники models.RectArray в порядке страниц и рисования}
+        """
+        return self.scan_pages(pointer_configs, page_start, page_end, end_of_table_marker)[0]
 
-    def find_block_pointers(self, block_config) -> list[models.Rect]:
+    def scan_pages(self, pointer_configs: tuple[PointerConfig, ...], page_start: int = 0, page_end: int = None,
+                   end_of_table_marker: EndOfTableMarker | None = None) -> tuple[dict[str, models.RectArray],
+                                                                                int | None]:
         """
-        Находит указатели блоков на всех страницах
-        :param block_config:
-        :return:
+        Находит указатели всех видов (см. find_pointers) до маркера конца таблицы
+        На странице маркера учитываются только указатели выше него, следующие страницы не загружаются
+        :return: Словарь {имя указателя: прямоугольники models.RectArray} и страница маркера
+        (None - маркер не найден или не задан)
         """
-        block_pointers = []
-        num_pages = self.repository.get_num_pages()
-        for page_num in range(num_pages):
+        # Имя указателя -> найденные на страницах (координаты X, координаты Y, номер страницы)
+        found = {pointer_config.name: [] for pointer_config in pointer_configs}
+        if page_end is None:
+            page_end = self.repository.get_num_pages()
+        if end_of_table_marker is not None and end_of_table_marker.type == "none":
+            end_of_table_marker = None
+        end_page = None
+        for page_num in range(page_start, page_end):
             # Получаем все рисунки на странице
-            drawings = self.repository.get_drawings(page_num)
-            for drawing in drawings:
-                # Проверяем, что рисунок соответствует критериям
-                if self.match_drawing(drawing, block_config['criteria']):
-                    # Мы сохраняем полную координату прямоугольника, то есть включая ширину, высоту и номер страницы
-                    block_rect = self.calculate_rect(drawing, block_config, page_num)
-                    block_pointers.append(block_rect)
-        return block_pointers
+            drawings = self.repository.get_page_drawings(page_num)
+            end_y = None
+            if end_of_table_marker is not None:
+                end_y = self.find_end_of_table(end_of_table_marker, drawings, page_num)
+            if len(drawings):
+                for pointer_config in pointer_configs:
+                    # Находим рисунки, которые соответствуют критериям, в порядке рисования
+                    indices = self.match_drawings(drawings, pointer_config.criteria)
+                    if end_y is not None:
+                        indices = indices[drawings.y0[indices] < end_y]
+                    if len(indices):
+                        found[pointer_config.name].append((drawings.x0[indices], drawings.y0[indices], page_num))
+            if end_y is not None:
+                end_page = page_num
+                break
+
+        # Прямоугольники всех страниц вычисляются разом
+        # Мы сохраняем полную координату прямоугольника, то есть включая ширину, высоту и номер страницы
+        pointers = {}
+        for pointer_config in pointer_configs:
+            pages = found[pointer_config.name]
+            if not pages:
+                pointers[pointer_config.name] = models.RectArray()
+                continue
+            x0 = np.concatenate([x0 for x0, _, _ in pages])
+            y0 = np.concatenate([y0 for _, y0, _ in pages])
+            page_nums = np.repeat([page_num for _, _, page_num in pages], [len(x0) for x0, _, _ in pages])
+            pointers[pointer_config.name] = self.calculate_rects(x0, y0, pointer_config, page_nums)
+        return pointers, end_page
+
+    def find_end_of_table(self, marker: EndOfTableMarker, drawings: PageDrawings, page_num: int) -> float | None:
+        """
+        Ищет маркер конца таблицы на странице
+        :param marker: Маркер конца таблицы
+        :param drawings: Рисунки страницы PageDrawings
+        :param page_num: Номер страницы
+        :return: Координата Y маркера (самого верхнего, если подходящих несколько) или None, если маркера нет
+        """
+        if marker.type == "drawing":
+            indices = self.match_drawings(drawings, marker.criteria)
+            return float(drawings.y0[indices].min()) if len(indices) else None
+        if marker.type == "text":
+            rect = marker.rect.place(0, 0, page_num) if marker.rect is not None else None
+            return self.repository.find_text(page_num, marker.text, rect)
+        raise ValueError(f"Unknown end of table marker type '{marker.type}'")
 
-    def find_rows(self, row_pointer_config) -> list[models.Rect]:
+    def find_block_pointers(self, block_config: PointerConfig,
+                            end_of_table_marker: EndOfTableMarker | None = None) -> models.RectArray:
+        """
+        Находит указатели блоков на всех страницах
+        :param block_config: Конфигурация указателей блоков
+        :param end_of_table_marker: Маркер конца таблицы (None - искать на всех страницах)
+        :return: Прямоугольники блоков models.RectArray
+        """
+        return self.find_pointers((block_config,), end_of_table_marker=end_of_table_marker)[block_config.name]
+
+    def find_rows(self, row_pointer_config: PointerConfig,
+                  end_of_table_marker: EndOfTableMarker | None = None) -> models.RectArray:
         """
         Находит строки на всех страницах по указателям
         :param row_pointer_config: Конфигурация указателей строк
-        :return: Список прямоугольников строк models.Rect
+        :param end_of_table_marker: Маркер конца таблицы (None - искать на всех страницах)
+        :return: Прямоугольники строк models.RectArray
         """
         # Тут всё ровно так же, как и с блоками, только с другими критериями
-        rows = []
-        num_pages = self.repository.get_num_pages()
-        for page_num in range(num_pages):
-            drawings = self.repository.get_drawings(page_num)
-            for drawing in drawings:
-                if self.match_drawing(drawing, row_pointer_config['criteria']):
-                    row_rect = self.calculate_rect(drawing, row_pointer_config, page_num)
-                    rows.append(row_rect)
-        return rows
+        return self.find_pointers((row_pointer_config,),
+                                  end_of_table_marker=end_of_table_marker)[row_pointer_config.name]
 
     @staticmethod
-    def group_rows_by_blocks(block_pointers, rows):
+    def group_rows_by_blocks(block_pointers: models.RectArray, rows: models.RectArray) -> list[tuple[int, int]]:
         """
         Группирует строки по блокам, используя их положение на странице
         Самый сложный метод
-        :param block_pointers: Все блоки на всех страницах
-        :param rows: Все строки на всех страницах
-        :return: Список блоков с принадлежащими им строками
+        Строки отсортированы, и строки одного блока всегда идут подряд, поэтому группа блока - это срез строк
+        :param block_pointers: Все блоки на всех страницах, отсортированные по странице и координате Y
+        :param rows: Все строки на всех страницах, отсортированные по странице и координате Y
+        :return: Для каждого блока пара (первая строка, строка после последней) - срез принадлежащих ему строк
         """
-        blocks = []
-        row_index = 0  # Индекс текущей строки
+        # Работаем со столбцами страниц и координат Y как с обычными списками чисел, объекты Rect не нужны
+        block_pages = block_pointers.data["page"].tolist()
+        block_y0s = block_pointers.data["y0"].tolist()
+        row_pages = rows.data["page"].tolist()
+        row_y0s = rows.data["y0"].tolist()
+        num_blocks = len(block_pages)
 
-        for i, block in enumerate(block_pointers):  # Проходим по всем блокам
-            current_block = block
+        groups = []
+        # Индекс текущей строки: строки выше первого блока не принадлежат ни одному блоку
+        row_index = 0
+        if num_blocks:
+            row_index = TableHandler.count_rows_before(block_pages[0], block_y0s[0], row_pages, row_y0s)
+
+        for i in range(num_blocks):  # Проходим по всем блокам
             # Следующий блок, если он есть
-            next_block = block_pointers[i + 1] if i + 1 < len(block_pointers) else None
-            # Строки, принадлежащие текущему блоку
-            block_rows = []
-
-            while row_index < len(rows):  # Проходим по всем строкам
-                row = rows[row_index]  # Текущая строка
-
-                # Проверяем, находится ли строка на той же странице, что и блок
-                if row.page == current_block.page:
-                    # Строка принадлежит текущему блоку, если она находится между текущим блоком и следующим блоком
-                    # Но если следующий блок не на той же странице, то строка принадлежит текущему блоку в любом случае
-                    if current_block.y0 <= row.y0 < (
-                            next_block.y0 if next_block and row.page == next_block.page else float('inf')):
-                        block_rows.append(row)
-                        row_index += 1  # Сокращаем список строк, чтобы не обрабатывать их повторно
-                    else:
-                        break  # Строка находится за пределами текущего блока, переход к следующему блоку
-
-                # Если строка на следующей странице после текущего блока...
-                elif row.page > current_block.page:
-                    # ...и она выше следующего блока на этой странице, значит она принадлежит текущему блоку
-                    if not next_block or row.y0 < next_block.y0:
-                        block_rows.append(row)
-                        row_index += 1  # Сокращаем список строк, чтобы не обрабатывать их повторно
-                    else:
-                        break  # Строка относится к следующему блоку
+            has_next = i + 1 < num_blocks
+            group_start, row_index, _ = TableHandler.assign_rows(
+                block_pages[i], block_y0s[i], block_pages[i + 1] if has_next else None,
+                block_y0s[i + 1] if has_next else None, row_pages, row_y0s, row_index)
+            # Прошлись по всем строкам, принадлежащим текущему блоку. Запоминаем их срез
+            groups.append((row_index if group_start is None else group_start, row_index))
+
+        return groups
+
+    @staticmethod
+    def count_rows_before(block_page: int, block_y0: float, row_pages: list[int], row_y0s: list[float]) -> int:
+        """
+        Количество строк выше блока (строки отсортированы по странице и координате Y)
+        Без пропуска такие строки на странице блока останавливали бы группировку (см. assign_rows)
+        """
+        count = 0
+        while count < len(row_pages) and (row_pages[count], row_y0s[count]) < (block_page, block_y0):
+            count += 1
+        return count
+
+    @staticmethod
+    def assign_rows(block_page: int, block_y0: float, next_page: int | None, next_y0: float | None,
+                    row_pages: list[int], row_y0s: list[float], row_index: int,
+                    group_start: int | None = None) -> tuple[int | None, int, bool]:
+        """
+        Находит строки, принадлежащие блоку, начиная с row_index (шаг group_rows_by_blocks для одного блока)
+        Просмотр можно продолжить с возвращённого места, когда строк станет больше, если следующий блок тот же
+        :param block_page: Страница блока
+        :param block_y0: Координата Y блока
+        :param next_page: Страница следующего блока (None - блок последний)
+        :param next_y0: Координата Y следующего блока
+        :param row_pages: Страницы строк, отсортированных по странице и координате Y
+        :param row_y0s: Координаты Y строк
+        :param row_index: Индекс первой непросмотренной строки
+        :param group_start: Первая строка блока, найденная при предыдущем просмотре (None - ещё не найдена)
+        :return: Первая строка блока (None - строк нет), строка после последней просмотренной и признак того,
+        что просмотр остановился на строке, которая блоку не принадлежит (иначе строки закончились)
+        """
+        has_next = next_page is not None
+        num_rows = len(row_pages)
+
+        while row_index < num_rows:  # Проходим по всем строкам
+            row_page = row_pages[row_index]  # Текущая строка
+            row_y0 = row_y0s[row_index]
 
+            # Проверяем, находится ли строка на той же странице, что и блок
+            if row_page == block_page:
+                # Строка принадлежит текущему блоку, если она находится между текущим блоком и следующим блоком
+                # Но если следующий блок не на той же странице, то строка принадлежит текущему блоку в любом случае
+                if block_y0 <= row_y0 < (next_y0 if has_next and row_page == next_page else float('inf')):
+                    if group_start is None:
+                        group_start = row_index
+                    row_index += 1  # Сокращаем список строк, чтобы не обрабатывать их повторно
                 else:
-                    row_index += 1  # Строка уже обработана, переходим к следующей
+                    return group_start, row_index, True  # Строка за пределами текущего блока
 
-            # Прошлись по всем строкам, принадлежащим текущему блоку. Упаковываем их в блок
-            blocks.append({
-                'block_rect': current_block,
-                'rows': block_rows
-            })
+            # Если строка на следующей странице после текущего блока...
+            elif row_page > block_page:
+                # ...и она выше следующего блока на этой странице, значит она принадлежит текущему блоку
+                if not has_next or row_y0 < next_y0:
+                    if group_start is None:
+                        group_start = row_index
+                    row_index += 1  # Сокращаем список строк, чтобы не обрабатывать их повторно
+                else:
+                    return group_start, row_index, True  # Строка относится к следующему блоку
+
+            else:
+                row_index += 1  # Строка уже обработана, переходим к следующей
 
-        return blocks
+        return group_start, row_index, False
 
-    def extract_data_from_rect(self, header_config, rect: models.Rect, draw_rectangles: bool):
+    def extract_data_from_rect(self, columns: Columns, rect: models.Rect):
         """
         Извлекает данные из прямоугольника на странице, !используется как для блоков, так и для строк!
-        :param header_config: Конфигурация заголовков столбцов
+        :param columns: Столбцы с заранее посчитанными границами
         :param rect: Прямоугольник с данными
-        :param draw_rectangles: Рисовать ли прямоугольники вокруг обработанных объектов (для отладки)
         :return: Словарь с данными из прямоугольника
         """
         data = {}
-        x0 = rect.x0
-        for header_name, width in zip(header_config['names'], header_config['column_widths']):
-            cell_rect = models.Rect(x0, rect.y0, x0 + width, rect.y1, rect.page)
+        for header_name, (x0, x1) in zip(columns.names, columns.bounds):
+            cell_rect = models.Rect(rect.x0 + x0, rect.y0, rect.x0 + x1, rect.y1, rect.page)
             data[header_name] = self.repository.get_text(cell_rect)
-            x0 += width
-            if draw_rectangles:
-                self.repository.draw_rectangle(cell_rect, color=(0, 1, 0))
         return data
 
     @staticmethod
-    def match_drawing(drawing, criteria: dict, inaccuracy=0.1):
-        """
-        Проверяет, соответствует ли рисунок критериям указанным в конфигурации
-        Можно реализовать любые критерии для поиска, например, по размеру, цвету, шрифту и т.д.
-        Пока-что реализовано только сравнение размеров, их хватает для нашей задачи
-        :param drawing: Рисунок fitz.Drawing
-        :param criteria: Критерии для сравнения
-        :param inaccuracy: Допустимая погрешность для сравнения размеров
-        :return: True, если рисунок соответствует критериям, иначе False
-        """
-        for criterion, criterion_value in criteria.items():
-            if criterion == 'height':
-                if not abs(drawing['rect'].height - criterion_value) < inaccuracy:
-                    return False
-            elif criterion == 'width':
-                if not abs(drawing['rect'].width - criterion_value) < inaccuracy:
-                    return False
+    def match_drawings(drawings: PageDrawings, criteria: tuple[Criterion, ...]) -> np.ndarray:
+        """
+        Находит рисунки страницы, которые соответствуют всем критериям указателя
+        Критерии проверяются векторно по массивам рисунков. Каждый следующий критерий проверяется только на рисунках,
+        прошедших предыдущие, и проверка прекращается, как только не осталось ни одного рисунка
+        :param drawings: Рисунки страницы PageDrawings
+        :param criteria: Скомпилированные критерии указателя (размеры, толщина линии, цвет обводки и заливки)
+        :return: Индексы подходящих рисунков по возрастанию (в порядке рисования)
+        """
+        indices = None
+        for criterion in criteria:
+            values = drawings.values(criterion.name)
+            if indices is not None:
+                values = values[indices]
+            if values.ndim == 1:
+                matched = np.abs(values - criterion.value[0]) < criterion.tolerance
             else:
-                raise ValueError(f"Unknown criterion '{criterion}'")
-        return True
+                # Цвет подходит, если каждая компонента RGB в пределах погрешности
+                matched = (np.abs(values - criterion.value) < criterion.tolerance).all(axis=1)
+            indices = np.flatnonzero(matched) if indices is None else indices[matched]
+            if not len(indices):
+                break
+        return indices
 
     @staticmethod
-    def calculate_rect(drawing, config, page_num) -> models.Rect:
+    def calculate_rects(x0: np.ndarray, y0: np.ndarray, config: PointerConfig, page_num) -> models.RectArray:
         """
-        Вычисляет прямоугольник по рисунку и конфигурации
+        Вычисляет прямоугольники по левым верхним углам рисунков и конфигурации
         Нужен для того, чтобы учесть смещение и размеры прямоугольника
-        :param drawing: Рисунок fitz.Drawing
-        :param config: Конфигурация обработки
-        :param page_num: Номер страницы
-        :return: Прямоугольник models.Rect
+        :param x0: Координаты X левых верхних углов рисунков
+        :param y0: Координаты Y левых верхних углов рисунков
+        :param config: Конфигурация указателя
+        :param page_num: Номер страницы или массив номеров страниц рисунков
+        :return: Прямоугольники models.RectArray
         """
-        return models.Rect(
-            x0=drawing['rect'].x0 + config['offset']['x'],
-            y0=drawing['rect'].y0 + config['offset']['y'],
-            x1=drawing['rect'].x0 + config['offset']['x'] + config['dimensions']['width'],
-            y1=drawing['rect'].y0 + config['offset']['y'] + config['dimensions']['height'],
-            page=page_num
-        )
+        return config.rect.place_many(x0, y0, page_num)
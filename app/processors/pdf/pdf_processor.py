@@ -1,3 +1,8 @@
+import time
+from collections.abc import Iterator
+
+from app.models.overlay_geometry import OverlayGeometry
+from app.models.pdf_structure import PDFStructure, TableObjectConfig, TextObjectConfig
 from app.processors.pdf.handlers import TableHandler, TextHandler
 
 
@@ -11,12 +16,13 @@ class PDFProcessor:
     если есть конфигурация для обработки в которой полностью отражена структура PDF
     """
 
-    def __init__(self, repository, config):
+    def __init__(self, repository, config: PDFStructure, page_pool=None):
         """
         Процессор для обработки PDF-документов
         Иницилизируется каждый раз при обработке нового PDF
         :param repository: Репозиторий для работы с PDF-документом
-        :param config: Конфигурация обработки конкретного вида PDF
+        :param config: Скомпилированная конфигурация обработки конкретного вида PDF (см. ConfigRegistry)
+        :param page_pool: Пул для параллельной обработки страниц таблиц (необязательный)
         """
         self.repository = repository
         self.config = config
@@ -24,22 +30,46 @@ class PDFProcessor:
         # У нас два типа объектов: текст и таблица
         self.handlers = {
             "text": TextHandler(self.repository),
-            "table": TableHandler(self.repository)
+            "table": TableHandler(self.repository, page_pool)
         }
 
-    def process_pdf(self, draw_rectangles=False):
+    def process_pdf(self, overlay: OverlayGeometry | None = None):
         """
         Обработка PDF-документа по конфигурации PDF и возвращение результатов в виде словаря
-        :param draw_rectangles: Рисовать ли прямоугольники вокруг обработанных объектов (для отладки)
+        :param overlay: Куда записать геометрию обработанных объектов для отладочной разметки (None - не записывать)
         :return: Словарь с результатами обработки объектов
         """
         res_objects = {}
+        stats = self.repository.stats
         # Обработка всех объектов в PDF по конфигурации
-        for obj in self.config['pdf_structure']['objects']:
-            handler = self.handlers[obj['type']]
+        for obj in self.config.objects:
+            handler = self.handlers[obj.type]
             # Обработка объекта используя соответствующий обработчик
-            result = handler.handle(obj, draw_rectangles)
-            # print(f"Processed {obj['type']} named {obj['name']}: {result}")
+            start = time.perf_counter()
+            result = handler.handle(obj, overlay)
+            stats.add_time(f"{obj.type}_handler", time.perf_counter() - start)
+            if obj.type == "table":
+                stats.rows += sum(len(block['rows']) for block in result)
+            # print(f"Processed {obj.type} named {obj.name}: {result}")
             # Формируем словарь с результатами обработки используя имя объекта из конфига
-            res_objects[obj['name']] = result
+            res_objects[obj.name] = result
         return res_objects
+
+    def iter_objects(self, overlay: OverlayGeometry | None = None) \
+            -> Iterator[tuple[TextObjectConfig | TableObjectConfig, object]]:
+        """
+        Обработка PDF-документа с выдачей результатов по мере готовности, в порядке объектов конфигурации
+        Таблица отдаётся по блокам: каждый блок со своими строками, как только он закончен (см. TableHandler.iter_rows)
+        :param overlay: Куда записать геометрию обработанных объектов для отладочной разметки (None - не записывать)
+        :return: Итератор пар (конфигурация объекта, результат): текст для текстового поля, словарь
+        {"block": ..., "rows": [...]} для каждого блока таблицы
+        """
+        stats = self.repository.stats
+        for obj in self.config.objects:
+            handler = self.handlers[obj.type]
+            if obj.type == "table":
+                for block in handler.iter_rows(obj, overlay):
+                    stats.rows += len(block['rows'])
+                    yield obj, block
+            else:
+                yield obj, handler.handle(obj, overlay)
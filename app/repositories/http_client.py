@@ -0,0 +1,44 @@
+# repositories/http_client.py
+
+import httpx
+
+from core.config import config
+
+# Общий HTTP-клиент для обращений к другим микросервисам
+# Один пул соединений на процесс: TCP/TLS-рукопожатие выполняется один раз на соединение, а не на каждый отчёт
+_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Создаёт HTTP-клиент с настройками пула соединений, keep-alive и таймаутов из core/config.py
+    :return: Объект httpx.AsyncClient
+    """
+    limits = httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(config.HTTP_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT)
+    # Для HTTP/2 нужен пакет h2 (pip install httpx[http2])
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=config.HTTP2)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Возвращает общий HTTP-клиент, создаёт его при первом обращении
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client():
+    """
+    Закрывает общий HTTP-клиент и все его соединения (вызывается при завершении приложения)
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,102 @@
+# repositories/job_store.py
+
+import json
+import sqlite3
+import threading
+
+from app.interfaces.job_store_interface import JobStoreInterface
+from app.models.job_model import FINISHED_STATUSES, Job
+
+
+class MemoryJobStore(JobStoreInterface):
+    """
+    Хранилище задач в памяти процесса, задачи теряются при перезапуске
+    Методы вызываются из потоков (см. JobQueue), поэтому выполняются под блокировкой
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_unfinished(self):
+        with self._lock:
+            return sorted((job for job in self._jobs.values() if not job.is_finished()),
+                          key=lambda job: job.created_at)
+
+    def prune(self, finished_before):
+        with self._lock:
+            for job_id in [job.id for job in self._jobs.values()
+                           if job.is_finished() and job.updated_at < finished_before]:
+                del self._jobs[job_id]
+
+
+class SQLiteJobStore(JobStoreInterface):
+    """
+    Хранилище задач в файле SQLite, незавершённые задачи переживают перезапуск сервиса
+    """
+
+    COLUMNS = ("id", "filename", "path", "sha256", "size", "status", "stage", "result", "error",
+               "created_at", "updated_at")
+
+    def __init__(self, path: str):
+        """
+        :param path: Путь к файлу базы данных
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, filename TEXT NOT NULL, path TEXT NOT NULL, sha256 TEXT NOT NULL,"
+            " size INTEGER NOT NULL, status TEXT NOT NULL, stage TEXT, result TEXT, error TEXT,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def save(self, job):
+        row = (job.id, job.filename, job.path, job.sha256, job.size, job.status, job.stage,
+               json.dumps(job.result, ensure_ascii=False) if job.result is not None else None, job.error,
+               job.created_at, job.updated_at)
+        with self._lock:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(row))})", row)
+            self._connection.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def list_unfinished(self):
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs"
+                f" WHERE status NOT IN ({', '.join('?' * len(FINISHED_STATUSES))}) ORDER BY created_at",
+                FINISHED_STATUSES).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def prune(self, finished_before):
+        with self._lock:
+            self._connection.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED_STATUSES))}) AND updated_at < ?",
+                (*FINISHED_STATUSES, finished_before))
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _to_job(self, row) -> Job:
+        data = dict(zip(self.COLUMNS, row))
+        if data['result'] is not None:
+            data['result'] = json.loads(data['result'])
+        return Job(**data)
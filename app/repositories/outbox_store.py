@@ -0,0 +1,149 @@
+# repositories/outbox_store.py
+
+import dataclasses
+import json
+import sqlite3
+import threading
+
+from app.interfaces.outbox_store_interface import OutboxStoreInterface
+from app.models.outbox_model import FINISHED_STATUSES, OUTBOX_PENDING, OutboxEntry
+
+
+class MemoryOutboxStore(OutboxStoreInterface):
+    """
+    Outbox в памяти процесса, неотправленные отчёты теряются при перезапуске
+    Методы вызываются из потоков (см. OutboxSender), поэтому выполняются под блокировкой
+    """
+
+    def __init__(self):
+        self._entries: dict[str, OutboxEntry] = {}
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        with self._lock:
+            if entry.file_sha256 in self._entries:
+                return False
+            self._entries[entry.file_sha256] = entry
+            return True
+
+    def save(self, entry):
+        with self._lock:
+            self._entries[entry.file_sha256] = entry
+
+    def get(self, file_sha256):
+        with self._lock:
+            return self._entries.get(file_sha256)
+
+    def claim_due(self, now, limit, lease_seconds):
+        with self._lock:
+            due = sorted((entry for entry in self._entries.values()
+                          if entry.status == OUTBOX_PENDING and entry.next_attempt_at <= now),
+                         key=lambda entry: entry.created_at)[:limit]
+            # Отправитель получает копии: запись в хранилище меняется только через save, как и в SQLite
+            for entry in due:
+                entry.next_attempt_at = now + lease_seconds
+            return [dataclasses.replace(entry) for entry in due]
+
+    def counts(self):
+        counts = {}
+        with self._lock:
+            for entry in self._entries.values():
+                counts[entry.status] = counts.get(entry.status, 0) + 1
+        return counts
+
+    def prune(self, finished_before):
+        with self._lock:
+            for file_sha256 in [entry.file_sha256 for entry in self._entries.values()
+                                if entry.is_finished() and entry.updated_at < finished_before]:
+                del self._entries[file_sha256]
+
+
+class SQLiteOutboxStore(OutboxStoreInterface):
+    """
+    Outbox в файле SQLite: отчёт записывается на диск до ответа на загрузку и переживает перезапуск сервиса
+    Один файл могут использовать несколько воркеров, отчёты между ними делятся атомарным claim_due
+    """
+
+    COLUMNS = ("file_sha256", "filename", "config_name", "url", "batch_url", "payload", "status", "attempts",
+               "next_attempt_at", "response", "error", "created_at", "updated_at")
+
+    def __init__(self, path: str):
+        """
+        :param path: Путь к файлу базы данных
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " file_sha256 TEXT PRIMARY KEY, filename TEXT NOT NULL, config_name TEXT NOT NULL, url TEXT NOT NULL,"
+            " batch_url TEXT, payload BLOB NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL,"
+            " next_attempt_at REAL NOT NULL, response TEXT, error TEXT, created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+        self._connection.commit()
+
+    def add(self, entry):
+        with self._lock:
+            cursor = self._connection.execute(
+                f"INSERT OR IGNORE INTO outbox ({', '.join(self.COLUMNS)})"
+                f" VALUES ({', '.join('?' * len(self.COLUMNS))})", self._to_row(entry))
+            self._connection.commit()
+        return cursor.rowcount == 1
+
+    def save(self, entry):
+        self.save_many([entry])
+
+    def save_many(self, entries):
+        # Результат отправки пачки записывается одной транзакцией, а не коммитом на каждый отчёт
+        with self._lock:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO outbox ({', '.join(self.COLUMNS)})"
+                f" VALUES ({', '.join('?' * len(self.COLUMNS))})", [self._to_row(entry) for entry in entries])
+            self._connection.commit()
+
+    def get(self, file_sha256):
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM outbox WHERE file_sha256 = ?", (file_sha256,)).fetchone()
+        return self._to_entry(row) if row is not None else None
+
+    def claim_due(self, now, limit, lease_seconds):
+        # Один UPDATE ... RETURNING выполняется под блокировкой записи SQLite, поэтому атомарен между процессами
+        with self._lock:
+            rows = self._connection.execute(
+                f"UPDATE outbox SET next_attempt_at = ? WHERE file_sha256 IN ("
+                f" SELECT file_sha256 FROM outbox WHERE status = ? AND next_attempt_at <= ?"
+                f" ORDER BY created_at LIMIT ?) RETURNING {', '.join(self.COLUMNS)}",
+                (now + lease_seconds, OUTBOX_PENDING, now, limit)).fetchall()
+            self._connection.commit()
+        return sorted((self._to_entry(row) for row in rows), key=lambda entry: entry.created_at)
+
+    def counts(self):
+        with self._lock:
+            rows = self._connection.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return dict(rows)
+
+    def prune(self, finished_before):
+        with self._lock:
+            self._connection.execute(
+                f"DELETE FROM outbox WHERE status IN ({', '.join('?' * len(FINISHED_STATUSES))}) AND updated_at < ?",
+                (*FINISHED_STATUSES, finished_before))
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _to_row(self, entry: OutboxEntry) -> tuple:
+        return (entry.file_sha256, entry.filename, entry.config_name, entry.url, entry.batch_url, entry.payload,
+                entry.status, entry.attempts, entry.next_attempt_at,
+                json.dumps(entry.response, ensure_ascii=False) if entry.response is not None else None,
+                entry.error, entry.created_at, entry.updated_at)
+
+    def _to_entry(self, row) -> OutboxEntry:
+        data = dict(zip(self.COLUMNS, row))
+        if data['response'] is not None:
+            data['response'] = json.loads(data['response'])
+        return OutboxEntry(**data)
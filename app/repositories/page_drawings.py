@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class PageDrawings:
+    """
+    Рисунки страницы в виде массивов NumPy: по одному значению (или строке RGB) на рисунок, в порядке рисования.
+    Строится один раз на страницу, после этого критерии всех указателей проверяются векторно, без цикла по рисункам.
+    Отсутствующие у рисунка признаки (например, цвет обводки у заливки) хранятся как NaN и ни с чем не совпадают.
+    """
+
+    __slots__ = ("x0", "y0", "width", "height", "line_width", "color", "fill")
+
+    def __init__(self, drawings: list[dict]):
+        """
+        :param drawings: Рисунки страницы из page.get_cdrawings() или page.get_drawings()
+        """
+        rects = np.array([tuple(drawing['rect']) for drawing in drawings], dtype=np.float64).reshape(-1, 4)
+        self.x0 = rects[:, 0]
+        self.y0 = rects[:, 1]
+        # Как у fitz.Rect: ширина и высота вывернутого прямоугольника равны нулю
+        self.width = np.maximum(rects[:, 2] - rects[:, 0], 0)
+        self.height = np.maximum(rects[:, 3] - rects[:, 1], 0)
+        self.line_width = np.array([_number(drawing.get('width')) for drawing in drawings], dtype=np.float64)
+        self.color = _colors(drawings, 'color')
+        self.fill = _colors(drawings, 'fill')
+
+    def __len__(self):
+        return len(self.x0)
+
+    def values(self, name: str) -> np.ndarray:
+        """
+        Возвращает массив признака по имени критерия
+        :param name: height, width, line_width, color или fill
+        :return: Массив формы (n,) для размеров или (n, 3) для цветов
+        """
+        return getattr(self, name)
+
+
+def _number(value) -> float:
+    return np.nan if value is None else value
+
+
+def _colors(drawings: list[dict], key: str) -> np.ndarray:
+    colors = np.full((len(drawings), 3), np.nan)
+    for i, drawing in enumerate(drawings):
+        color = drawing.get(key)
+        if color is not None and len(color) == 3:
+            colors[i] = color
+    return colors
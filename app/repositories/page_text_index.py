@@ -0,0 +1,83 @@
+from bisect import bisect_left
+
+import app.models.pdf_models as models
+
+
+class PageTextIndex:
+    """
+    Пространственный индекс символов одной страницы PDF.
+    Строится один раз на страницу из TextPage и позволяет отвечать на запросы текста по прямоугольнику
+    без повторного разбора страницы, как это делает page.get_textbox(rect) на каждый вызов.
+    Семантика совпадает с get_textbox: символ попадает в результат, если его bbox пересекается с прямоугольником,
+    строки идут в порядке документа и склеиваются через перевод строки.
+    """
+
+    def __init__(self, textpage):
+        """
+        Построение индекса по текстовому слою страницы
+        :param textpage: Объект fitz.TextPage страницы (с флагами по умолчанию, как у get_textbox)
+        """
+        lines = []
+        order = 0
+        for block in textpage.extractRAWDICT()['blocks']:
+            if block['type'] != 0:  # Нас интересуют только текстовые блоки
+                continue
+            for line in block['lines']:
+                chars = [(*char['bbox'], char['c']) for span in line['spans'] for char in span['chars']]
+                if chars:
+                    y0 = min(char[1] for char in chars)
+                    y1 = max(char[3] for char in chars)
+                    lines.append((y0, y1, order, chars))
+                    order += 1
+
+        # Сортируем строки по верхней границе, чтобы отсекать их бинарным поиском
+        lines.sort(key=lambda line: line[0])
+        self.lines = lines
+        self.line_tops = [line[0] for line in lines]
+        # Максимальная высота строки нужна, чтобы не пропустить строки, начинающиеся выше прямоугольника
+        self.max_line_height = max((line[1] - line[0] for line in lines), default=0.0)
+
+    def get_text(self, rect: models.Rect) -> str:
+        """
+        Возвращает текст внутри прямоугольника, так же как это сделал бы page.get_textbox(rect)
+        :param rect: Прямоугольник models.Rect (номер страницы не используется)
+        :return: Текст внутри прямоугольника (без strip)
+        """
+        x0, y0, x1, y1 = rect.x0, rect.y0, rect.x1, rect.y1
+        start = bisect_left(self.line_tops, y0 - self.max_line_height)
+        end = bisect_left(self.line_tops, y1)
+
+        found = []
+        for line_y0, line_y1, order, chars in self.lines[start:end]:
+            if line_y1 <= y0:
+                continue
+            text = ''.join(c for cx0, cy0, cx1, cy1, c in chars
+                           if not (x0 >= cx1 or y0 >= cy1 or x1 <= cx0 or y1 <= cy0))
+            if text:
+                found.append((order, text))
+
+        # Восстанавливаем порядок строк, в котором их отдаёт get_textbox
+        found.sort(key=lambda item: item[0])
+        return '\n'.join(text for _, text in found)
+
+    def find(self, text: str, rect: models.Rect | None = None) -> float | None:
+        """
+        Находит первую сверху строку страницы, содержащую текст
+        Текст ищется как подстрока одной строки с учётом регистра, через границы строк совпадения нет
+        :param text: Искомый текст (подстрока строки)
+        :param rect: Где искать (None - по всей странице), учитываются только символы внутри прямоугольника
+        :return: Верхняя граница найденной строки или None, если текста на странице нет
+        """
+        lines = self.lines
+        if rect is not None:
+            lines = lines[bisect_left(self.line_tops, rect.y0 - self.max_line_height):
+                          bisect_left(self.line_tops, rect.y1)]
+        for line_y0, line_y1, _, chars in lines:
+            if rect is None:
+                line_text = ''.join(c for *_, c in chars)
+            else:
+                line_text = ''.join(c for cx0, cy0, cx1, cy1, c in chars
+                                    if not (rect.x0 >= cx1 or rect.y0 >= cy1 or rect.x1 <= cx0 or rect.y1 <= cy0))
+            if text in line_text:
+                return line_y0
+        return None
@@ -1,8 +1,22 @@
+import time
+from collections import OrderedDict
+
 import pymupdf as fitz
 
 import app.models.pdf_models as models
 from app.interfaces.pdf_repository_interface import PDFRepositoryInterface
+from app.models.extraction_stats import ExtractionStats
 from app.models.file_model import FileModel
+from app.models.overlay_geometry import OVERLAY_CELL, OVERLAY_POINTER, OVERLAY_TEXT, OverlayGeometry
+from app.repositories.page_drawings import PageDrawings
+from app.repositories.page_text_index import PageTextIndex
+
+# Цвета отладочной разметки по видам прямоугольников (RGB)
+OVERLAY_COLORS = {
+    OVERLAY_TEXT: (0, 0, 1),
+    OVERLAY_POINTER: (1, 0, 0),
+    OVERLAY_CELL: (0, 1, 0),
+}
 
 
 class PDFRepository(PDFRepositoryInterface):
@@ -11,10 +25,32 @@ class PDFRepository(PDFRepositoryInterface):
     Инкапсулирует работу с библиотекой PyMuPDF и предоставляет удобный интерфейс для работы с PDF.
     """
 
-    def __init__(self):
+    def __init__(self, use_text_index: bool = True, page_cache_size: int = 16, store_shrink_percent: int = 0):
+        """
+        :param use_text_index: Отвечать на запросы текста из индекса символов страницы (строится один раз на страницу),
+        а не разбирать страницу заново через get_textbox на каждый прямоугольник
+        :param page_cache_size: Сколько загруженных страниц держать в памяти одновременно
+        :param store_shrink_percent: Какую часть общего кэша MuPDF (шрифты, изображения, разобранные объекты всех
+        документов процесса) освобождать при закрытии документа, в процентах (0 - не освобождать, 100 - весь)
+        """
         self.doc = None
-        self.pages = None
-        self.drawings = None
+        self.file = None  # Загруженный FileModel, по нему документ можно открыть ещё раз в другом процессе
+        self.pages = OrderedDict()  # Номер страницы -> fitz.Page, страницы загружаются лениво при первом обращении
+        self.page_cache_size = page_cache_size
+        # Данные, построенные по странице, хранятся так же, как страницы: не больше page_cache_size последних страниц,
+        # поэтому память на обработку не растёт с количеством страниц документа
+        self.drawings = OrderedDict()  # Номер страницы -> список рисунков
+        self.page_drawings = OrderedDict()  # Номер страницы -> PageDrawings
+        self.use_text_index = use_text_index
+        self.text_indexes = OrderedDict()  # Номер страницы -> PageTextIndex
+        self.store_shrink_percent = store_shrink_percent
+        self.stats = ExtractionStats()  # Статистика обработки загруженного документа
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def load_pdf(self, file: FileModel):
         """
@@ -22,9 +58,37 @@ class PDFRepository(PDFRepositoryInterface):
 
         :param file: Объект FileModel, представляющий PDF-файл.
         """
-        self.doc = fitz.open(stream=file.get_content(), filetype="pdf")
-        # Get pages immediately
-        self.pages = [self.doc.load_page(page_num) for page_num in range(self.doc.page_count)]
+        # Предыдущий документ закрывается сразу, а не когда до него доберётся сборщик мусора
+        self.close()
+        self.file = file
+        self.stats = ExtractionStats()
+        start = time.perf_counter()
+        if file.path is not None:
+            # Файл на диске открывается напрямую, без копии содержимого в памяти
+            self.doc = fitz.open(file.path, filetype="pdf")
+        else:
+            self.doc = fitz.open(stream=file.get_content(), filetype="pdf")
+        self.stats.add_time("load_pdf", time.perf_counter() - start)
+        self.stats.pages = self.doc.page_count
+        # Страницы не загружаются заранее, см. get_page
+
+    def close(self):
+        """
+        Закрывает документ и освобождает загруженные страницы и построенные по ним рисунки и индексы текста.
+        Статистика обработки сохраняется, повторный вызов ничего не делает.
+        """
+        # Страницы освобождаются до закрытия документа, которому они принадлежат
+        self.pages.clear()
+        self.drawings.clear()
+        self.page_drawings.clear()
+        self.text_indexes.clear()
+        self.file = None
+        if self.doc is None:
+            return
+        self.doc.close()
+        self.doc = None
+        if self.store_shrink_percent > 0:
+            fitz.TOOLS.store_shrink(self.store_shrink_percent)
 
     def get_sha256(self):
         """
@@ -62,22 +126,46 @@ class PDFRepository(PDFRepositoryInterface):
     def get_page(self, page_number: int):
         """
         Возвращает страницу PDF-файла по номеру
+        Страница загружается при первом обращении и хранится в ограниченном кэше,
+        давно не использованные страницы вытесняются
         :param page_number: Номер страницы
         :return: Объект страницы
         """
-        return self.doc.load_page(page_number)
+        page = self._cache_get(self.pages, page_number)
+        if page is None:
+            page = self._cache_put(self.pages, page_number, self.doc.load_page(page_number))
+            self.stats.pages_loaded += 1
+        return page
 
     def get_drawings(self, page_num=None):
         """
         Возвращает все рисунки на странице или на всех страницах
+        Рисунки страницы извлекаются один раз и кэшируются вместе с последними загруженными страницами
         :param page_num: Номер страницы (необязательный)
-        :return: Список рисунков fitz.Drawing
+        :return: Список рисунков fitz.Drawing (или список списков по страницам, если номер не указан)
         """
         if page_num is None:
-            if self.drawings is None:
-                self.drawings = [page.get_drawings() for page in self.pages]
-            return self.drawings
-        return self.pages[page_num].get_drawings()
+            return [self.get_drawings(page_num) for page_num in range(self.get_num_pages())]
+        drawings = self._cache_get(self.drawings, page_num)
+        if drawings is None:
+            drawings = self._cache_put(self.drawings, page_num, self.get_page(page_num).get_drawings())
+        return drawings
+
+    def get_page_drawings(self, page_num: int) -> PageDrawings:
+        """
+        Возвращает рисунки страницы в виде массивов для векторной проверки критериев
+        Массивы строятся один раз на страницу из get_cdrawings (без построения объектов fitz.Rect и fitz.Point)
+        :param page_num: Номер страницы
+        :return: Рисунки страницы PageDrawings
+        """
+        page_drawings = self._cache_get(self.page_drawings, page_num)
+        if page_drawings is None:
+            start = time.perf_counter()
+            page_drawings = PageDrawings(self.get_page(page_num).get_cdrawings())
+            self.stats.add_time("get_drawings", time.perf_counter() - start)
+            self.stats.drawings_scanned += len(page_drawings)
+            self._cache_put(self.page_drawings, page_num, page_drawings)
+        return page_drawings
 
     def get_text(self, rect: models.Rect):
         """
@@ -85,17 +173,129 @@ class PDFRepository(PDFRepositoryInterface):
         :param rect: Прямоугольник с координатами и номером страницы models.Rect
         :return: Текст внутри прямоугольника
         """
-        page = rect.page
-        rect = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y1)
-        return self.pages[page].get_textbox(rect).strip()
+        start = time.perf_counter()
+        if self.use_text_index:
+            text = self.get_text_index(rect.page).get_text(rect)
+        else:
+            text = self.get_page(rect.page).get_textbox(fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y1))
+        # Время поиска текста включает построение индекса страницы при первом обращении к ней
+        self.stats.add_time("get_text", time.perf_counter() - start)
+        self.stats.text_lookups += 1
+        return text.strip()
 
-    def draw_rectangle(self, rect: models.Rect, color):
+    def find_text(self, page_num: int, text: str, rect: models.Rect | None = None) -> float | None:
         """
-        Рисует прямоугольник на странице PDF с указанным цветом
-        :param rect: Прямоугольник с координатами и номером страницы models.Rect
-        :param color: Цвет в формате (R, G, B)
-        :return: None
+        Находит текст на странице PDF: подстроку одной строки текста с учётом регистра (см. PageTextIndex.find).
+        Правило одно и то же с индексом символов и без него, без индекса текстовый слой страницы разбирается заново.
+        :param page_num: Номер страницы
+        :param text: Искомый текст
+        :param rect: Где искать (None - по всей странице)
+        :return: Верхняя граница первой сверху строки с текстом или None, если текста на странице нет
+        """
+        start = time.perf_counter()
+        if self.use_text_index:
+            y0 = self.get_text_index(page_num).find(text, rect)
+        else:
+            # search_for не подходит: он ищет без учёта регистра и через границы строк
+            y0 = PageTextIndex(self._get_textpage(page_num)).find(text, rect)
+        self.stats.add_time("find_text", time.perf_counter() - start)
+        return y0
+
+    def get_text_index(self, page_num: int) -> PageTextIndex:
         """
-        page = rect.page
-        rect = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y1)
-        self.pages[page].draw_rect(rect, color=color, fill_opacity=0.1)
+        Возвращает индекс символов страницы, строит его при первом обращении
+        :param page_num: Номер страницы
+        :return: Индекс PageTextIndex
+        """
+        text_index = self._cache_get(self.text_indexes, page_num)
+        if text_index is None:
+            text_index = self._cache_put(self.text_indexes, page_num, PageTextIndex(self._get_textpage(page_num)))
+        return text_index
+
+    def _get_textpage(self, page_num: int) -> fitz.TextPage:
+        # Флаги TextPage по умолчанию и без обрезки по странице, как у get_textbox, чтобы результат совпадал:
+        # иначе символы за краем страницы (например, конец даты) в индекс не попадут
+        return self.get_page(page_num).get_textpage(clip=fitz.INFINITE_RECT())
+
+    @staticmethod
+    def _cache_get(cache: OrderedDict, page_num: int):
+        # Страница, к которой обратились, становится самой свежей
+        value = cache.get(page_num)
+        if value is not None:
+            cache.move_to_end(page_num)
+        return value
+
+    def _cache_put(self, cache: OrderedDict, page_num: int, value):
+        # Давно не использованные страницы вытесняются
+        cache[page_num] = value
+        if len(cache) > self.page_cache_size:
+            cache.popitem(last=False)
+        return value
+
+    def render_overlay_pdf(self, overlay: OverlayGeometry, pages: list[int] = None) -> bytes:
+        """
+        Рисует отладочную разметку на копии страниц документа, загруженный документ не изменяется
+        :param overlay: Геометрия, записанная при обработке документа
+        :param pages: Номера страниц (None - все страницы)
+        :return: PDF только с запрошенными страницами, в заданном порядке
+        """
+        doc = self._overlay_document(overlay, pages)
+        try:
+            return doc.tobytes(garbage=3, deflate=True)
+        finally:
+            doc.close()
+
+    def render_overlay_png(self, overlay: OverlayGeometry, pages: list[int] = None,
+                           dpi: int = 96) -> list[tuple[int, bytes]]:
+        """
+        Рисует отладочную разметку на копии страниц документа и растеризует их в PNG
+        :param overlay: Геометрия, записанная при обработке документа
+        :param pages: Номера страниц (None - все страницы)
+        :param dpi: Разрешение изображений
+        :return: Список пар (номер страницы, PNG)
+        """
+        pages = self._check_pages(pages)
+        doc = self._overlay_document(overlay, pages)
+        try:
+            return [(page_num, doc[i].get_pixmap(dpi=dpi).tobytes("png")) for i, page_num in enumerate(pages)]
+        finally:
+            doc.close()
+
+    def _overlay_document(self, overlay: OverlayGeometry, pages: list[int] = None) -> fitz.Document:
+        # Запрошенные страницы копируются в новый документ, рисование идёт только на копии
+        doc = fitz.open()
+        for page_num in self._check_pages(pages):
+            doc.insert_pdf(self.doc, from_page=page_num, to_page=page_num)
+            page = doc[-1]
+            for kind, rects in overlay.on_page(page_num):
+                # Все прямоугольники слоя рисуются одной фигурой, а не отдельной командой на каждый
+                shape = page.new_shape()
+                for x0, y0, x1, y1 in zip(rects["x0"].tolist(), rects["y0"].tolist(), rects["x1"].tolist(),
+                                          rects["y1"].tolist()):
+                    shape.draw_rect(fitz.Rect(x0, y0, x1, y1))
+                shape.finish(color=OVERLAY_COLORS[kind], fill_opacity=0.1)
+                shape.commit()
+        return doc
+
+    @staticmethod
+    def create_sample_pdf() -> bytes:
+        """
+        Создаёт одностраничный PDF с прямоугольником и строкой текста (для прогрева конвейера извлечения)
+        :return: PDF в байтах
+        """
+        doc = fitz.open()
+        page = doc.new_page()
+        page.draw_rect(fitz.Rect(36, 36, 236, 56), color=(0, 0, 0))
+        page.insert_text((40, 50), "01.01.2024 00:00")
+        try:
+            return doc.tobytes()
+        finally:
+            doc.close()
+
+    def _check_pages(self, pages: list[int] | None) -> list[int]:
+        if pages is None:
+            return list(range(self.get_num_pages()))
+        for page_num in pages:
+            if not 0 <= page_num < self.get_num_pages():
+                raise ValueError(f"Страница {page_num} отсутствует в документе ({self.get_num_pages()} стр.)")
+        return list(pages)
@@ -5,20 +5,30 @@ import httpx
 from app.exceptions import ConflictError
 from app.models.processed_data_model import ProcessedDataModel
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def json_array(items: list[bytes]) -> bytes:
+    """
+    Склеивает уже сериализованные JSON-документы в JSON-массив без повторной сериализации
+    """
+    return b"[" + b",".join(items) + b"]"
+
 
 class ProcessedDataRepository:
     """
     Репозиторий для отправки обработанных данных на другой микросервис.
     """
 
-    def __init__(self):
+    def __init__(self, client: httpx.AsyncClient):
         """
         Инициализация репозитория для отправки обработанных данных на другой микросервис.
+
+        :param client: Общий HTTP-клиент с пулом соединений (создаётся в lifespan).
         """
-        pass
+        self.client = client
 
-    @staticmethod
-    async def send_processed_data(data: ProcessedDataModel, endpoint: str) -> dict:
+    async def send_processed_data(self, data: ProcessedDataModel, endpoint: str) -> dict:
         """
         Асинхронно отправляет обработанные данные на другой микросервис.
 
@@ -26,16 +36,36 @@ class ProcessedDataRepository:
         :param data: Объект ProcessedDataModel, содержащий данные для отправки.
         :return: Ответ от целевого микросервиса.
         """
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(endpoint, json=data.dict())
-                response.raise_for_status()
-                return response.json()
-            except httpx.RequestError as exc:
-                print(f"An error occurred while requesting {exc.request.url!r}: {exc}")
-                raise
-            except httpx.HTTPStatusError as exc:
-                if exc.response.status_code == 409:  # Обработка конфликта
-                    raise ConflictError(exc.response.text)
-                print(f"Error response {exc.response.status_code} while requesting {exc.request.url!r}: {exc}")
-                raise
+        # Модель уже сериализована в JSON один раз, повторно в словари она не копируется
+        return await self.send_json(data.to_json(), endpoint)
+
+    async def send_processed_data_batch(self, data: list[ProcessedDataModel], endpoint: str) -> dict:
+        """
+        Асинхронно отправляет несколько отчётов одним запросом (если микросервис поддерживает пакетный приём).
+
+        :param endpoint: Конечная точка пакетного приёма целевого микросервиса.
+        :param data: Список объектов ProcessedDataModel.
+        :return: Ответ от целевого микросервиса.
+        """
+        return await self.send_json(json_array([item.to_json() for item in data]), endpoint)
+
+    async def send_json(self, content: bytes, endpoint: str) -> dict:
+        """
+        Асинхронно отправляет уже сериализованный JSON (например, отчёт из outbox).
+
+        :param content: JSON в байтах.
+        :param endpoint: Конечная точка целевого микросервиса.
+        :return: Ответ от целевого микросервиса.
+        """
+        try:
+            response = await self.client.post(endpoint, content=content, headers=JSON_HEADERS)
+            response.raise_for_status()
+            return response.json()
+        except httpx.RequestError as exc:
+            print(f"An error occurred while requesting {exc.request.url!r}: {exc}")
+            raise
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == 409:  # Обработка конфликта
+                raise ConflictError(exc.response.text)
+            print(f"Error response {exc.response.status_code} while requesting {exc.request.url!r}: {exc}")
+            raise
@@ -0,0 +1,150 @@
+# repositories/result_cache.py
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.interfaces.result_cache_interface import ResultCacheInterface
+from core.config import config
+
+
+class MemoryResultCache(ResultCacheInterface):
+    """
+    Кэш результатов в памяти процесса с вытеснением давно не использованных записей (LRU)
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        :param max_entries: Максимальное количество хранимых результатов
+        """
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    async def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLiteResultCache(ResultCacheInterface):
+    """
+    Кэш результатов в файле SQLite, переживает перезапуск сервиса
+    При превышении лимита удаляются самые давно использованные записи
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        """
+        :param path: Путь к файлу базы данных
+        :param max_entries: Максимальное количество хранимых результатов
+        """
+        super().__init__()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            " sha256 TEXT NOT NULL,"
+            " config_name TEXT NOT NULL,"
+            " config_version TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " used_at REAL NOT NULL,"
+            " PRIMARY KEY (sha256, config_name, config_version))"
+        )
+        self._connection.commit()
+
+    async def get(self, key):
+        # Запросы синхронные (с записью на диск), поэтому выполняются в потоке, а не в цикле событий
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key, value):
+        await asyncio.to_thread(self._put, key, value)
+
+    def _get(self, key):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload FROM result_cache WHERE sha256 = ? AND config_name = ? AND config_version = ?",
+                key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE result_cache SET used_at = ? WHERE sha256 = ? AND config_name = ? AND config_version = ?",
+                (time.time(), *key))
+            self._connection.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def _put(self, key, value):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO result_cache (sha256, config_name, config_version, payload, used_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (*key, json.dumps(value, ensure_ascii=False), time.time()))
+            self._connection.execute(
+                "DELETE FROM result_cache WHERE rowid NOT IN"
+                " (SELECT rowid FROM result_cache ORDER BY used_at DESC LIMIT ?)",
+                (self.max_entries,))
+            self._connection.commit()
+
+    def size(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_cache: ResultCacheInterface | None = None
+
+
+def create_result_cache() -> ResultCacheInterface | None:
+    """
+    Создаёт кэш результатов по настройкам из core/config.py
+    :return: Кэш или None, если кэширование выключено
+    """
+    if config.RESULT_CACHE == "memory":
+        return MemoryResultCache(config.RESULT_CACHE_MAX_ENTRIES)
+    if config.RESULT_CACHE == "sqlite":
+        return SQLiteResultCache(config.RESULT_CACHE_PATH, config.RESULT_CACHE_MAX_ENTRIES)
+    if config.RESULT_CACHE == "none":
+        return None
+    raise ValueError(f"Unknown result cache backend '{config.RESULT_CACHE}'")
+
+
+def get_result_cache() -> ResultCacheInterface | None:
+    """
+    Возвращает общий кэш результатов, создаёт его при первом обращении
+    """
+    global _cache
+    if _cache is None:
+        _cache = create_result_cache()
+    return _cache
+
+
+def close_result_cache():
+    """
+    Закрывает общий кэш результатов (вызывается при завершении приложения)
+    """
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
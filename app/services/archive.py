@@ -0,0 +1,87 @@
+import io
+import posixpath
+import tarfile
+import zipfile
+
+from app.exceptions import PayloadTooLargeError
+from app.models.file_model import FileModel
+from app.services.upload_ingest import spool_stream
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
+def is_archive(file: FileModel) -> bool:
+    """
+    Проверяет, является ли загруженный файл архивом (zip или tar) по его имени
+    :param file: Объект FileModel
+    :return: True, если это архив
+    """
+    return file.filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def unpack_archive(file: FileModel, max_total_size: int, chunk_size: int = 1024 * 1024,
+                   spool_dir: str = None, max_files: int = None) -> list[FileModel]:
+    """
+    Распаковывает PDF-файлы из zip или tar архива, остальные файлы архива пропускаются
+    Каждый PDF-файл по частям сохраняется во временный файл на диске с подсчётом хеш-суммы (как при приёме
+    загрузки, см. upload_ingest), содержимое целиком в памяти не держится.
+    Синхронная функция: из цикла событий её нужно вызывать через asyncio.to_thread
+    :param file: Объект FileModel с архивом
+    :param max_total_size: Максимальный суммарный размер распакованных PDF-файлов в байтах
+    :param chunk_size: Размер части, читаемой за раз
+    :param spool_dir: Каталог для временных файлов (None - системный по умолчанию)
+    :param max_files: Максимальное количество PDF-файлов в архиве (None - без ограничения)
+    :return: Список FileModel с PDF-файлами из архива (временные файлы, удаляются через cleanup)
+    """
+    # Архив, сохранённый на диск при приёме, читается с диска
+    source = file.path if file.path is not None else io.BytesIO(file.get_content())
+    if file.filename.lower().endswith(".zip"):
+        members = _iter_zip(source)
+    else:
+        members = _iter_tar(source)
+
+    files = []
+    total_size = 0
+    too_large = f"Архив '{file.filename}' превышает допустимый размер {max_total_size} байт."
+    try:
+        for name, size, open_member in members:
+            filename = posixpath.basename(name)
+            if not filename.lower().endswith(".pdf"):
+                continue
+            # Лишний файл обнаруживается до его распаковки, остальная часть архива не читается
+            if max_files is not None and len(files) >= max_files:
+                raise ValueError(f"Архив '{file.filename}' содержит больше допустимых {max_files} PDF-файлов.")
+            # Заявленный размер проверяется до распаковки, фактический - по ходу (заголовок архива может врать)
+            if total_size + size > max_total_size:
+                raise ValueError(too_large)
+            try:
+                with open_member() as stream:
+                    member = spool_stream(stream, filename, max_total_size - total_size, chunk_size, spool_dir)
+            except PayloadTooLargeError:
+                raise ValueError(too_large)
+            files.append(member)
+            total_size += member.size
+    except BaseException:
+        # Уже распакованные файлы удаляются, если архив целиком не принят
+        for member in files:
+            member.cleanup()
+        raise
+    return files
+
+
+def _iter_zip(source):
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            if not info.is_dir():
+                yield info.filename, info.file_size, lambda info=info: archive.open(info)
+
+
+def _iter_tar(source):
+    if isinstance(source, str):
+        archive = tarfile.open(name=source, mode="r:*")
+    else:
+        archive = tarfile.open(fileobj=source, mode="r:*")
+    with archive:
+        for member in archive.getmembers():
+            if member.isfile():
+                yield member.name, member.size, lambda member=member: archive.extractfile(member)
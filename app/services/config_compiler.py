@@ -0,0 +1,270 @@
+import re
+
+from app.models.pdf_structure import (AnchorConfig, Columns, Criterion, EndOfTableMarker, Fingerprint, PageRange,
+                                      PDFStructure, PointerConfig, RectTemplate, ServiceEndpoint, TableObjectConfig,
+                                      TextObjectConfig)
+
+# Поддерживаемые значения конфигурации, всё остальное отклоняется при компиляции
+TABLE_METHODS = ("by_pointers",)
+POINTER_TYPES = ("drawing",)
+# Критерий -> (количество компонент значения, погрешность по умолчанию)
+# Порядок - порядок проверки: размеры дешевле и обычно отсеивают больше рисунков, чем цвета
+POINTER_CRITERIA = {
+    "height": (1, 0.1),
+    "width": (1, 0.1),
+    "line_width": (1, 0.1),
+    "color": (3, 0.01),
+    "fill": (3, 0.01),
+}
+END_OF_TABLE_MARKER_TYPES = ("none", "drawing", "text")
+# Погрешность размера страницы в признаках конфигурации по умолчанию (пункты)
+PAGE_SIZE_TOLERANCE = 2.0
+
+
+def compile_pdf_structure(name: str, version: str, raw_config: dict) -> PDFStructure:
+    """
+    Проверяет конфигурацию структуры PDF, загруженную из YAML, и компилирует её в неизменяемые объекты
+    :param name: Имя конфигурации
+    :param version: Версия конфигурации (хеш содержимого файла)
+    :param raw_config: Конфигурация в виде словаря
+    :return: Скомпилированная конфигурация PDFStructure
+    """
+    if not isinstance(raw_config, dict) or 'pdf_structure' not in raw_config:
+        raise ValueError(f"Config '{name}': missing 'pdf_structure' section")
+
+    objects = _require(raw_config['pdf_structure'], 'objects', name)
+    if not isinstance(objects, list) or not objects:
+        raise ValueError(f"Config '{name}': 'pdf_structure.objects' must be a non-empty list")
+
+    compiled_objects = []
+    seen_names = set()
+    for obj in objects:
+        obj_name = _require(obj, 'name', name)
+        if obj_name in seen_names:
+            raise ValueError(f"Config '{name}': duplicate object name '{obj_name}'")
+        seen_names.add(obj_name)
+
+        context = f"{name}.{obj_name}"
+        obj_type = _require(obj, 'type', context)
+        if obj_type == 'text':
+            compiled_objects.append(_compile_text_object(obj, context))
+        elif obj_type == 'table':
+            compiled_objects.append(_compile_table_object(obj, context))
+        else:
+            raise ValueError(f"Config '{context}': unknown object type '{obj_type}'")
+
+    service = raw_config.get('processed_data_service')
+    processed_data_service = None
+    if service is not None:
+        processed_data_service = ServiceEndpoint(
+            base_url=str(_require(service, 'base_url', f"{name}.processed_data_service")),
+            endpoint=str(_require(service, 'endpoint', f"{name}.processed_data_service")),
+            batch_endpoint=service.get('batch_endpoint')
+        )
+
+    fingerprint = raw_config.get('fingerprint')
+    return PDFStructure(
+        name=name,
+        version=version,
+        objects=tuple(compiled_objects),
+        processed_data_service=processed_data_service,
+        fingerprint=_compile_fingerprint(fingerprint, compiled_objects, f"{name}.fingerprint")
+        if fingerprint is not None else None
+    )
+
+
+def _compile_fingerprint(fingerprint: dict, objects: list, context: str) -> Fingerprint:
+    if not isinstance(fingerprint, dict):
+        raise ValueError(f"Config '{context}': expected a mapping")
+
+    page_size = None
+    tolerance = PAGE_SIZE_TOLERANCE
+    if fingerprint.get('page_size') is not None:
+        size = fingerprint['page_size']
+        page_size = (_require_number(_require(size, 'width', f"{context}.page_size"), f"{context}.page_size.width"),
+                     _require_number(_require(size, 'height', f"{context}.page_size"), f"{context}.page_size.height"))
+        tolerance = _require_number(size.get('tolerance', tolerance), f"{context}.page_size.tolerance")
+
+    # По умолчанию - высоты из критериев указателей таблиц: полосы блоков и линии строк есть на первой странице
+    heights = fingerprint.get('drawing_heights')
+    if heights is None:
+        drawing_heights = tuple(dict.fromkeys(criterion for obj in objects if obj.type == 'table'
+                                              for pointer in obj.pointers for criterion in pointer.criteria
+                                              if criterion.name == 'height'))
+    elif isinstance(heights, list):
+        drawing_heights = tuple(_compile_criterion('height', value, f"{context}.drawing_heights") for value in heights)
+    else:
+        raise ValueError(f"Config '{context}': 'drawing_heights' must be a list")
+
+    anchors = fingerprint.get('anchors') or []
+    if not isinstance(anchors, list):
+        raise ValueError(f"Config '{context}': 'anchors' must be a list")
+    compiled_anchors = tuple(_compile_anchor(anchor, f"{context}.anchors[{i}]") for i, anchor in enumerate(anchors))
+
+    compiled = Fingerprint(page_size=page_size, page_size_tolerance=tolerance, drawing_heights=drawing_heights,
+                           anchors=compiled_anchors)
+    if not compiled.num_checks:
+        raise ValueError(f"Config '{context}': at least one of 'page_size', 'drawing_heights', 'anchors' is required")
+    return compiled
+
+
+def _compile_anchor(anchor: dict, context: str) -> AnchorConfig:
+    text = anchor.get('text', "") if isinstance(anchor, dict) else ""
+    pattern = anchor.get('pattern', "") if isinstance(anchor, dict) else ""
+    if not isinstance(text, str) or not isinstance(pattern, str) or bool(text) == bool(pattern):
+        raise ValueError(f"Config '{context}': exactly one of 'text' or 'pattern' (strings) is required")
+    if pattern:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Config '{context}': invalid pattern {pattern!r}: {e}")
+    return AnchorConfig(rect=_compile_rect(anchor, context), text=text, pattern=pattern)
+
+
+def _compile_text_object(obj: dict, context: str) -> TextObjectConfig:
+    method = _require(obj, 'method', context)
+    if method != 'absolute':
+        raise ValueError(f"Config '{context}': unknown text method '{method}'")
+    page_number = _require(obj, 'page_number', context)
+    if not isinstance(page_number, int) or page_number < 0:
+        raise ValueError(f"Config '{context}': 'page_number' must be a non-negative integer")
+    return TextObjectConfig(
+        name=obj['name'],
+        method=method,
+        rect=_compile_rect(obj, context),
+        page_number=page_number
+    )
+
+
+def _compile_table_object(obj: dict, context: str) -> TableObjectConfig:
+    method = _require(obj, 'method', context)
+    if method not in TABLE_METHODS:
+        raise ValueError(f"Config '{context}': unknown table method '{method}'")
+
+    # Указателями считаются все ключи вида *_pointer, обязательны указатели блоков и строк
+    pointers = tuple(_compile_pointer(key, value, f"{context}.{key}")
+                     for key, value in obj.items() if key.endswith('_pointer'))
+    pointer_names = {pointer.name for pointer in pointers}
+    for required in ('blocks_pointer', 'row_pointer'):
+        if required not in pointer_names:
+            raise ValueError(f"Config '{context}': missing '{required}'")
+
+    return TableObjectConfig(
+        name=obj['name'],
+        method=method,
+        pointers=pointers,
+        end_of_table_marker=_compile_end_of_table_marker(obj.get('end_of_table_marker') or {'type': 'none'},
+                                                         f"{context}.end_of_table_marker"),
+        pages=_compile_page_range(obj.get('pages') or {}, f"{context}.pages")
+    )
+
+
+def _compile_end_of_table_marker(marker: dict, context: str) -> EndOfTableMarker:
+    marker_type = _require(marker, 'type', context)
+    if marker_type not in END_OF_TABLE_MARKER_TYPES:
+        raise ValueError(f"Config '{context}': unknown marker type '{marker_type}'")
+
+    if marker_type == 'drawing':
+        return EndOfTableMarker(type=marker_type, criteria=_compile_criteria(_require(marker, 'criteria', context),
+                                                                           context))
+    if marker_type == 'text':
+        text = _require(marker, 'text', context)
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError(f"Config '{context}': 'text' must be a non-empty string")
+        # Область поиска необязательна, без неё текст ищется по всей странице
+        rect = _compile_rect(marker, context) if 'offset' in marker or 'dimensions' in marker else None
+        return EndOfTableMarker(type=marker_type, text=text.strip(), rect=rect)
+    return EndOfTableMarker(type=marker_type)
+
+
+def _compile_page_range(pages: dict, context: str) -> PageRange:
+    if not isinstance(pages, dict):
+        raise ValueError(f"Config '{context}': expected a mapping with 'start' and/or 'end'")
+    start = pages.get('start', 0)
+    end = pages.get('end')
+    for key, value in (('start', start), ('end', end)):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            raise ValueError(f"Config '{context}.{key}': expected an integer, got {value!r}")
+    return PageRange(start=start or 0, end=end)
+
+
+def _compile_pointer(name: str, pointer: dict, context: str) -> PointerConfig:
+    pointer_type = _require(pointer, 'type', context)
+    if pointer_type not in POINTER_TYPES:
+        raise ValueError(f"Config '{context}': unknown pointer type '{pointer_type}'")
+
+    return PointerConfig(
+        name=name,
+        type=pointer_type,
+        criteria=_compile_criteria(_require(pointer, 'criteria', context), context),
+        multiple=bool(pointer.get('multiple', True)),
+        rect=_compile_rect(pointer, context),
+        columns=_compile_columns(_require(pointer, 'headers', context), f"{context}.headers")
+    )
+
+
+def _compile_criteria(criteria: dict, context: str) -> tuple[Criterion, ...]:
+    if not isinstance(criteria, dict) or not criteria:
+        raise ValueError(f"Config '{context}': 'criteria' must be a non-empty mapping")
+    compiled_criteria = [_compile_criterion(criterion, value, f"{context}.criteria.{criterion}")
+                         for criterion, value in criteria.items()]
+    order = list(POINTER_CRITERIA)
+    compiled_criteria.sort(key=lambda criterion: order.index(criterion.name))
+    return tuple(compiled_criteria)
+
+
+def _compile_criterion(name: str, value, context: str) -> Criterion:
+    # Значение задаётся как есть (height: 3.0, color: [0, 0, 0]) или с погрешностью: {value: 3.0, tolerance: 0.05}
+    if name not in POINTER_CRITERIA:
+        raise ValueError(f"Config '{context}': unknown criterion '{name}'")
+    components, tolerance = POINTER_CRITERIA[name]
+    if isinstance(value, dict):
+        tolerance = _require_number(value.get('tolerance', tolerance), f"{context}.tolerance")
+        value = _require(value, 'value', context)
+    if tolerance <= 0:
+        raise ValueError(f"Config '{context}': 'tolerance' must be positive")
+
+    values = value if isinstance(value, list) else [value]
+    if len(values) != components:
+        raise ValueError(f"Config '{context}': expected {components} number(s), got {value!r}")
+    return Criterion(name=name, value=tuple(_require_number(item, context) for item in values), tolerance=tolerance)
+
+
+def _compile_rect(obj: dict, context: str) -> RectTemplate:
+    offset = _require(obj, 'offset', context)
+    dimensions = _require(obj, 'dimensions', context)
+    return RectTemplate(
+        dx=_require_number(_require(offset, 'x', f"{context}.offset"), f"{context}.offset.x"),
+        dy=_require_number(_require(offset, 'y', f"{context}.offset"), f"{context}.offset.y"),
+        width=_require_number(_require(dimensions, 'width', f"{context}.dimensions"), f"{context}.dimensions.width"),
+        height=_require_number(_require(dimensions, 'height', f"{context}.dimensions"),
+                               f"{context}.dimensions.height")
+    )
+
+
+def _compile_columns(headers: dict, context: str) -> Columns:
+    names = _require(headers, 'names', context)
+    widths = _require(headers, 'column_widths', context)
+    if len(names) != len(widths):
+        raise ValueError(f"Config '{context}': 'names' and 'column_widths' must have the same length")
+
+    # Границы столбцов считаются один раз здесь, а не на каждой строке таблицы
+    bounds = []
+    x0 = 0.0
+    for width in widths:
+        x1 = x0 + _require_number(width, f"{context}.column_widths")
+        bounds.append((x0, x1))
+        x0 = x1
+    return Columns(names=tuple(str(name) for name in names), bounds=tuple(bounds))
+
+
+def _require(obj, key: str, context: str):
+    if not isinstance(obj, dict) or key not in obj:
+        raise ValueError(f"Config '{context}': missing '{key}'")
+    return obj[key]
+
+
+def _require_number(value, context: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Config '{context}': expected a number, got {value!r}")
+    return float(value)
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import yaml
+
+from app.models.file_model import FileModel
+from app.models.pdf_structure import PDFStructure
+from app.services.config_compiler import compile_pdf_structure
+from app.services.template_detection import FingerprintIndex
+from core.config import config as app_config
+
+
+class ConfigRegistry:
+    """
+    Реестр скомпилированных конфигураций структуры PDF.
+    Все YAML-файлы каталога загружаются, проверяются и компилируются один раз при старте,
+    повторно файл читается только если изменилось время его модификации.
+    """
+
+    def __init__(self, directory: str, default_name: str | None = None):
+        """
+        :param directory: Каталог с YAML-конфигурациями структуры PDF (core/configs/pdf_structures)
+        :param default_name: Конфигурация для документов, не подошедших по признакам ни к одной конфигурации
+        (None - такие документы отклоняются)
+        """
+        self.directory = Path(directory)
+        self.default_name = default_name
+        self._entries: dict[str, tuple[float, PDFStructure]] = {}  # Имя -> (mtime файла, конфигурация)
+        self._lock = threading.Lock()  # Реестр используется и из потоков пула извлечения
+        # Индекс признаков и версии конфигураций, по которым он построен
+        self._index: tuple[tuple[tuple[str, str], ...], FingerprintIndex] | None = None
+
+    def load_all(self) -> list[str]:
+        """
+        Загружает и компилирует все конфигурации каталога
+        Ошибка в любой конфигурации останавливает загрузку, чтобы сервис не стартовал с некорректной конфигурацией
+        :return: Имена загруженных конфигураций
+        """
+        for path in sorted(self.directory.glob("*.yml")):
+            self.get(path.stem)
+        return self.names()
+
+    def names(self) -> list[str]:
+        """
+        Возвращает имена уже загруженных конфигураций
+        """
+        return sorted(self._entries)
+
+    def get(self, name: str) -> PDFStructure:
+        """
+        Возвращает скомпилированную конфигурацию по имени (имени файла без расширения)
+        :param name: Имя конфигурации, например "lift_report_v1"
+        :return: Конфигурация PDFStructure
+        """
+        path = self.directory / f"{name}.yml"
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            raise FileNotFoundError(f"PDF structure config '{name}' not found in '{self.directory}'")
+
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+            structure = self._compile(name, path)
+            self._entries[name] = (mtime, structure)
+            return structure
+
+    def fingerprint_index(self) -> FingerprintIndex:
+        """
+        Возвращает индекс признаков всех конфигураций каталога
+        Индекс перестраивается, только если конфигурации добавились, удалились или изменились
+        :return: Индекс FingerprintIndex
+        """
+        structures = [self.get(path.stem) for path in sorted(self.directory.glob("*.yml"))]
+        if self.default_name and all(structure.name != self.default_name for structure in structures):
+            structures.append(self.get(self.default_name))  # Ошибка, если конфигурации по умолчанию нет
+        versions = tuple((structure.name, structure.version) for structure in structures)
+        index = self._index
+        if index is None or index[0] != versions:
+            default = next((structure for structure in structures if structure.name == self.default_name), None)
+            index = self._index = (versions, FingerprintIndex(structures, default))
+        return index[1]
+
+    def detect(self, file: FileModel) -> PDFStructure:
+        """
+        Выбирает конфигурацию для документа по признакам первой страницы (см. FingerprintIndex)
+        Выполняется синхронно, документ открывается, если выбор зависит от его содержимого
+        :param file: Объект FileModel, представляющий PDF-файл
+        :return: Конфигурация PDFStructure
+        """
+        return self.fingerprint_index().detect(file)
+
+    @staticmethod
+    def _compile(name: str, path: Path) -> PDFStructure:
+        content = path.read_bytes()
+        version = hashlib.sha256(content).hexdigest()[:12]
+        return compile_pdf_structure(name, version, yaml.safe_load(content))
+
+
+_registry: ConfigRegistry | None = None
+
+
+def get_config_registry() -> ConfigRegistry:
+    """
+    Возвращает общий для приложения реестр конфигураций, создаёт его при первом обращении
+    """
+    global _registry
+    if _registry is None:
+        _registry = ConfigRegistry(app_config.PDF_STRUCTURES_DIR, app_config.PDF_STRUCTURE_DEFAULT or None)
+    return _registry
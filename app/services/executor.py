@@ -0,0 +1,260 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.models.file_model import FileModel
+from app.models.overlay_geometry import OverlayGeometry
+from app.models.pdf_structure import PDFStructure
+from app.repositories.pdf_repository import PDFRepository
+from app.services import metrics
+from app.services.memory_budget import MemoryBudget
+from app.services.page_parallel import PagePool
+from app.services.pdf_extraction import extract_pdf, extract_pdf_in_worker, iter_extract_pdf
+from core.config import config as app_config
+
+# Сколько готовых результатов потоковой обработки может ждать медленного клиента, дальше обработка приостанавливается
+STREAM_QUEUE_SIZE = 64
+
+
+class ExtractionExecutor:
+    """
+    Пул для выполнения CPU-нагруженного извлечения данных из PDF вне цикла событий asyncio.
+    Поддерживает два режима:
+    - "thread": пул потоков, конвейер работает с репозиторием сервиса;
+    - "process": пул процессов, в воркер передаются только файл (путь или байты) и конфигурация,
+      обратно возвращаются простые словари. Масштабируется по ядрам без конкуренции за GIL.
+    Документы от page_parallel_min_pages страниц дополнительно делятся на диапазоны страниц,
+    таблицы которых обрабатываются параллельно в пуле процессов (см. page_parallel.PagePool).
+    Документ закрывается сразу после извлечения, новое извлечение ждёт, пока память процесса выше порога
+    (см. MemoryBudget).
+    Потоковая обработка (stream) выполняется в отдельном ограниченном пуле потоков: медленные клиенты
+    не занимают потоки основного пула и не задерживают обычные загрузки.
+    """
+
+    MODES = ("thread", "process")
+
+    def __init__(self, mode: str = "thread", max_workers: int = None, page_cache_size: int = 16,
+                 page_parallel_min_pages: int = 0, page_workers: int = None, store_shrink_percent: int = 0,
+                 memory_budget: MemoryBudget | None = None, stream_workers: int = None,
+                 stream_stall_timeout: float = 0):
+        """
+        :param mode: Режим пула: "thread" или "process"
+        :param max_workers: Размер пула (None - по умолчанию для выбранного пула)
+        :param page_cache_size: Размер кэша страниц для репозиториев, создаваемых в процессах-воркерах
+        :param page_parallel_min_pages: С какого количества страниц обрабатывать документ по диапазонам страниц
+        параллельно (0 - не обрабатывать)
+        :param page_workers: Количество процессов для диапазонов страниц в режиме "thread"
+        (в режиме "process" используется основной пул)
+        :param store_shrink_percent: Какую часть кэша MuPDF освобождать при закрытии документа (см. PDFRepository)
+        :param memory_budget: Ограничение памяти процесса (None - без ограничения)
+        :param stream_workers: Сколько потоковых обработок выполняется одновременно, остальные ждут свободного потока
+        (None - как max_workers)
+        :param stream_stall_timeout: Через сколько секунд без чтения результатов клиентом потоковая обработка
+        прерывается (0 - не прерывается)
+        """
+        if mode == "thread":
+            self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-extraction")
+        elif mode == "process":
+            # spawn, а не fork: родитель - многопоточный процесс с запущенным циклом событий
+            self.pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {self.MODES}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.page_cache_size = page_cache_size
+        self.page_parallel_min_pages = page_parallel_min_pages
+        self.page_workers = page_workers or os.cpu_count() or 1
+        self.store_shrink_percent = store_shrink_percent
+        self.memory_budget = memory_budget
+        self.stream_pool = ThreadPoolExecutor(max_workers=stream_workers or self.max_workers,
+                                              thread_name_prefix="pdf-stream")
+        self.stream_stall_timeout = stream_stall_timeout
+        self._page_pool = None
+
+    async def extract(self, repository: PDFRepository | None, file: FileModel, config: PDFStructure,
+                      output_path=None, overlay: OverlayGeometry | None = None) -> dict:
+        """
+        Выполняет конвейер извлечения в пуле и ожидает результат
+        :param repository: Репозиторий сервиса (используется только в режиме "thread"),
+        None - создать отдельный репозиторий для этого файла
+        :param file: Объект FileModel, представляющий PDF-файл
+        :param config: Скомпилированная конфигурация обработки конкретного вида PDF
+        :param output_path: Путь для сохранения размеченного PDF-файла (необязательный)
+        :param overlay: Куда записать геометрию для отладочной разметки (необязательный)
+        :return: Словарь с извлечёнными данными по именам объектов из конфигурации
+        """
+        loop = asyncio.get_running_loop()
+        await self._wait_memory(config)
+        page_pool = self._get_page_pool() if self.page_parallel_min_pages else None
+        if self.mode == "process":
+            # Файл, сохранённый на диск при приёме, передаётся в процесс по пути, без копирования содержимого
+            extracted_data, stats, worker_overlay = await loop.run_in_executor(
+                self.pool, extract_pdf_in_worker, file, config, output_path, self.page_cache_size, overlay is not None,
+                self.store_shrink_percent, self.page_parallel_min_pages)
+            if extracted_data is not None:
+                if overlay is not None:
+                    overlay.merge(worker_overlay)
+                metrics.observe_extraction(config.name, stats)
+                return extracted_data
+            # Большой документ воркер вернул необработанным: в этом процессе остаются только загрузка, текстовые
+            # объекты и группировка строк, таблицы обрабатываются по диапазонам страниц в процессах
+            coordinator = None
+        else:
+            # Количество страниц проверяется по документу, открытому для обработки (см. PagePool.accepts)
+            coordinator = self.pool
+        repository = repository or self._new_repository()
+        try:
+            extracted_data = await loop.run_in_executor(coordinator, extract_pdf, repository, file, config,
+                                                        output_path, page_pool, overlay)
+        finally:
+            repository.close()
+        metrics.observe_extraction(config.name, repository.stats)
+        return extracted_data
+
+    async def stream(self, file: FileModel, config: PDFStructure) -> AsyncIterator[list[tuple[str, str, object]]]:
+        """
+        Выполняет конвейер извлечения в пуле и отдаёт результаты по мере готовности (см. iter_extract_pdf)
+        Результаты передаются из потока через ограниченную очередь: если их не успевают забирать, обработка ждёт.
+        Отдаются все уже готовые результаты разом: пока обработка впереди, они идут пачками, иначе - по одному.
+        Если итерацию прервать (клиент отключился), обработка останавливается на следующем результате,
+        если результаты не забирают дольше stream_stall_timeout секунд - прерывается с TimeoutError.
+        :param file: Объект FileModel, представляющий PDF-файл
+        :param config: Скомпилированная конфигурация обработки конкретного вида PDF
+        :return: Асинхронный итератор списков троек (тип объекта, имя объекта, результат)
+        """
+        loop = asyncio.get_running_loop()
+        await self._wait_memory(config)
+        page_pool = self._get_page_pool() if self.page_parallel_min_pages else None
+        repository = self._new_repository()
+        queue = asyncio.Queue()
+        # Места в очереди: поток ждёт только когда очередь заполнена, а не каждого результата
+        slots = threading.Semaphore(STREAM_QUEUE_SIZE)
+        stopped = threading.Event()
+        # Генератор нельзя передать в процесс, поэтому он выполняется в потоке отдельного пула в обоих режимах,
+        # а таблицы больших документов, как и без потоковой выдачи, обрабатываются в процессах по диапазонам страниц
+        producer = loop.run_in_executor(self.stream_pool, _produce,
+                                        iter_extract_pdf(repository, file, config, page_pool), loop, queue, slots,
+                                        stopped, self.stream_stall_timeout)
+        try:
+            done = False
+            while not done:
+                messages = [await queue.get()]
+                while not queue.empty():
+                    messages.append(queue.get_nowait())
+                items = []
+                for item, error, done in messages:
+                    slots.release()
+                    if error is not None:
+                        raise error
+                    if not done:
+                        items.append(item)
+                if items:
+                    yield items
+        finally:
+            stopped.set()
+            await asyncio.gather(producer, return_exceptions=True)
+            repository.close()
+            metrics.observe_extraction(config.name, repository.stats)
+
+    async def _wait_memory(self, config: PDFStructure):
+        # Время ожидания памяти записывается отдельным этапом, только если ожидание было
+        if self.memory_budget is not None:
+            waited = await self.memory_budget.wait()
+            if waited:
+                metrics.STAGE_DURATION.observe(waited, config.name, "memory_wait", "ok")
+
+    def _new_repository(self) -> PDFRepository:
+        return PDFRepository(page_cache_size=self.page_cache_size, store_shrink_percent=self.store_shrink_percent)
+
+    def _get_page_pool(self) -> PagePool:
+        # В режиме "process" диапазоны страниц выполняются в основном пуле, в режиме "thread" - в отдельном пуле
+        # процессов (процессы запускаются при первом большом документе)
+        if self._page_pool is None:
+            if self.mode == "process":
+                self._page_pool = PagePool(self.pool, self.max_workers, self.page_cache_size,
+                                           self.store_shrink_percent, self.page_parallel_min_pages)
+            else:
+                pool = ProcessPoolExecutor(max_workers=self.page_workers,
+                                           mp_context=multiprocessing.get_context("spawn"))
+                self._page_pool = PagePool(pool, self.page_workers, self.page_cache_size, self.store_shrink_percent,
+                                           self.page_parallel_min_pages)
+        return self._page_pool
+
+    def shutdown(self):
+        """
+        Останавливает пул, дожидаясь завершения уже запущенных задач
+        """
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.stream_pool.shutdown(wait=True, cancel_futures=True)
+        if self._page_pool is not None and self._page_pool.pool is not self.pool:
+            self._page_pool.pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _produce(items: Iterator, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, slots: threading.Semaphore,
+             stopped: threading.Event, stall_timeout: float = 0):
+    """
+    Выполняется в потоке пула: продвигает генератор и передаёт результаты в очередь цикла событий
+    Каждый элемент очереди - (результат, ошибка, признак завершения)
+    """
+    def put(message) -> bool:
+        # Ожидание места прерывается, если результаты больше не нужны или клиент слишком долго их не забирает
+        waited = 0.0
+        while not slots.acquire(timeout=0.1):
+            if stopped.is_set():
+                return False
+            waited += 0.1
+            if stall_timeout and waited >= stall_timeout:
+                # Ошибка передаётся без места в очереди: обработка на этом завершается
+                error = TimeoutError(f"Результаты потоковой обработки не забирались {stall_timeout:g} с")
+                loop.call_soon_threadsafe(queue.put_nowait, (None, error, True))
+                return False
+        loop.call_soon_threadsafe(queue.put_nowait, message)
+        return True
+
+    try:
+        for item in items:
+            if stopped.is_set() or not put((item, None, False)):
+                return
+        put((None, None, True))
+    except Exception as e:
+        put((None, e, True))
+    finally:
+        items.close()
+
+
+_executor: ExtractionExecutor | None = None
+
+
+def get_extraction_executor() -> ExtractionExecutor:
+    """
+    Возвращает общий для приложения пул извлечения, создаёт его при первом обращении по настройкам из core/config.py
+    """
+    global _executor
+    if _executor is None:
+        _executor = ExtractionExecutor(mode=app_config.PDF_EXECUTOR,
+                                       max_workers=app_config.PDF_EXECUTOR_WORKERS,
+                                       page_cache_size=app_config.PDF_PAGE_CACHE_SIZE,
+                                       page_parallel_min_pages=app_config.PDF_PAGE_PARALLEL_MIN_PAGES,
+                                       page_workers=app_config.PDF_PAGE_PARALLEL_WORKERS,
+                                       store_shrink_percent=app_config.MUPDF_STORE_SHRINK_PERCENT,
+                                       memory_budget=MemoryBudget(
+                                           app_config.PDF_MEMORY_BUDGET_MB * 2 ** 20,
+                                           include_children=(app_config.PDF_EXECUTOR == "process"
+                                                             or app_config.PDF_PAGE_PARALLEL_MIN_PAGES > 0),
+                                           max_wait=app_config.PDF_MEMORY_MAX_WAIT),
+                                       stream_workers=app_config.PDF_STREAM_WORKERS,
+                                       stream_stall_timeout=app_config.PDF_STREAM_STALL_TIMEOUT)
+    return _executor
+
+
+def shutdown_extraction_executor():
+    """
+    Останавливает общий пул извлечения (вызывается при завершении приложения)
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
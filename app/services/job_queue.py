@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable
+
+from app.exceptions import ConflictError, QueueFullError
+from app.interfaces.job_store_interface import JobStoreInterface
+from app.models.file_model import FileModel
+from app.models.job_model import JOB_CONFLICT, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, Job
+from app.repositories.job_store import MemoryJobStore, SQLiteJobStore
+from app.services.pdf_service import PDFService
+from core.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    Очередь фоновой обработки PDF внутри процесса.
+    Загрузка сохраняется на диск и ставится в очередь, клиент сразу получает идентификатор задачи.
+    Фиксированное число воркеров разбирает очередь, поэтому одновременная работа с PyMuPDF на узле ограничена.
+    Очередь ограничена по длине: при переполнении новые задачи отклоняются (back-pressure).
+    Все обращения к хранилищу (SQLite с fsync) выполняются в потоке, чтобы не останавливать цикл событий,
+    завершённые задачи удаляются из хранилища раз в минуту.
+    """
+
+    def __init__(self, store: JobStoreInterface, service_factory: Callable[[], PDFService], workers: int,
+                 max_size: int, retention_seconds: float):
+        """
+        :param store: Хранилище задач
+        :param service_factory: Фабрика PDFService, сервис создаётся на каждую задачу
+        :param workers: Количество воркеров
+        :param max_size: Максимальное количество задач, ожидающих обработки
+        :param retention_seconds: Сколько хранить завершённые задачи
+        """
+        self.store = store
+        self.service_factory = service_factory
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_size)
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        """
+        Запускает воркеров и возвращает в очередь задачи, не завершённые до перезапуска
+        """
+        self._tasks = [asyncio.create_task(self._worker(), name=f"pdf-job-worker-{i}") for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._prune(), name="pdf-job-prune"))
+        unfinished = await asyncio.to_thread(self.store.list_unfinished)
+        if unfinished:
+            logger.info(f"Restoring {len(unfinished)} unfinished PDF jobs")
+            self._tasks.append(asyncio.create_task(self._restore(unfinished), name="pdf-job-restore"))
+
+    async def stop(self):
+        """
+        Останавливает воркеров. Прерванные задачи остаются незавершёнными и будут восстановлены при следующем старте
+        (если хранилище это позволяет)
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.store.close()
+
+    async def submit(self, file: FileModel) -> Job:
+        """
+        Ставит сохранённую на диск загрузку в очередь
+        :param file: FileModel со ссылкой на файл на диске
+        :return: Созданная задача
+        """
+        message = f"Очередь обработки переполнена ({self._queue.maxsize} задач), повторите позже."
+        if self._queue.full():
+            raise QueueFullError(message)
+        job = Job(filename=file.filename, path=file.path, sha256=file.sha256, size=file.size)
+        # Задача сохраняется до постановки в очередь, чтобы воркер гарантированно её нашёл
+        await asyncio.to_thread(self.store.save, job)
+        try:
+            self._queue.put_nowait(job.id)
+        except asyncio.QueueFull:
+            # Пока задача сохранялась, очередь заняли другие загрузки
+            await self._update(job, JOB_FAILED, error=message)
+            raise QueueFullError(message)
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        """
+        Возвращает задачу по идентификатору
+        """
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def pending(self) -> int:
+        """
+        Количество задач, ожидающих обработки
+        """
+        return self._queue.qsize()
+
+    async def _restore(self, jobs: list[Job]):
+        for job in jobs:
+            job.status = JOB_QUEUED
+            job.stage = None
+            await asyncio.to_thread(self.store.save, job)
+            await self._queue.put(job.id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await asyncio.to_thread(self.store.get, job_id)
+                if job is not None:
+                    await self._run(job)
+            except Exception as e:
+                logger.exception(f"PDF job {job_id} worker error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _prune(self):
+        while True:
+            await asyncio.sleep(60)
+            try:
+                await asyncio.to_thread(self.store.prune, time.time() - self.retention_seconds)
+            except Exception as e:
+                logger.exception(f"PDF job prune error: {e}")
+
+    async def _run(self, job: Job):
+        file = FileModel(filename=job.filename, path=job.path, sha256=job.sha256, size=job.size, temporary=True)
+        # Загрузка удаляется, даже если не удалось сохранить статус задачи
+        try:
+            if not os.path.exists(job.path):
+                await self._update(job, JOB_FAILED, error="Сохранённая загрузка не найдена")
+                return
+
+            await self._update(job, JOB_RUNNING)
+            try:
+                service = self.service_factory()
+                processed_data, response = await service.process_lift_pdf(
+                    file, on_stage=lambda stage: self._update(job, JOB_RUNNING, stage=stage))
+                await self._update(job, JOB_DONE,
+                                   result={"file_sha256": processed_data.file_sha256, "response": response})
+            except ConflictError as e:
+                await self._update(job, JOB_CONFLICT, error=str(e))
+            except Exception as e:
+                await self._update(job, JOB_FAILED, error=str(e))
+        finally:
+            file.cleanup()
+
+    async def _update(self, job: Job, status: str, stage: str = None, result: dict = None, error: str = None):
+        job.status = status
+        job.stage = stage
+        job.result = result
+        job.error = error
+        job.updated_at = time.time()
+        await asyncio.to_thread(self.store.save, job)
+
+
+_job_queue: JobQueue | None = None
+
+
+def create_job_store() -> JobStoreInterface:
+    """
+    Создаёт хранилище задач по настройкам из core/config.py
+    """
+    if config.JOB_STORE == "memory":
+        return MemoryJobStore()
+    if config.JOB_STORE == "sqlite":
+        return SQLiteJobStore(config.JOB_STORE_PATH)
+    raise ValueError(f"Unknown job store backend '{config.JOB_STORE}'")
+
+
+def get_job_queue() -> JobQueue | None:
+    """
+    Возвращает общую очередь задач (None, если она ещё не запущена)
+    """
+    return _job_queue
+
+
+async def start_job_queue(service_factory: Callable[[], PDFService]) -> JobQueue:
+    """
+    Создаёт и запускает общую очередь задач (вызывается при старте приложения)
+    """
+    global _job_queue
+    os.makedirs(config.JOB_STORAGE_DIR, exist_ok=True)
+    _job_queue = JobQueue(create_job_store(), service_factory, workers=config.JOB_WORKERS,
+                          max_size=config.JOB_QUEUE_MAX_SIZE, retention_seconds=config.JOB_RETENTION_SECONDS)
+    await _job_queue.start()
+    return _job_queue
+
+
+async def stop_job_queue():
+    """
+    Останавливает общую очередь задач (вызывается при завершении приложения)
+    """
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+        _job_queue = None
@@ -0,0 +1,114 @@
+import asyncio
+import ctypes
+import ctypes.util
+import gc
+import os
+import time
+
+import pymupdf as fitz
+
+
+class MemoryBudget:
+    """
+    Ограничение памяти процесса: новое извлечение не начинается, пока RSS процесса (вместе с дочерними процессами
+    пулов извлечения, если они есть) выше порога. Уже запущенные извлечения не прерываются, по мере их завершения память
+    освобождается и ожидающие запросы продолжаются.
+    Перед ожиданием освобождается то, что держится только ради скорости: кэш MuPDF, циклические ссылки Python
+    и свободная память кучи, которую malloc не вернул системе.
+    RSS читается из /proc, на других системах ограничение не действует.
+    """
+
+    def __init__(self, max_rss_bytes: int, include_children: bool = False, poll_interval: float = 0.1,
+                 max_wait: float = 30.0):
+        """
+        :param max_rss_bytes: Порог RSS в байтах (0 - без ограничения)
+        :param include_children: Учитывать дочерние процессы (пулы процессов извлечения). Они ищутся просмотром /proc,
+        поэтому без пулов процессов не учитываются
+        :param poll_interval: Как часто проверять RSS во время ожидания (секунды)
+        :param max_wait: Сколько ждать не больше (секунды), после этого извлечение начинается, даже если память
+        не освободилась: иначе процесс с долгоживущей памятью выше порога перестал бы отвечать совсем
+        """
+        self.max_rss_bytes = max_rss_bytes
+        self.include_children = include_children
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self._malloc_trim = _load_malloc_trim()
+
+    def current_rss(self) -> int:
+        """
+        RSS процесса (и его дочерних процессов, если они учитываются) в байтах
+        """
+        pid = os.getpid()
+        pids = [pid, *child_pids(pid)] if self.include_children else [pid]
+        return sum(rss for rss in map(read_rss, pids) if rss is not None)
+
+    async def wait(self) -> float:
+        """
+        Ожидает, пока RSS не опустится ниже порога (не дольше max_wait)
+        :return: Сколько секунд длилось ожидание (0 - память в пределах порога)
+        """
+        if not self.max_rss_bytes or self.current_rss() < self.max_rss_bytes:
+            return 0.0
+        start = time.perf_counter()
+        await asyncio.to_thread(self.release)
+        rss = self.current_rss()
+        while rss >= self.max_rss_bytes:
+            waited = time.perf_counter() - start
+            if waited >= self.max_wait:
+                print(f"RSS {rss // 2 ** 20} МБ выше порога {self.max_rss_bytes // 2 ** 20} МБ "
+                      f"дольше {self.max_wait} с, извлечение запускается без ожидания")
+                return waited
+            await asyncio.sleep(self.poll_interval)
+            rss = self.current_rss()
+        return time.perf_counter() - start
+
+    def release(self):
+        """
+        Освобождает память, которая держится только как кэш: весь кэш MuPDF, циклические ссылки Python
+        и свободные участки кучи (malloc_trim, только glibc)
+        """
+        fitz.TOOLS.store_shrink(100)
+        gc.collect()
+        if self._malloc_trim is not None:
+            self._malloc_trim(0)
+
+
+def read_rss(pid: int) -> int | None:
+    """
+    RSS процесса в байтах из /proc/<pid>/statm (None - процесса нет или /proc недоступен)
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def child_pids(pid: int) -> list[int]:
+    """
+    Дочерние процессы по PPid из /proc/<pid>/stat (пустой список, если /proc недоступен)
+    """
+    children = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Имя процесса в скобках может содержать пробелы, поля считаются после последней скобки
+                if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                    children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def _load_malloc_trim():
+    # malloc_trim есть только в glibc, на других системах освобождение кучи пропускается
+    try:
+        return ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6").malloc_trim
+    except (OSError, AttributeError):
+        return None
@@ -0,0 +1,158 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from app.exceptions import ConflictError
+from app.models.extraction_stats import ExtractionStats
+
+# Метрики сервиса в текстовом формате Prometheus (отдаются на /metrics)
+# Гистограммы хранятся в памяти процесса: наблюдение - это поиск корзины и пара сложений под блокировкой,
+# поэтому метрики можно не отключать в продакшене. При запуске нескольких воркеров у каждого свои метрики.
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+BYTES_BUCKETS = tuple(2 ** power for power in range(14, 30, 2))  # 16 КБ ... 256 МБ
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами и метками
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]):
+        """
+        :param name: Имя метрики
+        :param documentation: Описание метрики (строка HELP)
+        :param labelnames: Имена меток, значения передаются в observe в том же порядке
+        :param buckets: Верхние границы корзин по возрастанию
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(float(bucket) for bucket in buckets)
+        # Значения меток -> [количество в каждой корзине и в +Inf..., сумма, количество]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        """
+        Добавляет наблюдение
+        :param value: Значение
+        :param labelvalues: Значения меток в порядке labelnames
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        """
+        Возвращает строки метрики в текстовом формате Prometheus
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labelvalues: list(values) for labelvalues, values in self._series.items()}
+        for labelvalues, values in sorted(series.items()):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {values[-2]!r}")
+            lines.append(f"{self.name}_count{suffix} {values[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Набор метрик процесса
+    """
+
+    def __init__(self):
+        self._metrics: list[Histogram] = []
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...],
+                  buckets: tuple[float, ...]) -> Histogram:
+        """
+        Создаёт и регистрирует гистограмму
+        """
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(histogram)
+        return histogram
+
+    def render(self) -> str:
+        """
+        Возвращает все метрики в текстовом формате Prometheus
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "pdf_stage_duration_seconds", "Duration of PDF processing stages", ("config", "stage", "outcome"),
+    DURATION_BUCKETS)
+DOCUMENT_PAGES = registry.histogram(
+    "pdf_document_pages", "Pages per processed PDF document", ("config", "outcome"), COUNT_BUCKETS)
+PAGES_LOADED = registry.histogram(
+    "pdf_pages_loaded", "Pages loaded (parsed) per PDF document", ("config", "outcome"), COUNT_BUCKETS)
+DOCUMENT_ROWS = registry.histogram(
+    "pdf_document_rows", "Table rows extracted per PDF document", ("config", "outcome"), COUNT_BUCKETS)
+DRAWINGS_SCANNED = registry.histogram(
+    "pdf_drawings_scanned", "Drawings scanned for table pointers per PDF document", ("config", "outcome"),
+    COUNT_BUCKETS)
+TEXT_LOOKUPS = registry.histogram(
+    "pdf_text_lookups", "Text lookups by rect per PDF document", ("config", "outcome"), COUNT_BUCKETS)
+UPLOAD_BYTES = registry.histogram(
+    "pdf_upload_bytes", "Size of processed PDF uploads in bytes", ("config", "outcome"), BYTES_BUCKETS)
+
+
+@contextmanager
+def timed_stage(config_name: str, stage: str):
+    """
+    Замеряет время этапа обработки и записывает его с результатом: ok, conflict или error
+    :param config_name: Имя конфигурации структуры PDF
+    :param stage: Название этапа
+    """
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except ConflictError:
+        outcome = "conflict"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, config_name, stage, outcome)
+
+
+def observe_extraction(config_name: str, stats: ExtractionStats):
+    """
+    Записывает счётчики и время внутренних этапов успешного извлечения одного документа
+    :param config_name: Имя конфигурации структуры PDF
+    :param stats: Статистика, собранная репозиторием и процессором
+    """
+    for stage, seconds in stats.stages.items():
+        STAGE_DURATION.observe(seconds, config_name, stage, "ok")
+    DOCUMENT_PAGES.observe(stats.pages, config_name, "ok")
+    PAGES_LOADED.observe(stats.pages_loaded, config_name, "ok")
+    DOCUMENT_ROWS.observe(stats.rows, config_name, "ok")
+    DRAWINGS_SCANNED.observe(stats.drawings_scanned, config_name, "ok")
+    TEXT_LOOKUPS.observe(stats.text_lookups, config_name, "ok")
@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import random
+import time
+from itertools import groupby
+
+import httpx
+
+from app.exceptions import ConflictError
+from app.interfaces.outbox_store_interface import OutboxStoreInterface
+from app.models.outbox_model import (OUTBOX_CONFLICT, OUTBOX_DELIVERED, OUTBOX_FAILED, OUTBOX_PENDING,
+                                     OutboxEntry)
+from app.models.pdf_structure import PDFStructure
+from app.models.processed_data_model import ProcessedDataModel
+from app.repositories.http_client import get_http_client
+from app.repositories.outbox_store import MemoryOutboxStore, SQLiteOutboxStore
+from app.repositories.processed_data_repository import ProcessedDataRepository, json_array
+from app.services import metrics
+from core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Ответы микросервиса отчётов, после которых отправку стоит повторить
+RETRY_STATUS_CODES = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+
+class OutboxSender:
+    """
+    Доставка отчётов на микросервис отчётов через outbox.
+    Отчёт записывается в хранилище до ответа на загрузку, фоновая задача забирает из хранилища отчёты,
+    время попытки которых наступило, и отправляет их пачками (если у микросервиса есть batch_endpoint)
+    с ограниченным числом одновременных запросов. Неудачные отправки повторяются с экспоненциальной задержкой
+    и случайным разбросом, хеш-сумма файла служит ключом идемпотентности.
+    """
+
+    def __init__(self, store: OutboxStoreInterface, repository: ProcessedDataRepository, batch_size: int,
+                 concurrency: int, max_attempts: int, retry_base_delay: float, retry_max_delay: float,
+                 lease_seconds: float, poll_interval: float, retention_seconds: float):
+        """
+        :param store: Хранилище outbox
+        :param repository: Репозиторий для отправки отчётов
+        :param batch_size: Сколько отчётов отправлять одним запросом (только при наличии batch_endpoint)
+        :param concurrency: Сколько запросов к микросервису выполняется одновременно
+        :param max_attempts: После скольких неудачных попыток отчёт считается неотправленным
+        :param retry_base_delay: Задержка перед второй попыткой, дальше она удваивается (секунды)
+        :param retry_max_delay: Максимальная задержка между попытками (секунды)
+        :param lease_seconds: Через сколько забранный, но не отправленный отчёт снова становится доступным
+        :param poll_interval: Как часто проверять хранилище без новых отчётов (секунды)
+        :param retention_seconds: Сколько хранить отправленные и неотправленные отчёты
+        """
+        self.store = store
+        self.repository = repository
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        """
+        Запускает фоновую отправку. Отчёты, не отправленные до перезапуска, отправляются в первую очередь
+        """
+        self._task = asyncio.create_task(self._run(), name="outbox-sender")
+
+    async def stop(self):
+        """
+        Останавливает фоновую отправку. Прерванные отправки будут повторены после перезапуска
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.store.close()
+
+    async def enqueue(self, processed_data: ProcessedDataModel, structure: PDFStructure) -> OutboxEntry:
+        """
+        Сохраняет отчёт для отправки и будит отправителя
+        :param processed_data: Отчёт
+        :param structure: Конфигурация структуры PDF, по которой извлечён отчёт (адреса микросервиса отчётов)
+        :return: Запись outbox
+        """
+        service = structure.processed_data_service
+        entry = OutboxEntry(file_sha256=processed_data.file_sha256, filename=processed_data.filename,
+                            config_name=structure.name, url=service.url, batch_url=service.batch_url,
+                            payload=processed_data.to_json())
+        # Запись в SQLite короткая, но синхронная (fsync), поэтому выполняется в потоке
+        await asyncio.to_thread(self._add, entry)
+        self._wakeup.set()
+        return entry
+
+    def _add(self, entry: OutboxEntry):
+        if self.store.add(entry):
+            return
+        existing = self.store.get(entry.file_sha256)
+        # Неотправленный отчёт можно загрузить повторно, остальные уже приняты - это тот же конфликт,
+        # что вернул бы микросервис отчётов
+        if existing is not None and existing.status != OUTBOX_FAILED:
+            raise ConflictError(f"Отчёт из файла с хеш-суммой {entry.file_sha256} уже принят "
+                                f"(статус: {existing.status}).")
+        self.store.save(entry)
+
+    async def get(self, file_sha256: str) -> OutboxEntry | None:
+        """
+        Возвращает запись outbox по хеш-сумме файла
+        """
+        return await asyncio.to_thread(self.store.get, file_sha256)
+
+    async def stats(self) -> dict:
+        """
+        Количество отчётов по статусам
+        """
+        return {"backend": type(self.store).__name__, "counts": await asyncio.to_thread(self.store.counts)}
+
+    async def _run(self):
+        last_prune = 0.0
+        while True:
+            try:
+                await self.drain()
+                if time.time() - last_prune > 60:
+                    await asyncio.to_thread(self.store.prune, time.time() - self.retention_seconds)
+                    last_prune = time.time()
+            except Exception as e:
+                logger.exception(f"Outbox sender error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def drain(self):
+        """
+        Отправляет все отчёты, время попытки которых наступило
+        Все обращения к хранилищу (SQLite с fsync) выполняются в потоке, чтобы не останавливать цикл событий
+        """
+        while True:
+            entries = await asyncio.to_thread(self.store.claim_due, time.time(), self.batch_size * self.concurrency,
+                                              self.lease_seconds)
+            if not entries:
+                return
+            await asyncio.gather(*(self._deliver(chunk) for chunk in self._chunks(entries)))
+
+    def _chunks(self, entries: list[OutboxEntry]) -> list[list[OutboxEntry]]:
+        """
+        Делит отчёты на пачки для отправки одним запросом: пачка собирается только из отчётов с одним адресом
+        пакетного приёма, отчёты без него отправляются по одному
+        """
+        chunks = []
+        key = lambda entry: (entry.batch_url or "", entry.url)
+        for (batch_url, _), group in groupby(sorted(entries, key=key), key=key):
+            group = list(group)
+            size = self.batch_size if batch_url else 1
+            chunks.extend(group[i:i + size] for i in range(0, len(group), size))
+        return chunks
+
+    async def _deliver(self, entries: list[OutboxEntry]):
+        async with self._semaphore:
+            try:
+                with metrics.timed_stage(entries[0].config_name, "deliver"):
+                    if len(entries) == 1:
+                        response = await self.repository.send_json(entries[0].payload, entries[0].url)
+                    else:
+                        response = await self.repository.send_json(
+                            json_array([entry.payload for entry in entries]), entries[0].batch_url)
+            except ConflictError as e:
+                if len(entries) == 1:
+                    self._finish(entries[0], OUTBOX_CONFLICT, error=str(e))
+                    await self._save(entries)
+                    return
+                # Пачка отклонена из-за части отчётов: каждый отчёт отправляется отдельно,
+                # чтобы конфликт получили только уже принятые микросервисом
+                error = e
+            except Exception as e:
+                self._retry(entries, e)
+                await self._save(entries)
+                return
+            else:
+                for entry in entries:
+                    self._finish(entry, OUTBOX_DELIVERED, response=response)
+                await self._save(entries)
+                return
+        logger.info(f"Outbox batch of {len(entries)} reports rejected ({error}), sending one by one")
+        await asyncio.gather(*(self._deliver([entry]) for entry in entries))
+
+    async def _save(self, entries: list[OutboxEntry]):
+        # Результат отправки пачки сохраняется одной транзакцией в потоке
+        await asyncio.to_thread(self.store.save_many, entries)
+
+    def _retry(self, entries: list[OutboxEntry], error: Exception):
+        """
+        Откладывает отчёты до следующей попытки или отмечает их неотправленными (сохраняет вызывающий, см. _save)
+        """
+        retryable = not isinstance(error, httpx.HTTPStatusError) or \
+            error.response.status_code in RETRY_STATUS_CODES
+        for entry in entries:
+            entry.attempts += 1
+            if not retryable or entry.attempts >= self.max_attempts:
+                self._finish(entry, OUTBOX_FAILED, error=str(error))
+                continue
+            # Полный случайный разброс: отправители разных воркеров не повторяют запросы одновременно
+            delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (entry.attempts - 1)))
+            entry.status = OUTBOX_PENDING
+            entry.error = str(error)
+            entry.next_attempt_at = time.time() + delay
+            entry.updated_at = time.time()
+        logger.warning(f"Outbox delivery of {len(entries)} reports failed: {error}")
+
+    def _finish(self, entry: OutboxEntry, status: str, response: dict = None, error: str = None):
+        entry.status = status
+        entry.response = response
+        entry.error = error
+        entry.updated_at = time.time()
+
+
+_outbox_sender: OutboxSender | None = None
+
+
+def create_outbox_store() -> OutboxStoreInterface | None:
+    """
+    Создаёт хранилище outbox по настройкам из core/config.py (None - outbox отключён)
+    """
+    if config.OUTBOX == "none":
+        return None
+    if config.OUTBOX == "memory":
+        return MemoryOutboxStore()
+    if config.OUTBOX == "sqlite":
+        return SQLiteOutboxStore(config.OUTBOX_PATH)
+    raise ValueError(f"Unknown outbox backend '{config.OUTBOX}'")
+
+
+def get_outbox_sender() -> OutboxSender | None:
+    """
+    Возвращает общий отправитель outbox (None, если outbox отключён или ещё не запущен)
+    """
+    return _outbox_sender
+
+
+async def start_outbox_sender() -> OutboxSender | None:
+    """
+    Создаёт и запускает общий отправитель outbox (вызывается при старте приложения)
+    """
+    global _outbox_sender
+    store = create_outbox_store()
+    if store is None:
+        return None
+    _outbox_sender = OutboxSender(store, ProcessedDataRepository(get_http_client()),
+                                  batch_size=config.OUTBOX_BATCH_SIZE, concurrency=config.OUTBOX_CONCURRENCY,
+                                  max_attempts=config.OUTBOX_MAX_ATTEMPTS,
+                                  retry_base_delay=config.OUTBOX_RETRY_BASE_DELAY,
+                                  retry_max_delay=config.OUTBOX_RETRY_MAX_DELAY,
+                                  lease_seconds=config.OUTBOX_LEASE_SECONDS,
+                                  poll_interval=config.OUTBOX_POLL_INTERVAL,
+                                  retention_seconds=config.OUTBOX_RETENTION_SECONDS)
+    await _outbox_sender.start()
+    return _outbox_sender
+
+
+async def stop_outbox_sender():
+    """
+    Останавливает общий отправитель outbox (вызывается при завершении приложения, до закрытия HTTP-клиента)
+    """
+    global _outbox_sender
+    if _outbox_sender is not None:
+        await _outbox_sender.stop()
+        _outbox_sender = None
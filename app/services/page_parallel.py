@@ -0,0 +1,102 @@
+from collections.abc import Iterator
+from concurrent.futures import Executor
+
+from app.models.extraction_stats import ExtractionStats
+from app.models.file_model import FileModel
+from app.models.pdf_models import RectArray
+from app.models.pdf_structure import TableObjectConfig
+from app.processors.pdf.handlers import TableHandler
+from app.repositories.pdf_repository import PDFRepository
+
+
+class PagePool:
+    """
+    Параллельная обработка таблиц большого документа по диапазонам страниц.
+    Страницы делятся на диапазоны по числу воркеров, каждый процесс сам открывает документ, ищет указатели
+    и извлекает текст ячеек своего диапазона. Группировка строк по блокам остаётся в родителе (см. TableHandler).
+    Документы меньше min_pages страниц обрабатываются без пула: количество страниц проверяется по уже открытому
+    документу (см. accepts), отдельно документ для этого не открывается.
+    """
+
+    def __init__(self, pool: Executor, workers: int, page_cache_size: int = 16, store_shrink_percent: int = 0,
+                 min_pages: int = 0):
+        """
+        :param pool: Пул процессов
+        :param workers: Количество процессов пула, на столько диапазонов делится документ
+        :param page_cache_size: Размер кэша страниц репозиториев в процессах-воркерах
+        :param store_shrink_percent: Какую часть кэша MuPDF процессов-воркеров освобождать при закрытии документа
+        :param min_pages: С какого количества страниц документ обрабатывается по диапазонам
+        """
+        self.pool = pool
+        self.workers = workers
+        self.page_cache_size = page_cache_size
+        self.store_shrink_percent = store_shrink_percent
+        self.min_pages = min_pages
+
+    def accepts(self, num_pages: int) -> bool:
+        """
+        Проверяет, обрабатывать ли документ с таким количеством страниц по диапазонам
+        """
+        return num_pages >= self.min_pages
+
+    def extract_table(self, file: FileModel, config: TableObjectConfig,
+                      pages: range) -> list[tuple[RectArray, list, RectArray, list, int | None, ExtractionStats]]:
+        """
+        Обрабатывает таблицу по диапазонам страниц и ожидает все диапазоны
+        :param file: Загруженный файл (в процессы передаётся путь на диске или байты)
+        :param config: Конфигурация обработки таблицы
+        :param pages: Страницы таблицы (см. TableHandler.pages), делятся на диапазоны
+        :return: Результаты extract_page_range и статистика по каждому диапазону, в порядке страниц
+        """
+        return list(self.iter_table(file, config, pages))
+
+    def iter_table(self, file: FileModel, config: TableObjectConfig,
+                   pages: range) -> Iterator[tuple[RectArray, list, RectArray, list, int | None, ExtractionStats]]:
+        """
+        Обрабатывает таблицу по диапазонам страниц, все диапазоны запускаются сразу
+        :return: Результаты extract_page_range и статистика по каждому диапазону в порядке страниц,
+        каждый диапазон отдаётся, как только готовы он и все диапазоны перед ним
+        """
+        futures = [self.pool.submit(extract_table_pages, file, config, pages.start + page_start,
+                                    pages.start + page_end, self.page_cache_size, self.store_shrink_percent)
+                   for page_start, page_end in split_pages(len(pages), self.workers)]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            # Результат больше не нужен (таблица закончилась или клиент прервал потоковый ответ):
+            # ещё не начатые диапазоны отменяются
+            for future in futures:
+                future.cancel()
+
+
+def split_pages(num_pages: int, parts: int) -> list[tuple[int, int]]:
+    """
+    Делит страницы на последовательные диапазоны почти равной длины
+    :param num_pages: Количество страниц
+    :param parts: Количество диапазонов (не больше количества страниц)
+    :return: Список пар (первая страница, страница после последней)
+    """
+    parts = max(1, min(parts, num_pages))
+    size, extra = divmod(num_pages, parts)
+    ranges = []
+    page_start = 0
+    for part in range(parts):
+        page_end = page_start + size + (part < extra)
+        ranges.append((page_start, page_end))
+        page_start = page_end
+    return ranges
+
+
+def extract_table_pages(file: FileModel, config: TableObjectConfig, page_start: int, page_end: int,
+                        page_cache_size: int = 16, store_shrink_percent: int = 0
+                        ) -> tuple[RectArray, list, RectArray, list, int | None, ExtractionStats]:
+    """
+    Точка входа процесса-воркера: открывает документ и обрабатывает таблицу на диапазоне страниц
+    :return: Блоки и строки диапазона, страница маркера конца таблицы (см. TableHandler.extract_page_range)
+    и статистика обработки
+    """
+    with PDFRepository(page_cache_size=page_cache_size, store_shrink_percent=store_shrink_percent) as repository:
+        repository.load_pdf(file)
+        part = TableHandler(repository).extract_page_range(config, page_start, page_end)
+    return *part, repository.stats
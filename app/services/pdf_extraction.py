@@ -0,0 +1,157 @@
+import hashlib
+from collections.abc import Iterator
+
+from app.models.extraction_stats import ExtractionStats
+from app.models.file_model import FileModel
+from app.models.overlay_geometry import OverlayGeometry
+from app.models.pdf_structure import PDFStructure
+from app.processors.pdf.pdf_processor import PDFProcessor
+from app.repositories.pdf_repository import PDFRepository
+
+
+# Синхронный конвейер извлечения данных из PDF
+# Выполняется в пуле потоков или процессов (см. app/services/executor.py), чтобы не блокировать цикл событий
+# Возвращает только простые словари, чтобы результат можно было передать между процессами
+
+
+def extract_pdf(repository: PDFRepository, file: FileModel, config: PDFStructure, output_path=None,
+                page_pool=None, overlay: OverlayGeometry | None = None) -> dict:
+    """
+    Загружает, проверяет и обрабатывает PDF-документ по конфигурации.
+
+    :param repository: Репозиторий для работы с PDF-документом.
+    :param file: Объект FileModel, представляющий PDF-файл.
+    :param config: Скомпилированная конфигурация обработки конкретного вида PDF.
+    :param output_path: Путь для сохранения размеченного PDF-файла (необязательный).
+    :param page_pool: Пул для обработки таблиц по диапазонам страниц (необязательный, см. page_parallel.PagePool).
+    :param overlay: Куда записать геометрию для отладочной разметки (необязательный).
+    :return: Словарь с извлечёнными данными по именам объектов из конфигурации.
+    """
+    # Загрузка PDF из FileModel, документ разбирается один раз и дальше только проверяется
+    # Документ, уже открытый вызывающим кодом (см. extract_pdf_in_worker), повторно не открывается
+    if repository.file is not file:
+        repository.load_pdf(file)
+    validate_document(repository, file)
+
+    # Обработка PDF с использованием процессора и конфигурации
+    processor = PDFProcessor(repository, config, page_pool)
+    if output_path and overlay is None:
+        overlay = OverlayGeometry()
+    extracted_data = processor.process_pdf(overlay)
+    if output_path:
+        # Разметка рисуется после обработки на копии страниц, обрабатываемый документ не изменяется
+        with open(output_path, "wb") as f:
+            f.write(repository.render_overlay_pdf(overlay))
+        print(f"Размеченный PDF сохранен: {output_path}")
+
+    print("PDF обработан")
+
+    return extracted_data
+
+
+def iter_extract_pdf(repository: PDFRepository, file: FileModel, config: PDFStructure,
+                     page_pool=None) -> Iterator[tuple[str, str, object]]:
+    """
+    Загружает, проверяет и обрабатывает PDF-документ по конфигурации, отдавая результаты по мере готовности.
+    Весь результат в памяти не собирается: таблицы отдаются по блокам (см. PDFProcessor.iter_objects).
+
+    :param repository: Репозиторий для работы с PDF-документом.
+    :param file: Объект FileModel, представляющий PDF-файл.
+    :param config: Скомпилированная конфигурация обработки конкретного вида PDF.
+    :param page_pool: Пул для обработки таблиц по диапазонам страниц (необязательный, см. page_parallel.PagePool).
+    :return: Итератор троек (тип объекта, имя объекта, результат): текст или блок таблицы со строками.
+    """
+    repository.load_pdf(file)
+    validate_document(repository, file)
+
+    for obj, result in PDFProcessor(repository, config, page_pool).iter_objects():
+        yield obj.type, obj.name, result
+
+    print("PDF обработан")
+
+
+def extract_pdf_in_worker(file: FileModel, config: PDFStructure, output_path=None, page_cache_size: int = 16,
+                          record_overlay: bool = False, store_shrink_percent: int = 0,
+                          page_parallel_min_pages: int = 0) -> tuple[dict | None, ExtractionStats,
+                                                                      OverlayGeometry | None]:
+    """
+    Точка входа для пула процессов: в процесс передаются только файл (путь на диске или байты) и конфигурация,
+    репозиторий создаётся на стороне воркера.
+
+    :param file: Объект FileModel, представляющий PDF-файл.
+    :param config: Скомпилированная конфигурация обработки конкретного вида PDF (передаётся через pickle).
+    :param output_path: Путь для сохранения размеченного PDF-файла (необязательный).
+    :param page_cache_size: Сколько загруженных страниц держать в памяти одновременно.
+    :param record_overlay: Записать геометрию для отладочной разметки.
+    :param store_shrink_percent: Какую часть кэша MuPDF процесса-воркера освобождать при закрытии документа.
+    :param page_parallel_min_pages: Документ от стольких страниц воркер не обрабатывает, а возвращает родителю
+    для обработки по диапазонам страниц (0 - обрабатывает любой).
+    :return: Результат extract_pdf (None, если документ возвращён родителю), статистика обработки (метрики
+    процесса-воркера родителю не видны) и геометрия разметки (None, если не записывалась).
+    """
+    overlay = OverlayGeometry() if record_overlay else None
+    with PDFRepository(page_cache_size=page_cache_size, store_shrink_percent=store_shrink_percent) as repository:
+        # Количество страниц берётся из документа, открытого для обработки, отдельно он не открывается
+        repository.load_pdf(file)
+        if page_parallel_min_pages and repository.get_num_pages() >= page_parallel_min_pages:
+            return None, repository.stats, None
+        extracted_data = extract_pdf(repository, file, config, output_path, overlay=overlay)
+    return extracted_data, repository.stats, overlay
+
+
+def render_overlay(file: FileModel, overlay: OverlayGeometry, pages: list[int] | None, image_format: str = "pdf",
+                   dpi: int = 96) -> bytes | list[tuple[int, bytes]]:
+    """
+    Рисует отладочную разметку по геометрии, записанной при обработке документа.
+    Документ открывается заново, разметка рисуется только на копиях запрошенных страниц.
+
+    :param file: Объект FileModel, представляющий PDF-файл.
+    :param overlay: Геометрия разметки (см. extract_pdf).
+    :param pages: Номера страниц, начиная с 0 (None - все страницы).
+    :param image_format: "pdf" - один PDF с запрошенными страницами, "png" - изображение на каждую страницу.
+    :param dpi: Разрешение изображений (только для "png").
+    :return: PDF в байтах или список пар (номер страницы, PNG).
+    """
+    with PDFRepository() as repository:
+        repository.load_pdf(file)
+        if image_format == "pdf":
+            return repository.render_overlay_pdf(overlay, pages)
+        if image_format == "png":
+            return repository.render_overlay_png(overlay, pages, dpi)
+        raise ValueError(f"Unknown overlay format '{image_format}', expected 'pdf' or 'png'")
+
+
+def warm_up(config: PDFStructure) -> None:
+    """
+    Прогревает конвейер извлечения на небольшом документе: ленивая инициализация PyMuPDF, NumPy и кэшей
+    выполняется при старте, а не на первом запросе.
+
+    :param config: Скомпилированная конфигурация обработки конкретного вида PDF.
+    """
+    with PDFRepository() as repository:
+        extract_pdf(repository, FileModel("warmup.pdf", PDFRepository.create_sample_pdf()), config)
+
+
+def validate_document(repository: PDFRepository, file: FileModel) -> None:
+    """
+    Проверяет уже открытый в репозитории документ.
+
+    :param repository: Репозиторий с загруженным PDF-документом.
+    :param file: Объект FileModel, представляющий PDF-файл.
+    """
+    if not repository.doc.is_pdf:
+        raise ValueError(f"Файл '{file.filename}' не является PDF.")
+    if repository.doc.needs_pass:
+        raise PermissionError(f"Файл '{file.filename}' защищен паролем.")
+
+    print(f"Файл '{file.filename}' успешно валидирован.")
+
+
+def get_pdf_hash(content: bytes) -> str:
+    """
+    Вычисляет хеш-сумму PDF-документа.
+
+    :param content: Содержимое PDF-файла.
+    :return: Хеш-сумма SHA-256 в виде строки.
+    """
+    return hashlib.sha256(content).hexdigest()
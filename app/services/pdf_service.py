@@ -1,92 +1,323 @@
-import hashlib
+import asyncio
+from collections.abc import AsyncIterator
 
+from app.exceptions import ConflictError
 from app.interfaces.pdf_service_interface import PDFServiceInterface
+from app.interfaces.result_cache_interface import ResultCacheInterface
 from app.models.file_model import FileModel
+from app.models.overlay_geometry import OverlayGeometry
+from app.models.pdf_structure import PDFStructure
 from app.models.processed_data_model import ProcessedDataModel
-from app.processors.pdf.pdf_processor import PDFProcessor
 from app.repositories.pdf_repository import PDFRepository
 from app.repositories.processed_data_repository import ProcessedDataRepository
-from app.services import utils
-from app.services.config_loader import ConfigLoader
+from app.services import metrics, utils
+from app.services.config_registry import ConfigRegistry
+from app.services.executor import ExtractionExecutor
+from app.services.outbox_sender import OutboxSender
+from app.services.pdf_extraction import get_pdf_hash, render_overlay, validate_document
 from app.services.utils import convert_to_rfc3339
 
 
+# Конфигурация отчёта о простое лифтов (используется бенчмарками; сервис выбирает конфигурацию по признакам документа)
+LIFT_REPORT_CONFIG = "lift_report_v1"
+
+
 class PDFService(PDFServiceInterface):
     """
     Сервисный слой для обработки PDF-файлов.
     """
 
-    def __init__(self, config_loader: ConfigLoader, repository: PDFRepository):
+    def __init__(self, config_registry: ConfigRegistry, repository: PDFRepository, executor: ExtractionExecutor,
+                 processed_data_repository: ProcessedDataRepository, result_cache: ResultCacheInterface | None = None,
+                 outbox: OutboxSender | None = None):
         """
         Инициализация сервиса для обработки PDF-файлов.
+        :param config_registry: Реестр скомпилированных конфигураций структуры PDF
+        :param executor: Пул, в котором выполняется CPU-нагруженное извлечение данных из PDF
+        :param processed_data_repository: Репозиторий для отправки обработанных данных на другой микросервис
+        :param result_cache: Кэш результатов извлечения по хеш-сумме файла (None - без кэша)
+        :param outbox: Outbox для фоновой отправки отчётов (None - отчёт отправляется во время обработки)
         """
-        self.config_loader = config_loader
+        self.config_registry = config_registry
         self.repository = repository
+        self.executor = executor
+        self.processed_data_repository = processed_data_repository
+        self.result_cache = result_cache
+        self.outbox = outbox
 
-    async def process_lift_pdf(self, file: FileModel, output_path=None):
+    async def process_lift_pdf(self, file: FileModel, output_path=None, on_stage=None):
         """
         Обрабатывает PDF-документ о простое лифтов и возвращает массив моделей данных.
 
         :param file: Объект FileModel, представляющий PDF-файл.
         :param output_path: Путь для сохранения размеченного PDF-файла (необязательный).
-        :return: Массив моделей LiftCompanyReport.
+        :param on_stage: Асинхронная функция, вызываемая с названием этапа при переходе к нему (необязательная).
+        :return: Модель ProcessedDataModel и ответ микросервиса отчётов (с outbox - статус записи outbox).
         """
-        config_path = "core/configs/pdf_structures/lift_report_v1.yml"
         try:
-            config = self.config_loader.load_config(config_path)
-            processor = PDFProcessor(self.repository, config)
+            # Конфигурации уже скомпилированы при старте, нужная выбирается по признакам первой страницы
+            config = await self.select_config(file)
+            with metrics.timed_stage(config.name, "total"):
+                if on_stage:
+                    await on_stage("extracting")
+                processed_data = await self._extract_lift_report(file, config, self.repository, output_path)
+
+                # Отправка обработанных данных на другой микросервис
+                if on_stage:
+                    await on_stage("submitting")
+                response = await self._submit(processed_data, config)
+            return processed_data, response
+        except Exception as e:
+            print(f"Ошибка обработки PDF: {e}")
+            raise
+
+    async def process_lift_pdfs(self, files: list[FileModel], concurrency: int,
+                                submit_batch_size: int) -> AsyncIterator[dict]:
+        """
+        Обрабатывает пачку PDF-документов о простое лифтов с ограниченным параллелизмом.
+        Результаты по каждому файлу отдаются по мере готовности, ошибка в одном файле не прерывает остальные.
+        Конфигурация выбирается для каждого файла отдельно. Если у микросервиса отчётов задан batch_endpoint,
+        отчёты отправляются пачками по submit_batch_size, пачка собирается из отчётов одной конфигурации
+        (при включённом outbox отчёты сохраняются в него, пачки собирает фоновая отправка).
+
+        :param files: Список объектов FileModel.
+        :param concurrency: Сколько файлов обрабатывается одновременно.
+        :param submit_batch_size: Сколько отчётов отправлять одним запросом (только при наличии batch_endpoint).
+        :return: Асинхронный итератор словарей с результатом по каждому файлу.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        def coalesce(config: PDFStructure) -> bool:
+            # С outbox отчёты уходят пачками из фоновой отправки, здесь они только сохраняются
+            service = config.processed_data_service
+            return service is not None and service.batch_url is not None and self.outbox is None
+
+        async def process_one(file: FileModel):
+            async with semaphore:
+                try:
+                    config = await self.select_config(file)
+                    # У каждого файла свой репозиторий, общий репозиторий сервиса здесь не используется
+                    processed_data = await self._extract_lift_report(file, config, None)
+                    if coalesce(config):
+                        return file, config, processed_data, None, None
+                    response = await self._submit(processed_data, config)
+                    return file, config, processed_data, response, None
+                except Exception as e:
+                    print(f"Ошибка обработки PDF '{file.filename}': {e}")
+                    return file, None, None, None, e
+
+        tasks = [asyncio.create_task(process_one(file)) for file in files]
+        # Имя конфигурации -> (конфигурация, отчёты, ожидающие отправки пачкой)
+        pending_submit: dict[str, tuple[PDFStructure, list]] = {}
+        try:
+            for task in asyncio.as_completed(tasks):
+                file, config, processed_data, response, error = await task
+                if error is not None or not coalesce(config):
+                    yield self._batch_item(file, processed_data, response, error)
+                    continue
 
-            self.validate_pdf(file)
+                _, pending = pending_submit.setdefault(config.name, (config, []))
+                pending.append((file, processed_data))
+                if len(pending) >= submit_batch_size:
+                    del pending_submit[config.name]
+                    for item in await self._submit_batch(pending, config, config.processed_data_service.batch_url):
+                        yield item
 
-            # Загрузка PDF из FileModel
-            self.repository.load_pdf(file)
+            for config, pending in pending_submit.values():
+                for item in await self._submit_batch(pending, config, config.processed_data_service.batch_url):
+                    yield item
+        finally:
+            # Клиент мог отключиться, не дочитав ответ, незавершённые задачи больше не нужны
+            for task in tasks:
+                task.cancel()
 
-            # Обработка PDF с использованием процессора и конфигурации отчёта о простое лифтов
-            extracted_data = processor.process_pdf(draw_rectangles=output_path is not None)
-            if output_path:
-                self.repository.save_pdf(output_path)
-                print(f"Размеченный PDF сохранен: {output_path}")
+    async def select_config(self, file: FileModel) -> PDFStructure:
+        """
+        Выбирает конфигурацию структуры PDF по признакам первой страницы документа (см. ConfigRegistry.detect)
+        :param file: Объект FileModel, представляющий PDF-файл.
+        :return: Конфигурация PDFStructure.
+        """
+        index = self.config_registry.fingerprint_index()
+        if not index.needs_detection:
+            return index.detect(file)
+        # Первая страница открывается в потоке: это разбор PDF, хотя и без извлечения данных
+        with metrics.timed_stage("auto", "detect"):
+            return await asyncio.to_thread(index.detect, file)
 
-            print("PDF обработан")
+    async def _submit(self, processed_data: ProcessedDataModel, config: PDFStructure) -> dict:
+        """
+        Отправляет отчёт на микросервис отчётов или, если включён outbox, сохраняет его для фоновой отправки
+        :return: Ответ микросервиса отчётов или статус записи outbox
+        """
+        if config.processed_data_service is None:
+            raise ValueError(f"Config '{config.name}' has no processed_data_service to submit reports to")
+        if self.outbox is None:
+            with metrics.timed_stage(config.name, "submit"):
+                return await self.processed_data_repository.send_processed_data(
+                    processed_data, config.processed_data_service.url)
+        with metrics.timed_stage(config.name, "enqueue"):
+            entry = await self.outbox.enqueue(processed_data, config)
+        return {"status": entry.status, "file_sha256": entry.file_sha256,
+                "status_url": f"/lift/outbox/{entry.file_sha256}"}
 
-            # Преобразование в модели данных
+    async def _submit_batch(self, items: list[tuple[FileModel, ProcessedDataModel]], config: PDFStructure,
+                            url: str) -> list[dict]:
+        """
+        Отправляет несколько отчётов одним запросом и формирует результаты по каждому файлу
+        """
+        try:
+            with metrics.timed_stage(config.name, "submit_batch"):
+                response = await self.processed_data_repository.send_processed_data_batch(
+                    [processed_data for _, processed_data in items], url)
+            return [self._batch_item(file, processed_data, response, None) for file, processed_data in items]
+        except Exception as e:
+            print(f"Ошибка отправки пачки отчётов: {e}")
+            return [self._batch_item(file, processed_data, None, e) for file, processed_data in items]
+
+    @staticmethod
+    def _batch_item(file: FileModel, processed_data: ProcessedDataModel | None, response, error) -> dict:
+        """
+        Результат обработки одного файла пачки
+        """
+        if error is None:
+            return {"filename": file.filename, "status": "processed", "file_sha256": processed_data.file_sha256,
+                    "response": response}
+        item = {"filename": file.filename, "status": "conflict" if isinstance(error, ConflictError) else "error",
+                "detail": str(error)}
+        if processed_data is not None:
+            item["file_sha256"] = processed_data.file_sha256
+        return item
+
+    async def _extract_lift_report(self, file: FileModel, config: PDFStructure, repository: PDFRepository | None,
+                                   output_path=None) -> ProcessedDataModel:
+        """
+        Извлекает данные из PDF-документа о простое лифтов и преобразует их в модель для отправки.
+
+        :param file: Объект FileModel, представляющий PDF-файл.
+        :param config: Скомпилированная конфигурация отчёта.
+        :param repository: Репозиторий для работы с PDF (None - создать отдельный для этого файла).
+        :param output_path: Путь для сохранения размеченного PDF-файла (необязательный).
+        :return: Модель ProcessedDataModel.
+        """
+        # Хеш-сумма считается первой: повторно загруженный файл не нужно заново разбирать
+        # Обычно она уже посчитана при приёме файла, иначе считается в потоке (hashlib отпускает GIL)
+        file_sha256 = file.sha256
+        if file_sha256 is None:
+            with metrics.timed_stage(config.name, "hash"):
+                file_sha256 = await asyncio.to_thread(get_pdf_hash, file.get_content())
+        cache_key = (file_sha256, config.name, config.version)
+
+        # Разметка для отладки требует настоящей обработки, поэтому в этом случае кэш не используется
+        use_cache = self.result_cache is not None and output_path is None
+        extracted_data = await self.result_cache.get(cache_key) if use_cache else None
+        if extracted_data is None:
+            # Разбор, проверка и обработка PDF выполняются в пуле, цикл событий только ожидает результат
+            with metrics.timed_stage(config.name, "extract"):
+                extracted_data = await self.executor.extract(repository, file, config, output_path)
+            if use_cache:
+                await self.result_cache.put(cache_key, extracted_data)
+        else:
+            print(f"Результат для '{file.filename}' взят из кэша")
+
+        # Преобразование в модели данных
+        with metrics.timed_stage(config.name, "convert"):
             lift_company_reports = utils.convert_to_models(extracted_data)
             report_time = convert_to_rfc3339(extracted_data['report_time'])
-            file_sha256 = await self._get_pdf_hash(file)
 
-            # Преобразование объектов LiftCompanyReport в словари
-            companies_dicts = [company.dict() for company in lift_company_reports]
+            # Объекты LiftCompanyReport передаются в модель как есть, в JSON они сериализуются один раз при отправке
             processed_data = ProcessedDataModel(
                 report_time=report_time,
-                companies=companies_dicts,
+                companies=lift_company_reports,
                 file_sha256=file_sha256,
                 filename=file.filename
             )
-            # Отправка обработанных данных на другой микросервис
-            request_repository = ProcessedDataRepository()
-            url = config['processed_data_service']['base_url'] + config['processed_data_service']['endpoint']
-            response = await request_repository.send_processed_data(processed_data, url)
-            return processed_data, response
-        except Exception as e:
-            print(f"Ошибка обработки PDF: {e}")
-            raise
+        if file.size is not None:
+            metrics.UPLOAD_BYTES.observe(file.size, config.name, "ok")
+        return processed_data
+
+    async def stream_lift_pdf(self, file: FileModel, submit: bool = False,
+                              config: PDFStructure | None = None) -> AsyncIterator[list[dict]]:
+        """
+        Обрабатывает PDF-документ о простое лифтов и отдаёт отчёт по частям, по мере обработки страниц.
+        Первым отдаётся заголовок отчёта, затем каждая компания, как только закончен её блок таблицы, последним - итог.
+        Время до первой компании и память на обработку не зависят от количества страниц. Результат не кэшируется.
+
+        :param file: Объект FileModel, представляющий PDF-файл.
+        :param submit: Отправить собранный отчёт на микросервис отчётов (или в outbox) после обработки.
+        :param config: Уже выбранная конфигурация (None - выбрать по признакам документа, см. select_config).
+        :return: Асинхронный итератор списков словарей {"type": "report" | "company" | "summary", ...}:
+        всё, что готово к моменту выдачи, отдаётся одним списком.
+        """
+        config = config or await self.select_config(file)
+        file_sha256 = file.sha256
+        if file_sha256 is None:
+            with metrics.timed_stage(config.name, "hash"):
+                file_sha256 = await asyncio.to_thread(get_pdf_hash, file.get_content())
+
+        report_time = None
+        # Компании сохраняются только для отправки, иначе каждая отдаётся и сразу освобождается
+        companies = [] if submit else None
+        num_companies = num_reports = 0
+        with metrics.timed_stage(config.name, "stream"):
+            async for items in self.executor.stream(file, config):
+                parts = []
+                for obj_type, name, result in items:
+                    if obj_type == "text":
+                        if name == "report_time":
+                            report_time = convert_to_rfc3339(result)
+                            parts.append({"type": "report", "filename": file.filename, "file_sha256": file_sha256,
+                                          "config": config.name, "report_time": report_time})
+                        continue
+                    company = utils.convert_block_to_model(result)
+                    num_companies += 1
+                    num_reports += len(company.reports)
+                    if companies is not None:
+                        companies.append(company)
+                    parts.append({"type": "company", **company.dict()})
+                if parts:
+                    yield parts
+
+        response = None
+        if submit:
+            processed_data = ProcessedDataModel(report_time=report_time, companies=companies, file_sha256=file_sha256,
+                                                filename=file.filename)
+            response = await self._submit(processed_data, config)
+        if file.size is not None:
+            metrics.UPLOAD_BYTES.observe(file.size, config.name, "ok")
+        yield [{"type": "summary", "companies": num_companies, "reports": num_reports, "response": response}]
+
+    async def render_lift_overlay(self, file: FileModel, pages: list[int] | None = None, image_format: str = "pdf",
+                                  dpi: int = 96) -> bytes | list[tuple[int, bytes]]:
+        """
+        Обрабатывает PDF-документ о простое лифтов с записью геометрии и рисует по ней отладочную разметку.
+        Данные никуда не отправляются и не кэшируются, обычная обработка при этом разметку не записывает.
+
+        :param file: Объект FileModel, представляющий PDF-файл.
+        :param pages: Номера страниц для разметки, начиная с 0 (None - все страницы).
+        :param image_format: "pdf" - один PDF с запрошенными страницами, "png" - изображение на каждую страницу.
+        :param dpi: Разрешение изображений (только для "png").
+        :return: PDF в байтах или список пар (номер страницы, PNG).
+        """
+        config = await self.select_config(file)
+        overlay = OverlayGeometry()
+        with metrics.timed_stage(config.name, "extract"):
+            await self.executor.extract(None, file, config, overlay=overlay)
+        with metrics.timed_stage(config.name, "render_overlay"):
+            return await asyncio.to_thread(render_overlay, file, overlay, pages, image_format, dpi)
 
     def validate_pdf(self, file: FileModel) -> None:
         """
         Проверяет наличие и корректность PDF-документа.
+        Проверяется уже открытый в репозитории документ, если он ещё не открыт, то он загружается.
 
         :param file: Объект FileModel, представляющий PDF-файл.
         """
         try:
-            self.repository.load_pdf(file)
+            if self.repository.doc is None:
+                self.repository.load_pdf(file)
 
             # Простая валидация
-            if not self.repository.doc.is_pdf:
-                raise ValueError(f"Файл '{file.filename}' не является PDF.")
-            if self.repository.doc.needs_pass:
-                raise PermissionError(f"Файл '{file.filename}' защищен паролем.")
-
-            print(f"Файл '{file.filename}' успешно валидирован.")
+            validate_document(self.repository, file)
 
         except FileNotFoundError:
             print(f"Файл '{file.filename}' не найден.")
@@ -94,16 +325,3 @@ class PDFService(PDFServiceInterface):
         except Exception as e:
             print(f"Ошибка валидации PDF: {e}")
             raise e
-
-    @staticmethod
-    async def _get_pdf_hash(file: FileModel) -> str:
-        """
-        Вычисляет хеш-сумму PDF-документа.
-
-        :param file: Объект FileModel, представляющий PDF-файл.
-        :return: Хеш-сумма в виде строки.
-        """
-        # Используем SHA-256 для вычисления хеша
-        sha256_hash = hashlib.sha256()
-        sha256_hash.update(file.get_content())
-        return sha256_hash.hexdigest()
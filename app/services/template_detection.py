@@ -0,0 +1,137 @@
+import re
+
+import numpy as np
+
+from app.exceptions import TemplateMismatchError
+from app.models.file_model import FileModel
+from app.models.page_signature import PageSignature
+from app.models.pdf_structure import Fingerprint, PDFStructure, RectTemplate
+from app.repositories.pdf_repository import PDFRepository
+from app.services.pdf_extraction import validate_document
+
+
+class FingerprintIndex:
+    """
+    Индекс признаков (fingerprint) конфигураций структуры PDF для автоматического выбора конфигурации.
+    Сигнатура первой страницы документа строится один раз (см. PageSignature) и сравнивается с признаками всех
+    конфигураций за один проход, извлечение данных по нескольким конфигурациям не выполняется.
+    Выбирается конфигурация, все признаки которой выполнены; из нескольких таких - с наибольшим числом признаков.
+    Если и таких несколько, выбор неоднозначен и документ отклоняется.
+    """
+
+    def __init__(self, structures: list[PDFStructure], default: PDFStructure | None = None):
+        """
+        :param structures: Все загруженные конфигурации, в индекс попадают только конфигурации с fingerprint
+        :param default: Конфигурация для документов, которые не подошли ни к одной (None - такие документы отклоняются)
+        """
+        self.candidates = [structure for structure in structures if structure.fingerprint is not None]
+        self.default = default
+        # Тексты опорных областей всех конфигураций извлекаются из страницы один раз, одинаковые области - один раз
+        self.anchor_rects = list(dict.fromkeys(anchor.rect for structure in self.candidates
+                                               for anchor in structure.fingerprint.anchors))
+
+    @property
+    def needs_detection(self) -> bool:
+        """
+        Может ли сигнатура документа изменить выбор: если кандидатов нет или единственный кандидат и есть конфигурация
+        по умолчанию, документ не открывается
+        """
+        names = {structure.name for structure in self.candidates}
+        return bool(names) and names != ({self.default.name} if self.default is not None else set())
+
+    def detect(self, file: FileModel) -> PDFStructure:
+        """
+        Выбирает конфигурацию для документа
+        :param file: Объект FileModel, представляющий PDF-файл
+        :return: Конфигурация PDFStructure
+        """
+        if not self.needs_detection:
+            if self.default is None:
+                raise TemplateMismatchError(f"Файл '{file.filename}': нет конфигураций для автоматического выбора.")
+            return self.default
+        return self.select(self.signature(file), file.filename)
+
+    def signature(self, file: FileModel) -> PageSignature:
+        """
+        Открывает документ и строит сигнатуру первой страницы, остальные страницы не загружаются
+        :param file: Объект FileModel, представляющий PDF-файл
+        :return: Сигнатура PageSignature
+        """
+        with PDFRepository(page_cache_size=1) as repository:
+            repository.load_pdf(file)
+            validate_document(repository, file)
+            return self.page_signature(repository, self.anchor_rects)
+
+    @staticmethod
+    def page_signature(repository: PDFRepository, anchor_rects: list[RectTemplate],
+                       page_num: int = 0) -> PageSignature:
+        """
+        Строит сигнатуру страницы уже загруженного документа
+        :param repository: Репозиторий с загруженным документом
+        :param anchor_rects: Опорные области, текст которых нужен
+        :param page_num: Номер страницы
+        :return: Сигнатура PageSignature (пустая, если в документе нет такой страницы)
+        """
+        if page_num >= repository.get_num_pages():
+            return PageSignature()
+        rect = repository.get_page(page_num).rect
+        # Высоты округляются до 0.01, гистограмма получается компактной и не зависит от количества рисунков
+        heights, counts = np.unique(np.round(repository.get_page_drawings(page_num).height, 2), return_counts=True)
+        return PageSignature(width=rect.width, height=rect.height,
+                             heights=dict(zip(heights.tolist(), counts.tolist())),
+                             anchors={anchor_rect: repository.get_text(anchor_rect.place(0, 0, page_num))
+                                      for anchor_rect in anchor_rects})
+
+    def match(self, signature: PageSignature) -> list[tuple[str, int, int]]:
+        """
+        Сравнивает сигнатуру с признаками всех конфигураций
+        :param signature: Сигнатура первой страницы документа
+        :return: Список троек (имя конфигурации, выполнено признаков, всего признаков) по убыванию совпадения
+        """
+        scores = [(structure.name, self.score(structure.fingerprint, signature), structure.fingerprint.num_checks)
+                  for structure in self.candidates]
+        scores.sort(key=lambda score: (score[1] == score[2], score[1], score[1] / score[2]), reverse=True)
+        return scores
+
+    def select(self, signature: PageSignature, filename: str = "") -> PDFStructure:
+        """
+        Выбирает конфигурацию по сигнатуре
+        :param signature: Сигнатура первой страницы документа
+        :param filename: Имя файла для сообщений об ошибке
+        :return: Конфигурация PDFStructure
+        """
+        scores = self.match(signature)
+        matched = [score for score in scores if score[1] == score[2]]
+        if not matched:
+            if self.default is not None:
+                print(f"Файл '{filename}' не подошёл ни к одной конфигурации ({_describe(scores)}), "
+                      f"используется '{self.default.name}'")
+                return self.default
+            raise TemplateMismatchError(f"Файл '{filename}' не подходит ни к одной конфигурации: {_describe(scores)}.")
+
+        best = [score for score in matched if score[1] == matched[0][1]]
+        if len(best) > 1:
+            raise TemplateMismatchError(f"Файл '{filename}' одинаково подходит к нескольким конфигурациям: "
+                                        f"{_describe(best)}.")
+        return next(structure for structure in self.candidates if structure.name == best[0][0])
+
+    @staticmethod
+    def score(fingerprint: Fingerprint, signature: PageSignature) -> int:
+        """
+        Количество выполненных признаков конфигурации
+        """
+        passed = 0
+        if fingerprint.page_size is not None:
+            width, height = fingerprint.page_size
+            tolerance = fingerprint.page_size_tolerance
+            passed += abs(signature.width - width) <= tolerance and abs(signature.height - height) <= tolerance
+        for criterion in fingerprint.drawing_heights:
+            passed += signature.count_heights(criterion.value[0], criterion.tolerance) > 0
+        for anchor in fingerprint.anchors:
+            text = signature.anchors.get(anchor.rect, "")
+            passed += (anchor.text in text) if anchor.text else re.search(anchor.pattern, text) is not None
+        return passed
+
+
+def _describe(scores: list[tuple[str, int, int]]) -> str:
+    return ", ".join(f"{name} {passed}/{total}" for name, passed, total in scores) or "нет кандидатов"
@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Callable
+
+from fastapi import UploadFile
+
+from app.exceptions import PayloadTooLargeError
+from app.models.file_model import FileModel
+
+
+async def spool_upload(upload: UploadFile, max_size: int, chunk_size: int, spool_dir: str = None) -> FileModel:
+    """
+    Сохраняет загруженный файл во временный файл на диске по частям, одновременно считая SHA-256.
+    В памяти одновременно находится не больше одной части, а размер проверяется до любого разбора PDF.
+    Чтение, хеширование и запись выполняются в потоке, цикл событий только ожидает результат.
+
+    :param upload: Загруженный файл FastAPI.
+    :param max_size: Максимальный размер файла в байтах.
+    :param chunk_size: Размер части, читаемой за раз.
+    :param spool_dir: Каталог для временных файлов (None - системный по умолчанию).
+    :return: FileModel, ссылающийся на временный файл, с уже посчитанными хеш-суммой и размером.
+    """
+    return await asyncio.to_thread(spool_read, upload.file.read, upload.filename, max_size, chunk_size, spool_dir)
+
+
+def spool_stream(stream: BinaryIO, filename: str, max_size: int, chunk_size: int, spool_dir: str = None) -> FileModel:
+    """
+    Синхронный вариант spool_upload для файлового объекта (например, файла внутри архива).
+
+    :param stream: Файловый объект, открытый на чтение в двоичном режиме.
+    :param filename: Имя файла.
+    :param max_size: Максимальный размер файла в байтах.
+    :param chunk_size: Размер части, читаемой за раз.
+    :param spool_dir: Каталог для временных файлов (None - системный по умолчанию).
+    :return: FileModel, ссылающийся на временный файл, с уже посчитанными хеш-суммой и размером.
+    """
+    return spool_read(stream.read, filename, max_size, chunk_size, spool_dir)
+
+
+def spool_read(read: Callable[[int], bytes], filename: str, max_size: int, chunk_size: int,
+               spool_dir: str = None) -> FileModel:
+    """
+    Общая часть spool_upload и spool_stream: содержимое по частям сохраняется во временный файл на диске,
+    хеш-сумма SHA-256 считается по ходу. При ошибке (в том числе превышении размера) временный файл удаляется.
+
+    :param read: Функция чтения, возвращающая не больше указанного количества байт (b"" - конец файла).
+    :param filename: Имя файла.
+    :param max_size: Максимальный размер файла в байтах.
+    :param chunk_size: Размер части, читаемой за раз.
+    :param spool_dir: Каталог для временных файлов (None - системный по умолчанию).
+    :return: FileModel, ссылающийся на временный файл, с уже посчитанными хеш-суммой и размером.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename or "")[1], dir=spool_dir)
+    try:
+        with os.fdopen(fd, 'wb') as spool:
+            while chunk := read(chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise PayloadTooLargeError(f"Файл '{filename}' больше допустимых {max_size} байт.")
+                sha256.update(chunk)
+                spool.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    return FileModel(filename=filename, path=path, sha256=sha256.hexdigest(), size=size, temporary=True)
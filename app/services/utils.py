@@ -1,4 +1,7 @@
+import re
 from datetime import datetime
+from functools import lru_cache
+from typing import Iterable
 
 from app.models.pdf_models import LiftCompanyReport, LiftReport
 
@@ -7,49 +10,86 @@ def convert_to_models(extracted_data) -> list[LiftCompanyReport]:
     """
     Преобразует извлеченные данные в модели LiftCompanyReport и LiftReport с валидацией.
     """
-    lift_company_reports = []
+    return [convert_block_to_model(block) for block in extracted_data['stoppages_data']]
 
-    for block in extracted_data['stoppages_data']:
-        company_name = block['block']['company_name']
-        company_report = LiftCompanyReport(company_name)
 
-        for row in block['rows']:
-            start_time = convert_to_rfc3339(row.get('start_time', ''))
-            end_time = convert_to_rfc3339(row.get('end_time', '')) if row.get('end_time') else ''
-            downtime_hours = row.get('downtime_hours', '')
-            factory_number = row.get('factory_number', '')
-            reg_number = row.get('serial_number', '')
+def convert_block_to_model(block: dict) -> LiftCompanyReport:
+    """
+    Преобразует один блок таблицы простоев (компания и её строки) в модель LiftCompanyReport с валидацией.
+    Используется и при потоковой обработке, где блоки приходят по одному.
+    """
+    company_name = block['block']['company_name']
+    company_report = LiftCompanyReport(company_name)
+
+    rows = block['rows']
+    start_times = convert_many_to_rfc3339([row.get('start_time', '') for row in rows])
+    end_times = convert_many_to_rfc3339([row.get('end_time') or '' for row in rows], keep_empty=True)
+
+    for row, start_time, end_time in zip(rows, start_times, end_times):
+        downtime_hours = row.get('downtime_hours', '')
+        factory_number = row.get('factory_number', '')
+        reg_number = row.get('serial_number', '')
+
+        # Валидация обязательных полей
+        if not all([start_time, downtime_hours, factory_number, reg_number]):
+            raise ValueError(f"Обязательные поля отсутствуют или пусты: {row}")
 
-            # Валидация обязательных полей
-            if not all([start_time, downtime_hours, factory_number, reg_number]):
-                raise ValueError(f"Обязательные поля отсутствуют или пусты: {row}")
+        lift_report = LiftReport(
+            start_time=start_time,
+            end_time=end_time,
+            downtime_hours=int(downtime_hours),
+            factory_number=factory_number,
+            reg_number=reg_number
+        )
+        company_report.reports.append(lift_report)
 
-            lift_report = LiftReport(
-                start_time=start_time,
-                end_time=end_time,
-                downtime_hours=int(downtime_hours),
-                factory_number=factory_number,
-                reg_number=reg_number
-            )
-            company_report.reports.append(lift_report)
+    return company_report
 
-        lift_company_reports.append(company_report)
 
-    return lift_company_reports
+# Форматы 'дд.мм.гггг чч:мм:сс' и 'дд.мм.гггг чч:мм' одним шаблоном. Поля разбираются так же, как в
+# datetime.strptime с "%d.%m.%Y %H:%M:%S" и "%d.%m.%Y %H:%M": те же допустимые значения, однозначные поля,
+# любые пробельные символы между датой и временем
+_DATETIME_PATTERN = re.compile(
+    r"(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])\.(1[0-2]|0[1-9]|[1-9])\.(\d\d\d\d)"
+    r"\s+(2[0-3]|[0-1]\d|\d):([0-5]\d|\d)(?::(6[0-1]|[0-5]\d|\d))?"
+)
+# Сколько разных строк помнить: в отчёте одни и те же даты начала простоя повторяются у многих лифтов
+DATETIME_CACHE_SIZE = 4096
 
 
+@lru_cache(maxsize=DATETIME_CACHE_SIZE)
 def convert_to_rfc3339(datetime_str: str) -> str:
     """
     Преобразует строку с датой и временем в формат RFC 3339.
     Ожидаемый формат строки может быть 'дд.мм.гггг чч:мм:сс' или 'дд.мм.гггг чч:мм'.
+    Результаты запоминаются (ошибки не запоминаются), кэш ограничен DATETIME_CACHE_SIZE строками.
     """
-    formats = ["%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M"]  # Список поддерживаемых форматов
-    for fmt in formats:
+    match = _DATETIME_PATTERN.fullmatch(datetime_str)
+    if match is not None:
+        day, month, year, hour, minute, second = match.groups()
         try:
-            dt = datetime.strptime(datetime_str, fmt)
+            # datetime проверяет остальное: день месяца, високосный год
+            dt = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0))
             return dt.isoformat() + "+03:00"  # Возвращает дату в формате ISO 8601 с московским часовым поясом
         except ValueError:
-            continue  # Продолжает попытки с другими форматами
+            pass
 
     # Если ни один формат не подошел, бросаем исключение
     raise ValueError(f"Невозможно преобразовать дату: неподдерживаемый формат '{datetime_str}'.")
+
+
+def convert_many_to_rfc3339(datetime_strs: Iterable[str], keep_empty: bool = False) -> list[str]:
+    """
+    Преобразует столбец дат одним вызовом (см. convert_to_rfc3339), повторяющиеся значения разбираются один раз
+    :param datetime_strs: Строки с датой и временем
+    :param keep_empty: Оставлять пустые строки пустыми (иначе пустая строка - ошибка, как в convert_to_rfc3339)
+    :return: Даты в формате RFC 3339 в том же порядке
+    """
+    converted = {"": ""} if keep_empty else {}
+    result = []
+    for datetime_str in datetime_strs:
+        value = converted.get(datetime_str)
+        if value is None:
+            value = converted[datetime_str] = convert_to_rfc3339(datetime_str)
+        result.append(value)
+    return result
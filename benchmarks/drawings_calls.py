@@ -0,0 +1,101 @@
+# Микро-бенчмарк: сколько раз рисунки страниц извлекаются из MuPDF (page.get_cdrawings()) на один документ
+# Сравнивает прежнюю схему (отдельный проход по рисункам для блоков и для строк, без кэша)
+# с единым проходом TableHandler.find_pointers и кэшем рисунков в репозитории
+#
+# Запуск из корня проекта:
+#   python -m benchmarks.drawings_calls path/to/report.pdf
+
+import argparse
+import time
+
+import pymupdf as fitz
+
+from app.models.file_model import FileModel
+from app.processors.pdf.handlers import TableHandler
+from app.repositories.pdf_repository import PDFRepository
+from app.services.config_registry import ConfigRegistry
+
+CONFIG_DIR = "core/configs/pdf_structures"
+CONFIG_NAME = "lift_report_v1"
+
+
+class DrawingsCallCounter:
+    """
+    Считает вызовы fitz.Page.get_cdrawings (через него работает и get_drawings), пока активен контекст
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self._original = None
+
+    def __enter__(self):
+        self._original = fitz.Page.get_cdrawings
+        original = self._original
+
+        def counted(page, *args, **kwargs):
+            self.calls += 1
+            return original(page, *args, **kwargs)
+
+        fitz.Page.get_cdrawings = counted
+        return self
+
+    def __exit__(self, *exc):
+        fitz.Page.get_cdrawings = self._original
+
+
+def get_table_config(config):
+    return next(obj for obj in config.objects if obj.type == 'table')
+
+
+def run_separate_scans(content: bytes, table_config) -> (int, float):
+    """
+    Прежняя схема: find_block_pointers и find_rows сканируют все страницы независимо
+    Кэш рисунков сбрасывается между проходами, как это было до появления кэша
+    """
+    repository = PDFRepository()
+    repository.load_pdf(FileModel("benchmark.pdf", content))
+    handler = TableHandler(repository)
+    with DrawingsCallCounter() as counter:
+        start = time.perf_counter()
+        handler.find_block_pointers(table_config.blocks_pointer)
+        repository.page_drawings.clear()
+        handler.find_rows(table_config.row_pointer)
+        elapsed = time.perf_counter() - start
+    return counter.calls, elapsed
+
+
+def run_single_pass(content: bytes, table_config) -> (int, float):
+    """
+    Новая схема: все указатели классифицируются за один проход, рисунки страниц кэшируются
+    """
+    repository = PDFRepository()
+    repository.load_pdf(FileModel("benchmark.pdf", content))
+    handler = TableHandler(repository)
+    with DrawingsCallCounter() as counter:
+        start = time.perf_counter()
+        handler.find_pointers(table_config.pointers)
+        elapsed = time.perf_counter() - start
+    return counter.calls, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Количество извлечений рисунков страниц на документ")
+    parser.add_argument("pdf_path", help="Путь к PDF-отчёту")
+    parser.add_argument("--config", default=CONFIG_NAME, help="Имя конфигурации структуры PDF")
+    args = parser.parse_args()
+
+    with open(args.pdf_path, "rb") as f:
+        content = f.read()
+    table_config = get_table_config(ConfigRegistry(CONFIG_DIR).get(args.config))
+    num_pages = fitz.open(stream=content, filetype="pdf").page_count
+
+    before_calls, before_time = run_separate_scans(content, table_config)
+    after_calls, after_time = run_single_pass(content, table_config)
+
+    print(f"Страниц: {num_pages}")
+    print(f"До:    рисунки извлечены {before_calls} раз, {before_time:.3f} с")
+    print(f"После: рисунки извлечены {after_calls} раз, {after_time:.3f} с")
+
+
+if __name__ == "__main__":
+    main()
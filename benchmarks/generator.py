@@ -0,0 +1,127 @@
+# Генератор синтетических отчётов о простое лифтов
+# Раскладка берётся из скомпилированной конфигурации lift_report_v1: полосы блоков и линии строк рисуются
+# с высотами из критериев указателей, текст ставится внутрь областей, которые обработчики будут из них вычислять.
+# Поэтому сгенерированный документ разбирается конвейером так же, как настоящий отчёт.
+#
+# Запуск из корня проекта:
+#   python -m benchmarks.generator report.pdf --pages 40 --companies 2 --rows 10
+
+import argparse
+import random
+
+import pymupdf as fitz
+
+from app.models.pdf_structure import PDFStructure, PointerConfig
+from app.services.config_registry import ConfigRegistry
+
+CONFIG_DIR = "core/configs/pdf_structures"
+CONFIG_NAME = "lift_report_v1"
+
+PAGE_WIDTH = 842  # A4, альбомная ориентация
+PAGE_HEIGHT = 595
+TOP_MARGIN = 70  # Ниже области времени отчёта
+LEFT_MARGIN = 15
+BLOCK_GAP = 20  # Отступ над полосой блока
+FONT_SIZE = 7
+
+
+def generate_lift_report(pages: int = 1, companies_per_page: int = 2, rows_per_page: int = 10,
+                         carry_over_rows: int = 2, seed: int = 0, config: PDFStructure = None) -> bytes:
+    """
+    Строит PDF-отчёт о простое лифтов
+    :param pages: Количество страниц
+    :param companies_per_page: Количество компаний (блоков) на странице
+    :param rows_per_page: Количество строк блоков на странице, делится между компаниями страницы
+    :param carry_over_rows: Сколько строк предыдущей компании перенести в начало каждой следующей страницы
+    :param seed: Начальное значение генератора случайных чисел, одинаковый seed даёт одинаковый документ
+    :param config: Скомпилированная конфигурация (по умолчанию lift_report_v1)
+    :return: Содержимое PDF-файла
+    """
+    if companies_per_page < 1:
+        raise ValueError("companies_per_page must be at least 1")
+    config = config or ConfigRegistry(CONFIG_DIR).get(CONFIG_NAME)
+    report_time = next(obj for obj in config.objects if obj.type == 'text')
+    table = next(obj for obj in config.objects if obj.type == 'table')
+    blocks_pointer = table.blocks_pointer
+    row_pointer = table.row_pointer
+    block_height = _criterion(blocks_pointer, 'height')
+    row_height = _criterion(row_pointer, 'height')
+    row_step = row_pointer.rect.height
+
+    rnd = random.Random(seed)
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        if page_num == 0:
+            rect = report_time.rect.place(0, 0, 0)
+            page.insert_text((rect.x0 + 5, rect.y1 - 5), "01.09.2024 10:00", fontsize=9)
+
+        y = TOP_MARGIN
+        if page_num > 0:
+            # Строки, продолжающие блок предыдущей страницы
+            for row_num in range(carry_over_rows):
+                y += row_step
+                _draw_row(page, rnd, row_pointer, row_height, y, f"{page_num}-c{row_num}")
+
+        for company_num in range(companies_per_page):
+            y += BLOCK_GAP
+            name = f"Lift Service {page_num}-{company_num}"
+            _draw_block(page, blocks_pointer, block_height, y, name)
+            y += block_height
+            rows = rows_per_page // companies_per_page + (company_num < rows_per_page % companies_per_page)
+            for row_num in range(rows):
+                y += row_step
+                _draw_row(page, rnd, row_pointer, row_height, y, f"{page_num}-{company_num}-{row_num}")
+
+        if y > PAGE_HEIGHT:
+            raise ValueError(f"Layout does not fit the page: {y:.0f} > {PAGE_HEIGHT}, reduce rows or companies")
+
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def _criterion(pointer: PointerConfig, name: str) -> float:
+    return next(criterion.value[0] for criterion in pointer.criteria if criterion.name == name)
+
+
+def _draw_block(page, pointer: PointerConfig, height: float, y: float, name: str):
+    # Полоса блока, над ней по конфигурации находится название компании
+    page.draw_rect(fitz.Rect(LEFT_MARGIN - 5, y, LEFT_MARGIN - 5 + pointer.rect.width, y + height),
+                   color=(0, 0, 0), fill=(0, 0, 0))
+    rect = pointer.rect.place(LEFT_MARGIN - 5, y, page.number)
+    page.insert_text((rect.x0 + 5, rect.y1 - 5), name, fontsize=9)
+
+
+def _draw_row(page, rnd: random.Random, pointer: PointerConfig, height: float, y: float, suffix: str):
+    # Линия под строкой, над ней по конфигурации находятся ячейки строки
+    page.draw_rect(fitz.Rect(LEFT_MARGIN, y, LEFT_MARGIN + pointer.rect.width, y + height),
+                   color=(0, 0, 0), fill=(0, 0, 0), width=0)
+    rect = pointer.rect.place(LEFT_MARGIN, y, page.number)
+    day = rnd.randint(1, 28)
+    start_time = f"{day:02d}.09.2024 {rnd.randint(0, 11):02d}:{rnd.randint(0, 59):02d}"
+    # Примерно у трети строк простой ещё не закончен, время окончания пустое
+    end_time = f"{day:02d}.09.2024 {rnd.randint(12, 23):02d}:{rnd.randint(0, 59):02d}" if rnd.random() > 0.3 else ""
+    values = (start_time, end_time, str(rnd.randint(1, 99)), f"F{suffix}", f"R{suffix}")
+    for (x0, _), value in zip(pointer.columns.bounds, values):
+        if value:
+            page.insert_text((rect.x0 + x0 + 2, rect.y1 - 12), value, fontsize=FONT_SIZE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор синтетических отчётов о простое лифтов")
+    parser.add_argument("output", help="Путь для сохранения PDF")
+    parser.add_argument("--pages", type=int, default=1, help="Количество страниц")
+    parser.add_argument("--companies", type=int, default=2, help="Количество компаний на странице")
+    parser.add_argument("--rows", type=int, default=10, help="Количество строк на странице")
+    parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора случайных чисел")
+    args = parser.parse_args()
+
+    content = generate_lift_report(args.pages, args.companies, args.rows, seed=args.seed)
+    with open(args.output, "wb") as f:
+        f.write(content)
+    print(f"Отчёт сохранён: {args.output} ({args.pages} стр., {len(content)} байт)")
+
+
+if __name__ == "__main__":
+    main()
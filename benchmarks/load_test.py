@@ -0,0 +1,485 @@
+# Нагрузочное тестирование сервиса целиком: сервер, заглушка микросервиса отчётов и генератор нагрузки на одной машине
+# 1. Запускается заглушка микросервиса отчётов (см. benchmarks/report_stub.py) с заданной задержкой, долей ошибок и 409.
+# 2. Запускается сервер (gunicorn или uvicorn) в отдельном процессе с копией конфигураций структуры PDF,
+#    в которых адрес микросервиса отчётов заменён адресом заглушки. Сервер и генератор нагрузки работают в разных
+#    процессах, поэтому генератор не конкурирует с сервером за GIL.
+# 3. На POST /lift/upload_pdf подаются документы корпуса (свои PDF или синтетические отчёты) с заданным числом
+#    одновременных запросов или с заданной частотой (RPS).
+# 4. Печатаются пропускная способность, перцентили задержки, разбивка ошибок и CPU/RSS каждого процесса сервера
+#    (по /proc, только Linux). Результаты сохраняются в JSON, с предыдущим JSON их можно сравнить через --baseline.
+#
+# Запуск из корня проекта:
+#   python -m benchmarks.load_test --workers 2 --concurrency 8 --duration 30 --pages 1 10 40 --output load.json
+#   python -m benchmarks.load_test --rps 5 --stub-latency 0.05 --stub-conflict-rate 0.02 --server-env OUTBOX=none
+#   python -m benchmarks.load_test --url http://127.0.0.1:8000 --corpus reports/ --no-stub
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import numpy as np
+import yaml
+
+from benchmarks.generator import generate_lift_report
+
+CONFIG_DIR = "core/configs/pdf_structures"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class ProcessSampler:
+    """
+    Периодически снимает CPU и RSS процесса сервера и всех его потомков (воркеры gunicorn, пулы процессов) из /proc
+    """
+
+    def __init__(self, root_pid: int, interval: float = 0.5):
+        """
+        :param root_pid: PID процесса сервера
+        :param interval: Интервал между замерами (секунды)
+        """
+        self.root_pid = root_pid
+        self.interval = interval
+        # PID -> {"role", "name", "first_cpu", "last_cpu", "peak_rss", "last_rss"}
+        self.processes: dict[int, dict] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = self._stopped_at = 0.0
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="process-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> list[dict]:
+        """
+        Останавливает замеры
+        :return: По процессу: роль, имя, процессорное время за прогон, средняя загрузка CPU, пиковый и последний RSS
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
+        self._stopped_at = time.perf_counter()
+        wall = self._stopped_at - self._started_at
+        result = []
+        for pid, process in sorted(self.processes.items()):
+            cpu_seconds = process["last_cpu"] - process["first_cpu"]
+            result.append({"pid": pid, "role": process["role"], "name": process["name"],
+                           "cpu_seconds": round(cpu_seconds, 3),
+                           "cpu_percent": round(100 * cpu_seconds / wall, 1) if wall else None,
+                           "peak_rss_bytes": process["peak_rss"], "last_rss_bytes": process["last_rss"]})
+        return result
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        for pid, depth in self._descendants():
+            stat = _read_stat(pid)
+            if stat is None:
+                continue
+            name, cpu_seconds, rss = stat
+            process = self.processes.get(pid)
+            if process is None:
+                process = self.processes[pid] = {"role": _role(depth), "name": name, "first_cpu": cpu_seconds,
+                                                 "last_cpu": cpu_seconds, "peak_rss": rss, "last_rss": rss}
+            process["last_cpu"] = cpu_seconds
+            process["last_rss"] = rss
+            process["peak_rss"] = max(process["peak_rss"], rss)
+
+    def _descendants(self) -> list[tuple[int, int]]:
+        # Дерево процессов строится по PPid из /proc/<pid>/stat
+        children: dict[int, list[int]] = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        found = []
+        stack = [(self.root_pid, 0)]
+        while stack:
+            pid, depth = stack.pop()
+            found.append((pid, depth))
+            stack.extend((child, depth + 1) for child in children.get(pid, ()))
+        return found
+
+
+def _read_stat(pid: int) -> tuple[str, float, int] | None:
+    """
+    Имя процесса, процессорное время (user + system, секунды) и RSS в байтах
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            head, tail = f.read().rsplit(")", 1)
+        fields = tail.split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    # Поля после имени процесса начинаются с третьего поля stat: utime и stime - 14-е и 15-е
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return head.split("(", 1)[1], cpu_seconds, rss_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _role(depth: int) -> str:
+    return ("server", "worker", "pool")[min(depth, 2)]
+
+
+def load_corpus(paths: list[str], pages: list[int], seed: int = 0) -> list[tuple[str, bytes]]:
+    """
+    Собирает корпус документов: PDF-файлы и каталоги с ними или, если путей нет, синтетические отчёты
+    :param paths: Файлы и каталоги с PDF
+    :param pages: Размеры синтетических отчётов в страницах (если paths пуст)
+    :param seed: Начальное значение генератора синтетических отчётов
+    :return: Список пар (имя файла, содержимое)
+    """
+    corpus = []
+    for path in map(Path, paths):
+        files = sorted(path.glob("*.pdf")) if path.is_dir() else [path]
+        corpus.extend((file.name, file.read_bytes()) for file in files)
+    if not paths:
+        corpus = [(f"synthetic_{size}.pdf", generate_lift_report(size, seed=seed + i)) for i, size in enumerate(pages)]
+    if not corpus:
+        raise ValueError("Corpus is empty")
+    return corpus
+
+
+def prepare_configs(source_dir: str, target_dir: str, stub_url: str) -> str:
+    """
+    Копирует конфигурации структуры PDF, направляя отчёты на заглушку микросервиса отчётов
+    :return: Каталог с копиями конфигураций
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    for path in sorted(Path(source_dir).glob("*.yml")):
+        raw_config = yaml.safe_load(path.read_text(encoding="utf-8"))
+        if raw_config.get("processed_data_service"):
+            raw_config["processed_data_service"]["base_url"] = stub_url
+        with open(os.path.join(target_dir, path.name), "w", encoding="utf-8") as f:
+            yaml.safe_dump(raw_config, f, allow_unicode=True, sort_keys=False)
+    return target_dir
+
+
+def start_process(args: list[str], env: dict, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "wb")
+    return subprocess.Popen([sys.executable, *args], env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    """
+    Ожидает, пока процесс начнёт отвечать на GET url
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process {process.args} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"{url} is not ready after {timeout} s")
+
+
+def stop_process(process: subprocess.Popen | None):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def drive(url: str, corpus: list[tuple[str, bytes]], concurrency: int, rps: float, duration: float,
+                requests: int, unique: bool, timeout: float, counter: itertools.count) -> list[tuple[float, str]]:
+    """
+    Подаёт нагрузку на сервер
+    Без rps - замкнутый цикл: concurrency клиентов, каждый отправляет следующий запрос сразу после ответа.
+    С rps - запросы запускаются по расписанию, не больше concurrency одновременно. Задержка считается от времени
+    по расписанию, а не от фактической отправки: иначе перегруженный сервер выглядел бы быстрее, чем есть.
+    :param url: Адрес загрузки, например http://127.0.0.1:8000/lift/upload_pdf
+    :param corpus: Документы (имя файла, содержимое), подаются по кругу
+    :param concurrency: Количество одновременных запросов
+    :param rps: Запросов в секунду (0 - замкнутый цикл)
+    :param duration: Длительность (секунды, 0 - не ограничена)
+    :param requests: Количество запросов (0 - не ограничено)
+    :param unique: Дописывать в конец каждого документа уникальный комментарий PDF, чтобы хеш-сумма файла
+    не повторялась (иначе повторы берутся из кэша результатов или получают 409)
+    :param timeout: Таймаут запроса (секунды)
+    :param counter: Сквозной счётчик запросов (уникальность документов между прогревом и замером)
+    :return: Список пар (задержка в секундах, результат: код ответа или имя исключения)
+    """
+    results = []
+    deadline = time.perf_counter() + duration if duration else float("inf")
+    issued = itertools.count()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    def next_document() -> tuple[str, bytes] | None:
+        i = next(issued)
+        if (requests and i >= requests) or time.perf_counter() >= deadline:
+            return None
+        filename, content = corpus[i % len(corpus)]
+        if unique:
+            content += f"\n%load-test {next(counter)}\n".encode()
+        return filename, content
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def send(document: tuple[str, bytes], scheduled: float):
+            try:
+                response = await client.post(url, files={"file": (*document, "application/pdf")})
+                outcome = str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            results.append((time.perf_counter() - scheduled, outcome))
+
+        if not rps:
+            async def client_loop():
+                while (document := next_document()) is not None:
+                    await send(document, time.perf_counter())
+
+            await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+            return results
+
+        async def scheduled_send(document: tuple[str, bytes], scheduled: float):
+            async with semaphore:
+                await send(document, scheduled)
+
+        tasks = []
+        start = time.perf_counter()
+        for i in itertools.count():
+            scheduled = start + i / rps
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            document = next_document()
+            if document is None:
+                break
+            tasks.append(asyncio.create_task(scheduled_send(document, scheduled)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def summarize(results: list[tuple[float, str]], elapsed: float, ok_status: str) -> dict:
+    """
+    Пропускная способность, перцентили задержки и разбивка результатов
+    """
+    ok_latencies = np.array([latency for latency, outcome in results if outcome == ok_status])
+    all_latencies = np.array([latency for latency, _ in results])
+
+    def percentiles(latencies: np.ndarray) -> dict:
+        if not len(latencies):
+            return {}
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+        return {"p50": round(p50, 4), "p95": round(p95, 4), "p99": round(p99, 4),
+                "max": round(float(latencies.max()), 4), "mean": round(float(latencies.mean()), 4)}
+
+    return {
+        "requests": len(results),
+        "ok": len(ok_latencies),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 3) if elapsed else None,
+        "ok_rps": round(len(ok_latencies) / elapsed, 3) if elapsed else None,
+        "latency_ok": percentiles(ok_latencies),
+        "latency_all": percentiles(all_latencies),
+        "outcomes": dict(Counter(outcome for _, outcome in results).most_common()),
+    }
+
+
+def compare(results: dict, baseline: dict):
+    """
+    Печатает отношение основных показателей к базовому прогону
+    """
+    print(f"\nСравнение с базовым прогоном от {baseline['meta']['timestamp']}:")
+    pairs = [("ok_rps", results["summary"]["ok_rps"], baseline["summary"]["ok_rps"])]
+    for name in ("p50", "p95", "p99"):
+        pairs.append((f"latency {name}", results["summary"]["latency_ok"].get(name),
+                      baseline["summary"]["latency_ok"].get(name)))
+    pairs.append(("peak RSS (сумма)", _total_peak_rss(results), _total_peak_rss(baseline)))
+    for name, value, base in pairs:
+        if value is not None and base:
+            print(f"  {name:<18} {base} -> {value} (x{value / base:.2f})")
+
+
+def _total_peak_rss(results: dict) -> int | None:
+    processes = results.get("processes")
+    return sum(process["peak_rss_bytes"] for process in processes) if processes else None
+
+
+def print_report(results: dict):
+    summary = results["summary"]
+    print(f"\nЗапросов: {summary['requests']}, успешных: {summary['ok']} за {summary['elapsed_seconds']} с")
+    print(f"Пропускная способность: {summary['throughput_rps']} запр./с, успешных {summary['ok_rps']} запр./с")
+    for kind in ("latency_ok", "latency_all"):
+        latency = summary[kind]
+        if latency:
+            print(f"Задержка ({'успешные' if kind == 'latency_ok' else 'все'}): p50 {latency['p50']} с, "
+                  f"p95 {latency['p95']} с, p99 {latency['p99']} с, max {latency['max']} с")
+    print("Результаты: " + ", ".join(f"{outcome}: {count}" for outcome, count in summary["outcomes"].items()))
+    if results.get("stub"):
+        print("Заглушка микросервиса отчётов: " + ", ".join(f"{k}: {v}" for k, v in results["stub"].items()))
+    if results.get("processes"):
+        print("Процессы сервера:")
+        for process in results["processes"]:
+            print(f"  {process['pid']:>7} {process['role']:<7} {process['name']:<16} CPU {process['cpu_seconds']:>8} с "
+                  f"({process['cpu_percent']}%)  RSS пик {process['peak_rss_bytes'] / 2 ** 20:.1f} МБ, "
+                  f"в конце {process['last_rss_bytes'] / 2 ** 20:.1f} МБ")
+
+
+def parse_env(items: list[str]) -> dict:
+    env = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Expected KEY=VALUE, got '{item}'")
+        env[key] = value
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочное тестирование сервиса с заглушкой микросервиса отчётов")
+    server = parser.add_argument_group("Сервер")
+    server.add_argument("--url", help="Адрес уже запущенного сервера (сервер не запускается, CPU/RSS не замеряются)")
+    server.add_argument("--server", choices=("gunicorn", "uvicorn"), default="gunicorn")
+    server.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Воркеры gunicorn")
+    server.add_argument("--port", type=int, default=8099)
+    server.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Переменная окружения сервера (core/config.py), можно повторять")
+    server.add_argument("--endpoint", default="/lift/upload_pdf")
+    server.add_argument("--ok-status", default="202", help="Код успешного ответа")
+    stub = parser.add_argument_group("Заглушка микросервиса отчётов")
+    stub.add_argument("--no-stub", action="store_true", help="Не запускать заглушку")
+    stub.add_argument("--stub-port", type=int, default=3099)
+    stub.add_argument("--stub-latency", type=float, default=0.0, help="Задержка ответа, секунды")
+    stub.add_argument("--stub-jitter", type=float, default=0.0, help="Случайная добавка к задержке, секунды")
+    stub.add_argument("--stub-error-rate", type=float, default=0.0, help="Доля ответов с ошибкой")
+    stub.add_argument("--stub-conflict-rate", type=float, default=0.0, help="Доля ответов 409")
+    stub.add_argument("--stub-error-status", type=int, default=503)
+    load = parser.add_argument_group("Нагрузка")
+    load.add_argument("--corpus", nargs="*", default=[], help="PDF-файлы и каталоги с ними")
+    load.add_argument("--pages", type=int, nargs="+", default=[10],
+                      help="Размеры синтетических отчётов в страницах (если --corpus не задан)")
+    load.add_argument("--concurrency", type=int, default=8, help="Одновременных запросов")
+    load.add_argument("--rps", type=float, default=0.0, help="Запросов в секунду (0 - замкнутый цикл)")
+    load.add_argument("--duration", type=float, default=30.0, help="Длительность замера, секунды (0 - без ограничения)")
+    load.add_argument("--requests", type=int, default=0, help="Количество запросов (0 - без ограничения)")
+    load.add_argument("--warmup", type=int, default=0, help="Запросов прогрева до замера (по умолчанию - по одному "
+                                                           "на воркер и документ корпуса)")
+    load.add_argument("--unique", action=argparse.BooleanOptionalAction, default=True,
+                      help="Делать каждый документ уникальным (без кэша результатов и 409 на повторы)")
+    load.add_argument("--timeout", type=float, default=300.0, help="Таймаут запроса, секунды")
+    parser.add_argument("--output", default="load_test_results.json", help="Куда сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="JSON с результатами предыдущего прогона для сравнения")
+    args = parser.parse_args()
+    if not args.duration and not args.requests:
+        parser.error("--duration or --requests is required")
+
+    corpus = load_corpus(args.corpus, args.pages)
+    server_env = parse_env(args.server_env)
+    work_dir = tempfile.mkdtemp(prefix="load_test_")
+    stub_process = server_process = None
+    sampler = None
+    try:
+        stub_url = f"http://127.0.0.1:{args.stub_port}"
+        if not args.no_stub:
+            stub_process = start_process(
+                ["-m", "benchmarks.report_stub", "--port", str(args.stub_port), "--latency", str(args.stub_latency),
+                 "--jitter", str(args.stub_jitter), "--error-rate", str(args.stub_error_rate),
+                 "--conflict-rate", str(args.stub_conflict_rate), "--error-status", str(args.stub_error_status)],
+                {}, os.path.join(work_dir, "stub.log"))
+            wait_ready(f"{stub_url}/stats", stub_process)
+
+        base_url = args.url
+        if base_url is None:
+            base_url = f"http://127.0.0.1:{args.port}"
+            # Файлы сервера (outbox, кэш, задачи) создаются во временном каталоге, а не в рабочем
+            env = {
+                "HOST": "127.0.0.1", "PORT": str(args.port), "WORKERS": str(args.workers),
+                "OUTBOX_PATH": os.path.join(work_dir, "outbox.sqlite3"),
+                "RESULT_CACHE_PATH": os.path.join(work_dir, "result_cache.sqlite3"),
+                "JOB_STORE_PATH": os.path.join(work_dir, "jobs.sqlite3"),
+                "JOB_STORAGE_DIR": os.path.join(work_dir, "job_uploads"),
+            }
+            if not args.no_stub:
+                env["PDF_STRUCTURES_DIR"] = prepare_configs(os.getenv("PDF_STRUCTURES_DIR", CONFIG_DIR),
+                                                            os.path.join(work_dir, "pdf_structures"), stub_url)
+            env.update(server_env)
+            command = (["-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"] if args.server == "gunicorn" else
+                       ["-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+                        "--log-level", "warning"])
+            server_process = start_process(command, env, os.path.join(work_dir, "server.log"))
+            wait_ready(f"{base_url}/metrics", server_process)
+
+        url = base_url + args.endpoint
+        counter = itertools.count()
+        warmup = args.warmup or len(corpus) * (args.workers if args.url is None else 1)
+        print(f"Прогрев: {warmup} запросов")
+        asyncio.run(drive(url, corpus, args.concurrency, 0, 0, warmup, args.unique, args.timeout, counter))
+
+        if server_process is not None:
+            sampler = ProcessSampler(server_process.pid)
+            sampler.start()
+        mode = f"{args.rps} запр./с" if args.rps else "замкнутый цикл"
+        print(f"Замер: {len(corpus)} документов, {args.concurrency} одновременных запросов, {mode}")
+        start = time.perf_counter()
+        results = asyncio.run(drive(url, corpus, args.concurrency, args.rps, args.duration, args.requests,
+                                    args.unique, args.timeout, counter))
+        elapsed = time.perf_counter() - start
+        processes = sampler.stop() if sampler is not None else None
+
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "server": args.server if args.url is None else args.url,
+                "workers": args.workers if args.url is None else None,
+                "server_env": server_env,
+                "endpoint": args.endpoint,
+                "concurrency": args.concurrency,
+                "rps": args.rps,
+                "unique": args.unique,
+                "corpus": [{"filename": filename, "bytes": len(content)} for filename, content in corpus],
+                "stub": None if args.no_stub else {
+                    "latency": args.stub_latency, "jitter": args.stub_jitter, "error_rate": args.stub_error_rate,
+                    "conflict_rate": args.stub_conflict_rate, "error_status": args.stub_error_status},
+            },
+            "summary": summarize(results, elapsed, args.ok_status),
+            "stub": httpx.get(f"{stub_url}/stats").json() if stub_process is not None else None,
+            "processes": processes,
+        }
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        stop_process(server_process)
+        stop_process(stub_process)
+
+    print_report(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены: {args.output} (журналы сервера и заглушки: {work_dir})")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
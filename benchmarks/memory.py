@@ -0,0 +1,94 @@
+# Бенчмарк памяти и аллокаций для геометрии таблиц на документе с большим количеством строк
+# Замеряет (tracemalloc) поиск указателей, сортировку, группировку строк по блокам и обработку таблицы целиком,
+# а также сравнивает хранение прямоугольников строк в RectArray и в списке объектов Rect.
+# Аллокации MuPDF (разбор страниц, рисунки, текст) tracemalloc не видит, замеряются только объекты Python.
+#
+# Запуск из корня проекта:
+#   python -m benchmarks.memory --rows 10000 --output memory.json
+
+import argparse
+import contextlib
+import io
+import json
+import time
+import tracemalloc
+
+from app.models.file_model import FileModel
+from app.processors.pdf.handlers import TableHandler
+from app.repositories.pdf_repository import PDFRepository
+from app.services.config_registry import ConfigRegistry
+from app.services.pdf_service import LIFT_REPORT_CONFIG
+from benchmarks.generator import generate_lift_report
+
+CONFIG_DIR = "core/configs/pdf_structures"
+ROWS_PER_PAGE = 12
+
+
+def traced(func) -> (object, dict):
+    """
+    Выполняет func под tracemalloc
+    :return: Результат func и замеры: время, пик памяти, удерживаемая результатом память и количество блоков
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "seconds": round(elapsed, 6),  # Под tracemalloc, для сравнения между собой, а не с benchmarks.suite
+        "peak_bytes": peak,
+        "retained_bytes": current,
+        "retained_blocks": sum(stat.count for stat in snapshot.statistics("filename")),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память и аллокации геометрии таблиц")
+    parser.add_argument("--rows", type=int, default=10000, help="Количество строк в документе")
+    parser.add_argument("--output", help="Куда сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    config = ConfigRegistry(CONFIG_DIR).get(LIFT_REPORT_CONFIG)
+    table_config = next(obj for obj in config.objects if obj.type == 'table')
+    pages = -(-args.rows // ROWS_PER_PAGE)
+    print(f"Генерация документа: {pages} стр.")
+    file = FileModel("memory.pdf", generate_lift_report(pages, companies_per_page=2, rows_per_page=ROWS_PER_PAGE,
+                                                        carry_over_rows=0))
+
+    repository = PDFRepository()
+    repository.load_pdf(file)
+    handler = TableHandler(repository)
+    # Рисунки страниц извлекаются заранее, чтобы замерялась только геометрия указателей
+    for page_num in range(repository.get_num_pages()):
+        repository.get_page_drawings(page_num)
+
+    results = {"pages": pages}
+    pointers, results["find_pointers"] = traced(lambda: handler.find_pointers(table_config.pointers))
+    blocks, results["sort_blocks"] = traced(lambda: pointers['blocks_pointer'].sorted())
+    rows, results["sort_rows"] = traced(lambda: pointers['row_pointer'].sorted())
+    _, results["group_rows_by_blocks"] = traced(lambda: handler.group_rows_by_blocks(blocks, rows))
+    _, results["rows_as_rect_objects"] = traced(rows.to_rects)
+    results["rows"] = len(rows)
+    results["rows_rect_array_bytes"] = rows.data.nbytes
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, results["handle_table"] = traced(lambda: handler.handle(table_config))
+
+    print(f"Строк: {results['rows']}, блоков: {len(blocks)}")
+    print(f"Строки в RectArray: {results['rows_rect_array_bytes']} байт, "
+          f"списком Rect: {results['rows_as_rect_objects']['retained_bytes']} байт")
+    for name in ("find_pointers", "sort_blocks", "sort_rows", "group_rows_by_blocks", "handle_table"):
+        item = results[name]
+        print(f"  {name:<22} {item['seconds']:.4f} с  пик {item['peak_bytes']:>11} байт  "
+              f"удерживается {item['retained_bytes']:>10} байт в {item['retained_blocks']} блоках")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
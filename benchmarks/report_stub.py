@@ -0,0 +1,80 @@
+# Заглушка микросервиса отчётов (processed_data_service) для нагрузочного тестирования (см. benchmarks/load_test.py)
+# Принимает отчёты на любой путь POST, отвечает с заданной задержкой и с заданной долей ошибок и конфликтов (409),
+# счётчики принятых запросов отдаются на GET /stats.
+#
+# Запуск из корня проекта:
+#   python -m benchmarks.report_stub --port 3000 --latency 0.05 --error-rate 0.01 --conflict-rate 0.02
+
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_stub_app(latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, conflict_rate: float = 0.0,
+                    error_status: int = 503, seed: int = 0) -> FastAPI:
+    """
+    Создаёт приложение заглушки
+    :param latency: Задержка ответа (секунды)
+    :param jitter: Случайная добавка к задержке, от 0 до jitter (секунды)
+    :param error_rate: Доля запросов, на которые отвечается ошибкой error_status
+    :param conflict_rate: Доля запросов, на которые отвечается 409 (отчёт уже принят)
+    :param error_status: Код ответа для ошибок
+    :param seed: Начальное значение генератора случайных чисел
+    :return: Приложение FastAPI
+    """
+    app = FastAPI(title="Processed data service stub")
+    rnd = random.Random(seed)
+    stats = Counter()
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.post("/{path:path}")
+    async def receive(path: str, request: Request):
+        body = await request.body()
+        stats["requests"] += 1
+        stats["bytes"] += len(body)
+        if latency or jitter:
+            await asyncio.sleep(latency + rnd.uniform(0, jitter))
+
+        outcome = rnd.random()
+        if outcome < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"detail": "Injected error"}, status_code=error_status)
+        if outcome < error_rate + conflict_rate:
+            stats["conflicts"] += 1
+            return JSONResponse({"detail": "Report already exists"}, status_code=409)
+
+        # Пакетный приём получает JSON-массив отчётов
+        reports = len(json.loads(body)) if body.startswith(b"[") else 1
+        stats["reports"] += reports
+        return JSONResponse({"received": reports}, status_code=201)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушка микросервиса отчётов для нагрузочного тестирования")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа, секунды")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Случайная добавка к задержке, секунды")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой")
+    parser.add_argument("--conflict-rate", type=float, default=0.0, help="Доля ответов 409")
+    parser.add_argument("--error-status", type=int, default=503, help="Код ответа для ошибок")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_stub_app(args.latency, args.jitter, args.error_rate, args.conflict_rate, args.error_status, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# Набор бенчмарков конвейера извлечения на синтетических отчётах (см. benchmarks/generator.py)
+# Для каждого размера документа замеряются отдельные этапы и обработка целиком:
+#   load_pdf             - PDFRepository.load_pdf
+#   find_block_pointers  - TableHandler.find_block_pointers (кэш рисунков сброшен)
+#   find_rows            - TableHandler.find_rows (кэш рисунков сброшен)
+#   extract_data_from_rect - TableHandler.extract_data_from_rect по всем строкам, включая построение индекса текста
+#   convert_to_models    - utils.convert_to_models
+#   process_lift_pdf     - PDFService.process_lift_pdf без кэша результатов, отправка заменена заглушкой
+# Результаты сохраняются в JSON, с предыдущим JSON их можно сравнить через --baseline.
+#
+# Запуск из корня проекта:
+#   python -m benchmarks.suite --sizes 1 10 100 500 --output bench.json
+#   python -m benchmarks.suite --output new.json --baseline bench.json
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import pymupdf as fitz
+
+from app.models.file_model import FileModel
+from app.processors.pdf.handlers import TableHandler
+from app.repositories.pdf_repository import PDFRepository
+from app.services import utils
+from app.services.config_registry import ConfigRegistry
+from app.services.executor import ExtractionExecutor
+from app.services.pdf_extraction import extract_pdf
+from app.services.pdf_service import LIFT_REPORT_CONFIG, PDFService
+from benchmarks.generator import generate_lift_report
+
+CONFIG_DIR = "core/configs/pdf_structures"
+DEFAULT_SIZES = (1, 10, 50, 100, 500)
+
+
+class NullProcessedDataRepository:
+    """
+    Заглушка отправки обработанных данных: бенчмарк измеряет извлечение, преобразование и сериализацию в JSON
+    """
+
+    async def send_processed_data(self, data, endpoint):
+        data.to_json()
+        return {}
+
+
+def measure(func, repeat: int, setup=None) -> float:
+    """
+    Лучшее время выполнения func из repeat запусков
+    :param func: Замеряемая функция
+    :param repeat: Количество запусков
+    :param setup: Подготовка перед каждым запуском (не входит в замер)
+    :return: Время в секундах
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_size(registry: ConfigRegistry, pages: int, repeat: int) -> dict:
+    """
+    Замеряет все этапы на документе заданного размера
+    :return: Словарь с размерами документа, временем этапов и пиковой памятью
+    """
+    config = registry.get(LIFT_REPORT_CONFIG)
+    table_config = next(obj for obj in config.objects if obj.type == 'table')
+    file = FileModel(f"synthetic_{pages}.pdf", generate_lift_report(pages))
+
+    repository = PDFRepository()
+    handler = TableHandler(repository)
+
+    def reload():
+        repository.load_pdf(file)
+
+    stages = {"load_pdf": measure(reload, repeat)}
+    stages["find_block_pointers"] = measure(lambda: handler.find_block_pointers(table_config.blocks_pointer),
+                                            repeat, setup=reload)
+    stages["find_rows"] = measure(lambda: handler.find_rows(table_config.row_pointer), repeat, setup=reload)
+
+    rows = handler.find_rows(table_config.row_pointer)
+    columns = table_config.row_pointer.columns
+    stages["extract_data_from_rect"] = measure(
+        lambda: [handler.extract_data_from_rect(columns, row) for row in rows], repeat, setup=reload)
+
+    extracted_data = extract_pdf(repository, file, config)
+    stages["convert_to_models"] = measure(lambda: utils.convert_to_models(extracted_data), repeat)
+
+    executor = ExtractionExecutor("thread", max_workers=1)
+    service = PDFService(registry, PDFRepository(), executor, NullProcessedDataRepository())
+    stages["process_lift_pdf"] = measure(lambda: asyncio.run(service.process_lift_pdf(file)), repeat)
+
+    # Пиковая память Python-объектов за одну обработку целиком (аллокации MuPDF tracemalloc не видит)
+    tracemalloc.start()
+    asyncio.run(service.process_lift_pdf(file))
+    peak_python_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    executor.shutdown()
+
+    num_rows = len(rows)
+    return {
+        "pages": pages,
+        "rows": num_rows,
+        "file_bytes": len(file.content),
+        "stages": {
+            name: {
+                "seconds": round(seconds, 6),
+                "pages_per_s": round(pages / seconds, 2) if seconds else None,
+                "rows_per_s": round(num_rows / seconds, 2) if seconds else None,
+            }
+            for name, seconds in stages.items()
+        },
+        "peak_python_bytes": peak_python_bytes,
+        # Максимальный RSS процесса с момента запуска, растёт вместе с размером документа
+        "max_rss_bytes": max_rss_bytes(),
+    }
+
+
+def max_rss_bytes() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux ru_maxrss в килобайтах, в macOS - в байтах
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def compare(results: dict, baseline: dict):
+    """
+    Печатает отношение времени этапов к базовому прогону (меньше 1 - быстрее)
+    """
+    baseline_by_pages = {item["pages"]: item for item in baseline["results"]}
+    print(f"\nСравнение с базовым прогоном от {baseline['meta']['timestamp']}:")
+    for item in results["results"]:
+        base = baseline_by_pages.get(item["pages"])
+        if base is None:
+            continue
+        for name, stage in item["stages"].items():
+            base_stage = base["stages"].get(name)
+            if base_stage and base_stage["seconds"]:
+                ratio = stage["seconds"] / base_stage["seconds"]
+                print(f"  {item['pages']:>4} стр. {name:<24} {base_stage['seconds']:.4f} с -> "
+                      f"{stage['seconds']:.4f} с (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки конвейера извлечения данных из PDF")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Размеры документов в страницах")
+    parser.add_argument("--repeat", type=int, default=3, help="Количество запусков каждого замера")
+    parser.add_argument("--output", default="benchmark_results.json", help="Куда сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="JSON с результатами предыдущего прогона для сравнения")
+    args = parser.parse_args()
+
+    registry = ConfigRegistry(CONFIG_DIR)
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pymupdf": fitz.VersionBind,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+
+    for pages in args.sizes:
+        # Конвейер печатает ход обработки, в замерах этот вывод не нужен
+        with contextlib.redirect_stdout(io.StringIO()):
+            item = bench_size(registry, pages, args.repeat)
+        results["results"].append(item)
+        print(f"{pages:>4} стр., {item['rows']} строк, пик памяти Python {item['peak_python_bytes'] / 2 ** 20:.1f} МБ")
+        for name, stage in item["stages"].items():
+            print(f"       {name:<24} {stage['seconds']:.4f} с  {stage['pages_per_s']:>10} стр./с  "
+                  f"{stage['rows_per_s']:>10} строк/с")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
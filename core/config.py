@@ -17,8 +17,78 @@ class Config:
     APP_NAME = os.getenv("APP_NAME", "PDF Extractor")
     HOST = os.getenv("HOST", "127.0.0.1")
     PORT = int(os.getenv("PORT", 8000))
-    RELOAD = bool(os.getenv("RELOAD", True))
+    # Перезапуск при изменении кода (только для разработки, python main.py)
+    RELOAD = os.getenv("RELOAD", "false").lower() in ("1", "true", "yes")
     LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+    # Продакшен-запуск (gunicorn -c gunicorn.conf.py main:app): количество процессов-воркеров,
+    # прогрев конвейера извлечения на пустом документе до запуска воркеров
+    WORKERS = int(os.getenv("WORKERS", os.cpu_count() or 1))
+    WARMUP = os.getenv("WARMUP", "true").lower() in ("1", "true", "yes")
+    # Каталог с YAML-конфигурациями структуры PDF
+    PDF_STRUCTURES_DIR = os.getenv("PDF_STRUCTURES_DIR", "core/configs/pdf_structures")
+    # Конфигурация для документов, не подошедших по признакам (fingerprint) ни к одной конфигурации
+    # (пустая строка - такие документы отклоняются)
+    PDF_STRUCTURE_DEFAULT = os.getenv("PDF_STRUCTURE_DEFAULT", "lift_report_v1")
+    # Сколько страниц PDF держать загруженными одновременно на один документ
+    PDF_PAGE_CACHE_SIZE = int(os.getenv("PDF_PAGE_CACHE_SIZE", 16))
+    # Пул для извлечения данных из PDF вне цикла событий: "thread" или "process"
+    PDF_EXECUTOR = os.getenv("PDF_EXECUTOR", "thread")
+    PDF_EXECUTOR_WORKERS = int(os.getenv("PDF_EXECUTOR_WORKERS", os.cpu_count() or 1))
+    # Документы от этого количества страниц обрабатываются по диапазонам страниц в пуле процессов (0 - отключено)
+    PDF_PAGE_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PAGE_PARALLEL_MIN_PAGES", 0))
+    PDF_PAGE_PARALLEL_WORKERS = int(os.getenv("PDF_PAGE_PARALLEL_WORKERS", os.cpu_count() or 1))
+    # Память процесса: какую часть кэша MuPDF (шрифты, изображения, разобранные объекты) освобождать при закрытии
+    # каждого документа, в процентах (0 - кэш ограничен только встроенным лимитом MuPDF в 256 МБ на процесс)
+    MUPDF_STORE_SHRINK_PERCENT = int(os.getenv("MUPDF_STORE_SHRINK_PERCENT", 0))
+    # Новое извлечение ждёт, пока RSS воркера вместе с его пулами процессов выше порога (0 - без ограничения),
+    # но не дольше PDF_MEMORY_MAX_WAIT секунд
+    PDF_MEMORY_BUDGET_MB = int(os.getenv("PDF_MEMORY_BUDGET_MB", 0))
+    PDF_MEMORY_MAX_WAIT = float(os.getenv("PDF_MEMORY_MAX_WAIT", 30))
+    # Потоковая обработка (POST /lift/upload_pdf/stream) выполняется в отдельном пуле потоков: сколько обработок
+    # одновременно (остальные ждут) и через сколько секунд прервать обработку, результаты которой клиент не читает
+    # (0 - не прерывать)
+    PDF_STREAM_WORKERS = int(os.getenv("PDF_STREAM_WORKERS", 4))
+    PDF_STREAM_STALL_TIMEOUT = float(os.getenv("PDF_STREAM_STALL_TIMEOUT", 60))
+    # Приём загрузок: максимальный размер файла, размер читаемой части, каталог для временных файлов
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 200 * 1024 * 1024))
+    UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", 1024 * 1024))
+    UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+    # Кэш результатов извлечения по хеш-сумме файла: "memory", "sqlite" или "none"
+    RESULT_CACHE = os.getenv("RESULT_CACHE", "memory")
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 1000))
+    RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "result_cache.sqlite3")  # Только для "sqlite"
+    # Пакетная загрузка: сколько файлов обрабатывается одновременно, сколько отчётов отправляется одним запросом
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", os.cpu_count() or 1))
+    BATCH_SUBMIT_SIZE = int(os.getenv("BATCH_SUBMIT_SIZE", 20))
+    BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", 1000))
+    BATCH_MAX_ARCHIVE_BYTES = int(os.getenv("BATCH_MAX_ARCHIVE_BYTES", 1024 * 1024 * 1024))
+    # Фоновая обработка (POST /lift/jobs): воркеры, длина очереди, хранилище задач
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", os.cpu_count() or 1))
+    JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", 100))
+    JOB_STORE = os.getenv("JOB_STORE", "memory")  # "memory" или "sqlite"
+    JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")  # Только для "sqlite"
+    JOB_STORAGE_DIR = os.getenv("JOB_STORAGE_DIR", "job_uploads")  # Загрузки, ожидающие обработки
+    JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", 24 * 60 * 60))
+    # Outbox: отчёты сохраняются до ответа на загрузку и отправляются на микросервис отчётов в фоне
+    # "none" (отправка во время запроса, ответ микросервиса возвращается в ответе на загрузку), "sqlite" (переживает
+    # перезапуск) или "memory". С outbox в ответе на загрузку возвращается статус записи, а не ответ микросервиса
+    OUTBOX = os.getenv("OUTBOX", "none")
+    OUTBOX_PATH = os.getenv("OUTBOX_PATH", "outbox.sqlite3")  # Только для "sqlite"
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 20))  # Только при наличии batch_endpoint
+    OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", 4))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 20))
+    OUTBOX_RETRY_BASE_DELAY = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", 1))  # Секунды
+    OUTBOX_RETRY_MAX_DELAY = float(os.getenv("OUTBOX_RETRY_MAX_DELAY", 300))  # Секунды
+    OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", 60))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 1))  # Секунды
+    OUTBOX_RETENTION_SECONDS = float(os.getenv("OUTBOX_RETENTION_SECONDS", 7 * 24 * 60 * 60))
+    # Общий HTTP-клиент для отправки данных на другие микросервисы
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))  # Секунды
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 30))  # Секунды
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))  # Секунды
+    HTTP2 = os.getenv("HTTP2", "false").lower() in ("1", "true", "yes")
 
 
 config = Config()
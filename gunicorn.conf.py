@@ -0,0 +1,31 @@
+# gunicorn.conf.py
+# Продакшен-запуск: несколько процессов-воркеров uvicorn под управлением gunicorn
+#   gunicorn -c gunicorn.conf.py main:app
+# Приложение импортируется один раз в главном процессе (preload_app), там же загружаются конфигурации структуры PDF
+# и прогревается конвейер извлечения. Воркеры создаются через fork и делят эти страницы памяти (copy-on-write),
+# поэтому стартуют без повторного импорта PyMuPDF, NumPy и FastAPI.
+
+import gc
+
+# Модуль читается gunicorn как набор настроек, поэтому имя "config" здесь занимать нельзя
+from core.config import config as app_config
+
+bind = f"{app_config.HOST}:{app_config.PORT}"
+workers = app_config.WORKERS
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+loglevel = app_config.LOG_LEVEL
+# Большие документы обрабатываются долго, воркер не должен перезапускаться посреди обработки
+timeout = 300
+graceful_timeout = 60
+
+
+def when_ready(server):
+    # Главный процесс, приложение уже импортировано, воркеры ещё не созданы
+    from app.lifespan import preload
+
+    preload()
+    # Объекты, созданные до fork, переводятся в постоянное поколение: сборщик мусора воркеров их не обходит
+    # и не записывает в их страницы, поэтому страницы остаются общими
+    gc.freeze()
+    server.log.info(f"Application preloaded, starting {workers} workers")
@@ -3,6 +3,7 @@
 import uvicorn
 from fastapi import FastAPI
 
+from app.api.routers.metrics_router import router as metrics_router
 from app.api.routers.pdf_router import router as pdf_router
 from app.lifespan import lifespan
 from core.config import config
@@ -13,14 +14,13 @@ app = FastAPI(
     description="API для обработки PDF-файлов о простое лифтов.",
     version="0.0.1",
     docs_url="/docs",  # URL для доступа к Swagger UI
+    lifespan=lifespan,  # Подключение функции жизненного цикла
 )
 
-# Подключение функции жизненного цикла
-app.lifespan = lifespan
-
 # Подключение роутеров
 app.include_router(pdf_router)
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
-    # Запуск приложения
+    # Запуск приложения в одном процессе (для разработки), продакшен-запуск - через gunicorn (см. gunicorn.conf.py)
     uvicorn.run("main:app", host=config.HOST, port=config.PORT, log_level=config.LOG_LEVEL, reload=config.RELOAD)
@@ -0,0 +1,59 @@
+import hashlib
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from app.models.file_model import FileModel
+from app.services.archive import unpack_archive
+
+MEMBERS = {"reports/a.pdf": b"%PDF-1.7 a" * 1000, "b.pdf": b"%PDF-1.7 b", "readme.txt": b"not a pdf"}
+
+
+def create_zip() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in MEMBERS.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def create_tar() -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, content in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("filename, content", [("batch.zip", create_zip()), ("batch.tar.gz", create_tar())])
+def test_unpack_archive_spools_members(tmp_path, filename, content):
+    files = unpack_archive(FileModel(filename, content), 1024 * 1024, chunk_size=1000, spool_dir=str(tmp_path))
+    assert [file.filename for file in files] == ["a.pdf", "b.pdf"]
+    for file, expected in zip(files, (MEMBERS["reports/a.pdf"], MEMBERS["b.pdf"])):
+        # PDF-файлы архива лежат на диске с уже посчитанными хеш-суммой и размером, в памяти их нет
+        assert file.content is None and file.path is not None
+        assert file.get_content() == expected
+        assert file.sha256 == hashlib.sha256(expected).hexdigest()
+        assert file.size == len(expected)
+        file.cleanup()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unpack_archive_too_large_removes_spooled_files(tmp_path):
+    with pytest.raises(ValueError):
+        unpack_archive(FileModel("batch.zip", create_zip()), 10000, spool_dir=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unpack_archive_stops_at_max_files(tmp_path):
+    with pytest.raises(ValueError):
+        unpack_archive(FileModel("batch.zip", create_zip()), 1024 * 1024, spool_dir=str(tmp_path), max_files=1)
+    assert list(tmp_path.iterdir()) == []
+    files = unpack_archive(FileModel("batch.zip", create_zip()), 1024 * 1024, spool_dir=str(tmp_path), max_files=2)
+    assert len(files) == 2
+    for file in files:
+        file.cleanup()
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+import yaml
+
+from app.models.pdf_structure import PageRange
+from app.services.config_registry import ConfigRegistry
+
+CONFIG_PATH = "core/configs/pdf_structures/lift_report_v1.yml"
+
+
+def write_config(directory, name: str = "report", mtime: float = None, **table_changes):
+    """
+    Записывает в каталог lift_report_v1 с изменёнными полями таблицы
+    :param mtime: Время модификации файла (None - текущее)
+    """
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        raw_config = yaml.safe_load(f)
+    table = next(obj for obj in raw_config["pdf_structure"]["objects"] if obj["type"] == "table")
+    for key, value in table_changes.items():
+        if isinstance(value, dict) and isinstance(table.get(key), dict):
+            table[key].update(value)
+        else:
+            table[key] = value
+    path = directory / f"{name}.yml"
+    path.write_text(yaml.safe_dump(raw_config, allow_unicode=True), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.parametrize("table_changes, error", [
+    ({"blocks_pointer": {"criteria": {"radius": 1.0}}}, "unknown criterion 'radius'"),
+    ({"blocks_pointer": {"criteria": {}}}, "'criteria' must be a non-empty mapping"),
+    ({"blocks_pointer": {"criteria": {"height": {"value": 3.0, "tolerance": 0}}}}, "'tolerance' must be positive"),
+    ({"blocks_pointer": {"criteria": {"height": {"tolerance": 0.1}}}}, "missing 'value'"),
+    ({"row_pointer": {"criteria": {"color": [0, 0]}}}, "expected 3 number(s)"),
+    ({"row_pointer": {"criteria": {"fill": [0, "red", 0]}}}, "expected a number"),
+    ({"row_pointer": {"type": "text"}}, "unknown pointer type 'text'"),
+    ({"pages": [1, 3]}, "expected a mapping with 'start' and/or 'end'"),
+    ({"pages": {"start": "1"}}, "'report.stoppages_data.pages.start': expected an integer"),
+    ({"pages": {"end": 2.5}}, "'report.stoppages_data.pages.end': expected an integer"),
+    ({"pages": {"start": True}}, "expected an integer"),
+    ({"end_of_table_marker": {"type": "image"}}, "unknown marker type 'image'"),
+    ({"end_of_table_marker": {"type": "drawing"}}, "missing 'criteria'"),
+    ({"end_of_table_marker": {"type": "drawing", "criteria": {"radius": 1}}}, "unknown criterion 'radius'"),
+    ({"end_of_table_marker": {"type": "text", "text": "  "}}, "'text' must be a non-empty string"),
+])
+def test_invalid_config_is_rejected(tmp_path, table_changes, error):
+    write_config(tmp_path, **table_changes)
+    with pytest.raises(ValueError) as exc_info:
+        ConfigRegistry(str(tmp_path)).get("report")
+    assert error in str(exc_info.value)
+
+
+def test_valid_table_options_compile(tmp_path):
+    write_config(tmp_path, pages={"start": 1, "end": -1},
+                 end_of_table_marker={"type": "text", "text": " END OF TABLE "},
+                 row_pointer={"criteria": {"height": {"value": 0.1, "tolerance": 0.05}, "color": [0, 0, 0]}})
+    table = ConfigRegistry(str(tmp_path)).get("report").objects[1]
+    assert table.pages == PageRange(start=1, end=-1)
+    assert (table.end_of_table_marker.text, table.end_of_table_marker.rect) == ("END OF TABLE", None)
+    assert [(criterion.name, criterion.tolerance) for criterion in table.row_pointer.criteria] == [("height", 0.05),
+                                                                                                    ("color", 0.01)]
+
+
+def test_registry_reloads_config_when_mtime_changes(tmp_path):
+    write_config(tmp_path, mtime=1000)
+    registry = ConfigRegistry(str(tmp_path))
+    structure = registry.get("report")
+    index = registry.fingerprint_index()
+    # Файл не менялся: конфигурация и индекс признаков не пересобираются
+    assert registry.get("report") is structure
+    assert registry.fingerprint_index() is index
+
+    write_config(tmp_path, mtime=2000, pages={"start": 1})
+    reloaded = registry.get("report")
+    assert reloaded.objects[1].pages == PageRange(start=1) and reloaded.version != structure.version
+    assert registry.fingerprint_index() is not index
+    assert registry.get("report") is reloaded
+
+    # Ошибочное изменение не подменяет уже загруженную конфигурацию молча: get сообщает об ошибке
+    write_config(tmp_path, mtime=3000, pages={"start": "x"})
+    with pytest.raises(ValueError):
+        registry.get("report")
+    with pytest.raises(ValueError):
+        ConfigRegistry(str(tmp_path)).load_all()
+
+
+def test_registry_missing_config(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ConfigRegistry(str(tmp_path)).get("report")
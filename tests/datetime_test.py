@@ -0,0 +1,77 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from app.services.utils import convert_many_to_rfc3339, convert_to_rfc3339
+
+
+def reference_convert_to_rfc3339(datetime_str: str) -> str:
+    """
+    Исходное преобразование через datetime.strptime, с ним сравнивается разбор по шаблону
+    """
+    for fmt in ("%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M"):
+        try:
+            return datetime.strptime(datetime_str, fmt).isoformat() + "+03:00"
+        except ValueError:
+            continue
+    raise ValueError(datetime_str)
+
+
+def convert_or_error(convert, datetime_str: str) -> str | None:
+    try:
+        return convert(datetime_str)
+    except ValueError:
+        return None
+
+
+def random_datetime_str(rnd: random.Random) -> str:
+    """
+    Строки около формата 'дд.мм.гггг чч:мм[:сс]': поля разной длины и за пределами диапазона, 29 февраля,
+    разные пробельные символы и лишние символы
+    """
+    def number(low: int, high: int, width: int) -> str:
+        # Чаще значение в допустимом диапазоне, иначе - на его границах и за ними
+        value = str(rnd.randint(low, high) if rnd.random() < 0.9 else rnd.randint(max(0, low - 1), high + 2))
+        if rnd.random() < 0.8:
+            return value.zfill(width)
+        return rnd.choice((value, " " + value, value.zfill(width + 1)))
+
+    parts = [number(1, 31, 2), ".", number(1, 12, 2), ".", number(1900, 2100, 4),
+             " " if rnd.random() < 0.8 else rnd.choice(("  ", "\t", "\n", "", "T", " \xa0")),
+             number(0, 23, 2), ":", number(0, 59, 2)]
+    if rnd.random() < 0.5:
+        parts += [":", number(0, 59, 2)]
+    if rnd.random() < 0.1:
+        position = rnd.randrange(len(parts) + 1)
+        parts.insert(position, rnd.choice(("0", " ", ".", ":", "a", "٣", "+")))
+    if rnd.random() < 0.05:
+        parts[rnd.randrange(len(parts))] = ""
+    return "".join(parts)
+
+
+def test_convert_to_rfc3339_matches_strptime():
+    rnd = random.Random(0)
+    for _ in range(100000):
+        datetime_str = random_datetime_str(rnd)
+        assert (convert_or_error(convert_to_rfc3339, datetime_str)
+                == convert_or_error(reference_convert_to_rfc3339, datetime_str)), repr(datetime_str)
+
+
+@pytest.mark.parametrize("datetime_str", ["", "01.09.2024 10", "31.02.2024 10:00", "29.02.2023 10:00",
+                                          "01.09.2024 24:00", "01.13.2024 10:00", "01.09.2024 10:00:00 ",
+                                          "01.09.2024 10:00 +03"])
+def test_convert_to_rfc3339_invalid_still_raises(datetime_str):
+    with pytest.raises(ValueError):
+        convert_to_rfc3339(datetime_str)
+    # Ошибка не запоминается: повторный вызов снова бросает исключение
+    with pytest.raises(ValueError):
+        convert_to_rfc3339(datetime_str)
+
+
+def test_convert_many_to_rfc3339():
+    values = ["01.09.2024 10:00", "", "29.02.2024 23:59:59", "01.09.2024 10:00"]
+    assert convert_many_to_rfc3339(values, keep_empty=True) == [
+        "2024-09-01T10:00:00+03:00", "", "2024-02-29T23:59:59+03:00", "2024-09-01T10:00:00+03:00"]
+    with pytest.raises(ValueError):
+        convert_many_to_rfc3339(values)
@@ -0,0 +1,82 @@
+import pymupdf as fitz
+import pytest
+
+from app.models.file_model import FileModel
+from app.processors.pdf.handlers import TableHandler
+from app.repositories.pdf_repository import PDFRepository
+from app.services.config_compiler import _compile_criteria
+
+
+def generate_page() -> bytes:
+    """
+    Страница с рисунками:
+    0 - обводка чёрная, толщина 1, высота 20;
+    1 - только заливка красная, высота 3 (без обводки и толщины линии);
+    2 - обводка синяя и заливка зелёная, толщина 2.5, высота 20;
+    3 - линия чёрная, толщина 0.5, высота 0;
+    4 - обводка и заливка серые, толщина 1.04, высота 3
+    """
+    doc = fitz.open()
+    page = doc.new_page(width=200, height=200)
+    page.draw_rect(fitz.Rect(10, 10, 60, 30), color=(0, 0, 0), width=1)
+    page.draw_rect(fitz.Rect(10, 40, 110, 43), color=None, fill=(1, 0, 0))
+    page.draw_rect(fitz.Rect(10, 50, 60, 70), color=(0, 0, 1), fill=(0, 1, 0), width=2.5)
+    page.draw_line((10, 80), (110, 80), color=(0, 0, 0), width=0.5)
+    page.draw_rect(fitz.Rect(10, 100, 60, 103), color=(0.5, 0.5, 0.5), fill=(0.5, 0.5, 0.5), width=1.04)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+@pytest.fixture(scope="module")
+def drawings():
+    with PDFRepository() as repository:
+        repository.load_pdf(FileModel("drawings.pdf", generate_page()))
+        yield repository.get_page_drawings(0)
+
+
+def match(drawings, **criteria) -> list[int]:
+    return TableHandler.match_drawings(drawings, _compile_criteria(criteria, "test")).tolist()
+
+
+@pytest.mark.parametrize("criteria, expected", [
+    ({"height": 20}, [0, 2]),
+    ({"height": 3.0, "width": 100}, [1]),
+    ({"height": {"value": 20.05}}, [0, 2]),
+    ({"height": 20.3}, []),
+    ({"height": {"value": 20.3, "tolerance": 0.5}}, [0, 2]),
+    ({"line_width": 1}, [0, 4]),
+    ({"line_width": {"value": 1, "tolerance": 0.01}}, [0]),
+    ({"line_width": 2.5}, [2]),
+])
+def test_size_and_line_width_criteria(drawings, criteria, expected):
+    assert match(drawings, **criteria) == expected
+
+
+@pytest.mark.parametrize("criteria, expected", [
+    ({"color": [0, 0, 0]}, [0, 3]),
+    ({"color": [0, 0, 1]}, [2]),
+    ({"fill": [1, 0, 0]}, [1]),
+    ({"fill": [0, 1, 0]}, [2]),
+    ({"color": [0.5, 0.5, 0.5]}, [4]),
+    ({"color": [0.52, 0.5, 0.5]}, []),
+    ({"color": {"value": [0.52, 0.5, 0.5], "tolerance": 0.05}}, [4]),
+])
+def test_color_and_fill_criteria(drawings, criteria, expected):
+    assert match(drawings, **criteria) == expected
+
+
+def test_all_criteria_must_match(drawings):
+    # Порядок критериев в конфигурации не важен: компилятор сортирует их по стоимости проверки
+    criteria = {"fill": [0, 1, 0], "color": [0, 0, 1], "line_width": 2.5, "height": 20}
+    assert match(drawings, **criteria) == [2]
+    assert match(drawings, height=20, color=[0, 0, 1], fill=[1, 0, 0]) == []
+
+
+def test_missing_stroke_or_fill_never_matches(drawings):
+    # Даже с погрешностью, под которую подходит любой цвет, рисунок без обводки не подходит под критерий
+    # цвета обводки, без заливки - под критерий заливки, без толщины линии - под критерий толщины
+    anything = {"value": [0, 0, 0], "tolerance": 10}
+    assert match(drawings, color=anything) == [0, 2, 3, 4]
+    assert match(drawings, fill=anything) == [1, 2, 4]
+    assert match(drawings, line_width={"value": 1, "tolerance": 10}) == [0, 2, 3, 4]
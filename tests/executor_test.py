@@ -0,0 +1,21 @@
+import asyncio
+import threading
+
+from app.services.executor import _produce
+
+
+def test_produce_stops_when_client_stalls():
+    async def run():
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        slots = threading.Semaphore(2)
+        # Клиент не забирает результаты: после двух мест в очереди поток ждёт и прерывается по таймауту
+        items = (i for i in range(10))
+        producer = loop.run_in_executor(None, _produce, items, loop, queue, slots, threading.Event(), 0.3)
+        await asyncio.wait_for(producer, 5)
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    messages = asyncio.run(run())
+    assert [item for item, _, _ in messages[:2]] == [0, 1]
+    _, error, done = messages[-1]
+    assert len(messages) == 3 and isinstance(error, TimeoutError) and done
@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.exceptions import ConflictError
+from app.models.file_model import FileModel
+from app.models.job_model import JOB_CONFLICT, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, Job
+from app.repositories.job_store import MemoryJobStore, SQLiteJobStore
+from app.services.job_queue import JobQueue
+
+
+class RecordingStore(MemoryJobStore):
+    """
+    Хранилище в памяти, запоминающее каждое сохранённое состояние задачи
+    """
+
+    def __init__(self, fail_on_status: str = None):
+        super().__init__()
+        self.saved = []
+        self.fail_on_status = fail_on_status
+
+    def save(self, job):
+        if job.status == self.fail_on_status:
+            raise OSError("disk full")
+        self.saved.append((job.status, job.stage))
+        super().save(job)
+
+
+class FakeService:
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+    async def process_lift_pdf(self, file: FileModel, on_stage=None):
+        assert file.get_content() == b"%PDF-1.7"
+        await on_stage("extracting")
+        await on_stage("submitting")
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(file_sha256=file.sha256), {"id": 1}
+
+
+def spooled(tmp_path, name: str = "a.pdf") -> FileModel:
+    path = tmp_path / name
+    path.write_bytes(b"%PDF-1.7")
+    return FileModel(name, path=str(path), sha256="abc", size=8, temporary=True)
+
+
+async def run_jobs(store, service: FakeService, files: list[FileModel]) -> list[Job]:
+    queue = JobQueue(store, lambda: service, workers=2, max_size=10, retention_seconds=60)
+    await queue.start()
+    try:
+        jobs = [await queue.submit(file) for file in files]
+        await queue._queue.join()
+        return [await queue.get(job.id) for job in jobs]
+    finally:
+        await queue.stop()
+
+
+def test_job_done_goes_through_stages(tmp_path):
+    store = RecordingStore()
+    file = spooled(tmp_path)
+    [job] = asyncio.run(run_jobs(store, FakeService(), [file]))
+    assert job.status == JOB_DONE and job.result == {"file_sha256": "abc", "response": {"id": 1}}
+    assert store.saved == [(JOB_QUEUED, None), (JOB_RUNNING, None), (JOB_RUNNING, "extracting"),
+                           (JOB_RUNNING, "submitting"), (JOB_DONE, None)]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_job_conflict_and_failure(tmp_path):
+    [job] = asyncio.run(run_jobs(MemoryJobStore(), FakeService(ConflictError("dup")), [spooled(tmp_path)]))
+    assert (job.status, job.error) == (JOB_CONFLICT, "dup")
+    [job] = asyncio.run(run_jobs(MemoryJobStore(), FakeService(ValueError("bad")), [spooled(tmp_path)]))
+    assert (job.status, job.error) == (JOB_FAILED, "bad")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_job_missing_upload_fails(tmp_path):
+    file = spooled(tmp_path)
+    (tmp_path / "a.pdf").unlink()
+    [job] = asyncio.run(run_jobs(MemoryJobStore(), FakeService(), [file]))
+    assert job.status == JOB_FAILED and job.error
+
+
+def test_job_upload_removed_when_status_save_fails(tmp_path):
+    # Ошибка обработки, а затем и сохранения статуса ошибки
+    store = RecordingStore(fail_on_status=JOB_FAILED)
+    asyncio.run(run_jobs(store, FakeService(ValueError("bad")), [spooled(tmp_path)]))
+    assert store.saved[-1] == (JOB_RUNNING, "submitting")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unfinished_jobs_restored_after_restart(tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    path = str(tmp_path / "jobs.sqlite3")
+    store = SQLiteJobStore(path)
+    # Задачи, прерванные перезапуском: одна ждала в очереди, другая обрабатывалась, третья уже завершена
+    queued, running = spooled(uploads, "queued.pdf"), spooled(uploads, "running.pdf")
+    jobs = [Job(filename=file.filename, path=file.path, sha256=file.sha256, size=file.size)
+            for file in (queued, running)]
+    jobs[1].status, jobs[1].stage = JOB_RUNNING, "extracting"
+    finished = Job(filename="done.pdf", path=str(uploads / "done.pdf"), sha256="def", size=1, status=JOB_DONE)
+    for job in (*jobs, finished):
+        store.save(job)
+    store.close()
+
+    async def restart():
+        queue = JobQueue(SQLiteJobStore(path), FakeService, workers=1, max_size=10, retention_seconds=60)
+        await queue.start()
+        try:
+            while any(task.get_name() == "pdf-job-restore" and not task.done() for task in queue._tasks):
+                await asyncio.sleep(0.01)
+            await queue._queue.join()
+            return [await queue.get(job.id) for job in (*jobs, finished)]
+        finally:
+            await queue.stop()
+
+    restored = asyncio.run(restart())
+    assert [job.status for job in restored] == [JOB_DONE, JOB_DONE, JOB_DONE]
+    assert restored[0].result == {"file_sha256": "abc", "response": {"id": 1}}
+    assert list(uploads.iterdir()) == []
@@ -6,11 +6,15 @@
 import json
 import os
 
-from app.repositories.requests_repository import ReportRepository
-
+from app.models.file_model import FileModel
 from app.repositories.pdf_repository import PDFRepository
-from app.services.config_loader import ConfigLoader
-from app.services.pdf_service import PDFService
+from app.services.config_registry import ConfigRegistry
+from app.services.pdf_extraction import extract_pdf
+from app.services.pdf_service import LIFT_REPORT_CONFIG
+from app.services.utils import convert_to_models, convert_to_rfc3339
+
+# Если нужных PDF под рукой нет, синтетический отчёт можно сгенерировать:
+#   python -m benchmarks.generator downloads/report.pdf --pages 3
 
 
 def print_report(result):
@@ -26,47 +30,32 @@ def print_report(result):
 
 
 def main():
-    config_loader = ConfigLoader()
+    config = ConfigRegistry("core/configs/pdf_structures").get(LIFT_REPORT_CONFIG)
     repository = PDFRepository()
-    repo = ReportRepository("http://127.0.0.1:8080")
 
-    pdf_service = PDFService(config_loader, repository)
     folder_path = "../downloads"
     files = [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
 
     for file in files:
-        pdf_path = "downloads/" + file
-        # Валидация PDF перед обработкой
-        pdf_service.validate_pdf(pdf_path)
+        pdf_path = os.path.join(folder_path, file)
+        with open(pdf_path, "rb") as f:
+            file_model = FileModel(file, f.read())
 
-        # Обработка PDF
-        # result, report_time = pdf_service.process_lift_pdf(pdf_path,
-        #                                                    output_path="downloads/output/" + file + "_размеченный.pdf")
+        # Валидация и обработка PDF
+        # extracted_data = extract_pdf(repository, file_model, config,
+        #                              output_path=folder_path + "/output/" + file + "_размеченный.pdf")
         # Если не передавать output_path, то разметка не будет сохранена
-        result, report_time = pdf_service.process_lift_pdf(pdf_path)
+        extracted_data = extract_pdf(repository, file_model, config)
+        result = convert_to_models(extracted_data)
+        report_time = convert_to_rfc3339(extracted_data['report_time'])
 
         # print_report(result)
         # Соберем из отчёта json c кодировкой utf-8
         # В companies запишем отчёт по компаниям
-        companies = []
-        for company_report in result:
-            reports = []
-            for report in company_report.reports:
-                reports.append({"factory_number": report.factory_number,
-                                "start_time": report.start_time,
-                                "end_time": report.end_time,
-                                "downtime_hours": report.downtime_hours,
-                                "reg_number": report.reg_number})
-            companies.append({"company_name": company_report.company_name, "reports": reports})
-
-        # Отправка сформированных данных
-        data_to_send = {
-            "report_time": report_time,
-            "companies": companies
-        }
-        repo.send_report(data_to_send)
+        companies = [company_report.dict() for company_report in result]
 
-        with open("downloads/output/" + file + "_отчет.json", "w", encoding='utf-8') as f:
+        os.makedirs(folder_path + "/output", exist_ok=True)
+        with open(folder_path + "/output/" + file + "_отчет.json", "w", encoding='utf-8') as f:
             json.dump({"report_time": report_time, "companies": companies}, f, ensure_ascii=False, indent=4)
 
 
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.exceptions import ConflictError
+from app.models.outbox_model import OUTBOX_CONFLICT, OUTBOX_DELIVERED, OUTBOX_FAILED, OUTBOX_PENDING, OutboxEntry
+from app.repositories.outbox_store import MemoryOutboxStore
+from app.services import outbox_sender
+from app.services.outbox_sender import OutboxSender
+
+URL = "http://reports/one"
+BATCH_URL = "http://reports/batch"
+
+
+class FakeRepository:
+    """
+    Микросервис отчётов: запоминает запросы, ответ задаёт функция respond(номера отчётов, адрес)
+    """
+
+    def __init__(self, respond=None):
+        self.calls = []
+        self.respond = respond or (lambda ids, url: {"received": len(ids)})
+
+    async def send_json(self, content: bytes, endpoint: str) -> dict:
+        body = json.loads(content)
+        ids = [item["id"] for item in body] if isinstance(body, list) else [body["id"]]
+        self.calls.append((endpoint, ids))
+        return self.respond(ids, endpoint)
+
+
+def http_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", URL)
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+
+def entry(i: int, batch: bool = True) -> OutboxEntry:
+    return OutboxEntry(file_sha256=f"sha{i}", filename=f"{i}.pdf", config_name="lift_report_v1", url=URL,
+                       batch_url=BATCH_URL if batch else None, payload=json.dumps({"id": i}).encode())
+
+
+def create_sender(store, repository, **options) -> OutboxSender:
+    settings = dict(batch_size=3, concurrency=2, max_attempts=3, retry_base_delay=1, retry_max_delay=8,
+                    lease_seconds=60, poll_interval=0.05, retention_seconds=60)
+    settings.update(options)
+    return OutboxSender(store, repository, **settings)
+
+
+def test_drain_sends_batches_and_single_reports():
+    store, repository = MemoryOutboxStore(), FakeRepository()
+    for i in range(7):
+        assert store.add(entry(i, batch=i < 5))
+    asyncio.run(create_sender(store, repository).drain())
+    assert sorted(repository.calls) == [(BATCH_URL, [0, 1, 2]), (BATCH_URL, [3, 4]), (URL, [5]), (URL, [6])]
+    assert store.counts() == {OUTBOX_DELIVERED: 7}
+    assert store.get("sha3").response == {"received": 2}
+
+
+def test_batch_conflict_falls_back_to_single_sends():
+    def respond(ids, url):
+        if url == BATCH_URL or ids == [1]:
+            raise ConflictError(f"duplicate {ids}")
+        return {"received": len(ids)}
+
+    store, repository = MemoryOutboxStore(), FakeRepository(respond)
+    for i in range(3):
+        store.add(entry(i))
+    asyncio.run(create_sender(store, repository).drain())
+    assert repository.calls[0] == (BATCH_URL, [0, 1, 2])
+    assert sorted(repository.calls[1:]) == [(URL, [0]), (URL, [1]), (URL, [2])]
+    # Конфликт получает только отчёт, отклонённый и при отдельной отправке
+    assert [store.get(f"sha{i}").status for i in range(3)] == [OUTBOX_DELIVERED, OUTBOX_CONFLICT, OUTBOX_DELIVERED]
+    assert store.get("sha1").error == "duplicate [1]"
+
+
+@pytest.mark.parametrize("error, retried", [
+    (httpx.ConnectError("down"), True),
+    (httpx.ReadTimeout("timeout"), True),
+    (http_error(503), True),
+    (http_error(429), True),
+    (http_error(400), False),
+    (http_error(422), False),
+])
+def test_retry_or_fail_classification(error, retried):
+    def respond(ids, url):
+        raise error
+
+    store = MemoryOutboxStore()
+    store.add(entry(0, batch=False))
+    before = time.time()
+    asyncio.run(create_sender(store, FakeRepository(respond)).drain())
+    result = store.get("sha0")
+    assert result.attempts == 1 and result.error == str(error)
+    if retried:
+        assert result.status == OUTBOX_PENDING and before <= result.next_attempt_at <= time.time() + 1
+    else:
+        assert result.status == OUTBOX_FAILED
+
+
+def test_fails_after_max_attempts():
+    def respond(ids, url):
+        raise httpx.ConnectError("down")
+
+    store, repository = MemoryOutboxStore(), FakeRepository(respond)
+    store.add(entry(0, batch=False))
+    sender = create_sender(store, repository, retry_base_delay=0.01, retry_max_delay=0.01)
+
+    async def run():
+        while not store.get("sha0").is_finished():
+            await sender.drain()
+            await asyncio.sleep(0.02)
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert (store.get("sha0").status, store.get("sha0").attempts) == (OUTBOX_FAILED, 3)
+    assert len(repository.calls) == 3
+
+
+def test_backoff_is_exponential_and_capped(monkeypatch):
+    # Случайный разброс заменён верхней границей, чтобы проверить саму задержку
+    monkeypatch.setattr(outbox_sender.random, "uniform", lambda low, high: high)
+    sender = create_sender(MemoryOutboxStore(), FakeRepository(), max_attempts=10)
+    report = entry(0)
+    delays = []
+    for _ in range(6):
+        sender._retry([report], httpx.ConnectError("down"))
+        delays.append(round(report.next_attempt_at - report.updated_at))
+    assert delays == [1, 2, 4, 8, 8, 8]
+    assert report.status == OUTBOX_PENDING and report.attempts == 6
+
+
+def test_leased_report_is_claimed_again_after_lease():
+    store, repository = MemoryOutboxStore(), FakeRepository()
+    store.add(entry(0))
+    # Отправитель забрал отчёт и остановился, не сохранив результат (например, воркер перезапущен)
+    assert [claimed.file_sha256 for claimed in store.claim_due(time.time(), 10, 0.2)] == ["sha0"]
+    sender = create_sender(store, repository)
+    asyncio.run(sender.drain())
+    assert repository.calls == [] and store.get("sha0").status == OUTBOX_PENDING
+    time.sleep(0.25)
+    asyncio.run(sender.drain())
+    # Пачка из одного отчёта отправляется на адрес приёма одного отчёта
+    assert repository.calls == [(URL, [0])]
+    assert store.get("sha0").status == OUTBOX_DELIVERED
+
+
+def test_reupload_allowed_only_after_failure():
+    def respond(ids, url):
+        if fail:
+            raise http_error(400)
+        return {"received": len(ids)}
+
+    fail = True
+    store = MemoryOutboxStore()
+    sender = create_sender(store, FakeRepository(respond))
+    processed_data = SimpleNamespace(file_sha256="sha0", filename="0.pdf", to_json=lambda: b'{"id": 0}')
+    structure = SimpleNamespace(name="lift_report_v1", processed_data_service=SimpleNamespace(url=URL, batch_url=None))
+
+    async def run():
+        nonlocal fail
+        await sender.enqueue(processed_data, structure)
+        # Отчёт ещё не отправлен: повторная загрузка - конфликт
+        with pytest.raises(ConflictError):
+            await sender.enqueue(processed_data, structure)
+        await sender.drain()
+        assert store.get("sha0").status == OUTBOX_FAILED
+        # Неотправленный отчёт можно загрузить заново, попытки начинаются сначала
+        entry_again = await sender.enqueue(processed_data, structure)
+        assert (entry_again.status, entry_again.attempts) == (OUTBOX_PENDING, 0)
+        fail = False
+        await sender.drain()
+        assert store.get("sha0").status == OUTBOX_DELIVERED
+        with pytest.raises(ConflictError):
+            await sender.enqueue(processed_data, structure)
+
+    asyncio.run(run())
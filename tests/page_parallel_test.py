@@ -0,0 +1,85 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from app.models.file_model import FileModel
+from app.repositories.pdf_repository import PDFRepository
+from app.services.config_registry import ConfigRegistry
+from app.services.executor import ExtractionExecutor
+from app.services.page_parallel import PagePool, split_pages
+from app.services.pdf_extraction import extract_pdf
+from benchmarks.generator import generate_lift_report
+
+# Строки, перенесённые на следующую страницу, принадлежат блоку предыдущей: при делении на диапазоны
+# они оказываются в другом диапазоне, чем их блок
+DOCUMENTS = {
+    "two_companies": dict(pages=7, companies_per_page=2, rows_per_page=6, carry_over_rows=2, seed=3),
+    "one_company": dict(pages=5, companies_per_page=1, rows_per_page=4, carry_over_rows=3, seed=4),
+}
+
+
+@pytest.fixture(scope="module")
+def config():
+    return ConfigRegistry("core/configs/pdf_structures").get("lift_report_v1")
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    with ProcessPoolExecutor(max_workers=3, mp_context=multiprocessing.get_context("spawn")) as pool:
+        yield pool
+
+
+def extract_serial(file: FileModel, config) -> dict:
+    with PDFRepository() as repository:
+        return extract_pdf(repository, file, config)
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("workers", [1, 2, 3, 5, 8])
+def test_page_pool_matches_serial(config, process_pool, document, workers):
+    file = FileModel("report.pdf", generate_lift_report(**DOCUMENTS[document]))
+    # Диапазонов может быть больше, чем процессов в пуле, и больше, чем страниц
+    assert len(split_pages(DOCUMENTS[document]["pages"], workers)) == min(workers, DOCUMENTS[document]["pages"])
+    with PDFRepository() as repository:
+        parallel = extract_pdf(repository, file, config, page_pool=PagePool(process_pool, workers))
+    assert parallel == extract_serial(file, config)
+
+
+@pytest.mark.parametrize("page_workers", [2, 3])
+def test_executor_page_parallel_matches_serial(config, page_workers):
+    executor = ExtractionExecutor(page_parallel_min_pages=1, page_workers=page_workers)
+    try:
+        for document in DOCUMENTS.values():
+            file = FileModel("report.pdf", generate_lift_report(**document))
+            assert asyncio.run(executor.extract(None, file, config)) == extract_serial(file, config)
+    finally:
+        executor.shutdown()
+
+
+def test_executor_opens_document_once(config, monkeypatch):
+    files = {name: FileModel(f"{name}.pdf", generate_lift_report(**document)) for name, document in DOCUMENTS.items()}
+    expected = {name: extract_serial(file, config) for name, file in files.items()}
+    loads, tables = [], []
+    load_pdf, iter_table = PDFRepository.load_pdf, PagePool.iter_table
+
+    def record_load(self, file):
+        loads.append(file.filename)
+        load_pdf(self, file)
+
+    def record_table(self, file, *args):
+        tables.append(file.filename)
+        return iter_table(self, file, *args)
+
+    monkeypatch.setattr(PDFRepository, "load_pdf", record_load)
+    monkeypatch.setattr(PagePool, "iter_table", record_table)
+    # Диапазоны страниц только для документа от 6 страниц, количество страниц берётся из открытого документа
+    executor = ExtractionExecutor(page_parallel_min_pages=6, page_workers=2)
+    try:
+        for name, file in files.items():
+            assert asyncio.run(executor.extract(None, file, config)) == expected[name]
+    finally:
+        executor.shutdown()
+    assert loads == ["two_companies.pdf", "one_company.pdf"]
+    assert tables == ["two_companies.pdf"]
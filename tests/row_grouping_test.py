@@ -0,0 +1,107 @@
+import random
+
+import numpy as np
+
+import app.models.pdf_models as models
+from app.processors.pdf.handlers import TableHandler
+
+
+def reference_group_rows_by_blocks(block_pointers: list[models.Rect], rows: list[models.Rect]) -> list[list[int]]:
+    """
+    Исходный алгоритм группировки строк по блокам (до перехода на срезы и потоковую группировку),
+    по нему проверяется, что результат не изменился. Единственное отличие: строки выше первого блока пропускаются,
+    в исходном алгоритме такие строки на странице первого блока останавливали группировку всех блоков
+    :return: Для каждого блока номера принадлежащих ему строк
+    """
+    groups = []
+    row_index = 0
+    while block_pointers and row_index < len(rows) and \
+            (rows[row_index].page, rows[row_index].y0) < (block_pointers[0].page, block_pointers[0].y0):
+        row_index += 1
+    for i, current_block in enumerate(block_pointers):
+        next_block = block_pointers[i + 1] if i + 1 < len(block_pointers) else None
+        block_rows = []
+        while row_index < len(rows):
+            row = rows[row_index]
+            if row.page == current_block.page:
+                if current_block.y0 <= row.y0 < (
+                        next_block.y0 if next_block and row.page == next_block.page else float('inf')):
+                    block_rows.append(row_index)
+                    row_index += 1
+                else:
+                    break
+            elif row.page > current_block.page:
+                if not next_block or row.y0 < next_block.y0:
+                    block_rows.append(row_index)
+                    row_index += 1
+                else:
+                    break
+            else:
+                row_index += 1
+        groups.append(block_rows)
+    return groups
+
+
+def random_layout(rnd: random.Random) -> tuple[list[models.RectArray], list[models.RectArray]]:
+    """
+    Случайные блоки и строки по страницам. Координаты Y берутся из сетки, чтобы часто совпадать,
+    бывают страницы без блоков, без строк и строки выше первого блока
+    :return: Блоки и строки каждой страницы, отсортированные по координате Y
+    """
+    block_pages, row_pages = [], []
+    for page in range(rnd.randint(1, 6)):
+        blocks = [models.Rect(0, rnd.randint(0, 10) * 10, 100, 0, page) for _ in range(rnd.choice((0, 0, 1, 2, 3)))]
+        rows = [models.Rect(0, rnd.randint(0, 10) * 10, 100, 0, page) for _ in range(rnd.randint(0, 8))]
+        block_pages.append(models.RectArray.from_rects(blocks).sorted())
+        row_pages.append(models.RectArray.from_rects(rows).sorted())
+    return block_pages, row_pages
+
+
+def to_rects(array: models.RectArray) -> list[models.Rect]:
+    return [models.Rect(0, y0, 0, 0, page) for page, y0 in zip(array.data["page"].tolist(),
+                                                                array.data["y0"].tolist())]
+
+
+def test_group_rows_by_blocks_matches_reference():
+    rnd = random.Random(0)
+    for _ in range(5000):
+        block_pages, row_pages = random_layout(rnd)
+        blocks = models.RectArray.concatenate(block_pages)
+        rows = models.RectArray.concatenate(row_pages)
+        groups = TableHandler.group_rows_by_blocks(blocks, rows)
+        expected = reference_group_rows_by_blocks(to_rects(blocks), to_rects(rows))
+        assert [list(range(start, end)) for start, end in groups] == expected
+
+
+def test_iter_rows_by_pointers_matches_reference():
+    rnd = random.Random(1)
+    for _ in range(5000):
+        block_pages, row_pages = random_layout(rnd)
+        blocks = models.RectArray.concatenate(block_pages)
+        rows = models.RectArray.concatenate(row_pages)
+        expected = reference_group_rows_by_blocks(to_rects(blocks), to_rects(rows))
+
+        # Страницы приходят диапазонами разной длины, как из пула процессов; данными служат номера блоков и строк
+        parts = []
+        block_offset = row_offset = 0
+        page = 0
+        while page < len(block_pages):
+            page_end = min(len(block_pages), page + rnd.randint(1, 3))
+            part_blocks = models.RectArray.concatenate(block_pages[page:page_end])
+            part_rows = models.RectArray.concatenate(row_pages[page:page_end])
+            parts.append((part_blocks, list(range(block_offset, block_offset + len(part_blocks.data))),
+                          part_rows, list(range(row_offset, row_offset + len(part_rows.data)))))
+            block_offset += len(part_blocks.data)
+            row_offset += len(part_rows.data)
+            page = page_end
+
+        handler = TableHandler(None)
+        handler.iter_page_ranges = lambda config: iter(parts)
+        result = list(handler.iter_rows_by_pointers(None))
+        assert [item["block"] for item in result] == list(range(len(blocks.data)))
+        assert [item["rows"] for item in result] == expected
+
+
+def test_group_rows_by_blocks_empty():
+    empty = models.RectArray(np.empty(0, dtype=models.RectArray.DTYPE))
+    assert TableHandler.group_rows_by_blocks(empty, empty) == []
@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pymupdf as fitz
+import pytest
+import yaml
+
+from app.models.file_model import FileModel
+from app.repositories.pdf_repository import PDFRepository
+from app.services.config_compiler import compile_pdf_structure
+from app.services.page_parallel import PagePool
+from app.services.pdf_extraction import extract_pdf
+from benchmarks.generator import generate_lift_report
+
+CONFIG_PATH = "core/configs/pdf_structures/lift_report_v1.yml"
+MARKER_TEXT = "END OF TABLE"
+
+
+def compile_config(**table_changes):
+    """
+    lift_report_v1 с изменёнными полями таблицы (маркер конца таблицы, страницы)
+    """
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        raw_config = yaml.safe_load(f)
+    table = next(obj for obj in raw_config["pdf_structure"]["objects"] if obj["type"] == "table")
+    table.update(table_changes)
+    return compile_pdf_structure("lift_report_v1", "test", raw_config)
+
+
+def generate(pages: int) -> bytes:
+    return generate_lift_report(pages=pages, companies_per_page=2, rows_per_page=5, seed=1)
+
+
+def add_marker(content: bytes, page_num: int, marker_type: str) -> bytes:
+    """
+    Ставит маркер конца таблицы над второй компанией страницы: первая компания и строки, перенесённые
+    с предыдущей страницы, остаются выше маркера, всё ниже него к таблице не относится
+    """
+    doc = fitz.open(stream=content, filetype="pdf")
+    try:
+        page = doc[page_num]
+        block_y0s = sorted(drawing["rect"].y0 for drawing in page.get_drawings()
+                           if abs(drawing["rect"].height - 3) < 0.1)
+        y = block_y0s[1] - 5
+        if marker_type == "text":
+            # Правее полосы блока, чтобы маркер не попал в название следующей компании
+            page.insert_text((620, y), MARKER_TEXT)
+        else:
+            page.draw_rect(fitz.Rect(10, y, 500, y + 5), color=(1, 0, 0), fill=(1, 0, 0))
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def extract(content: bytes, config, page_pool=None) -> tuple[list, int]:
+    with PDFRepository() as repository:
+        data = extract_pdf(repository, FileModel("report.pdf", content), config, page_pool=page_pool)
+        return data["stoppages_data"], repository.stats.pages_loaded
+
+
+def block_index(table: list, company_name: str) -> int:
+    return next(i for i, block in enumerate(table) if block["block"]["company_name"] == company_name)
+
+
+def row_page(row: dict) -> int:
+    # Номер страницы строки зашит генератором в заводской номер: F<страница>-...
+    return int(row["factory_number"][1:].split("-")[0])
+
+
+MARKERS = {
+    "drawing": {"type": "drawing", "criteria": {"height": 5.0}},
+    "text": {"type": "text", "text": MARKER_TEXT},
+}
+
+
+@pytest.mark.parametrize("marker_type", ["drawing", "text"])
+def test_end_of_table_marker_stops_table(marker_type):
+    full, full_pages = extract(generate(5), compile_config())
+    assert full_pages == 5
+
+    content = add_marker(generate(5), 2, marker_type)
+    table, pages_loaded = extract(content, compile_config(end_of_table_marker=MARKERS[marker_type]))
+    # На странице маркера учитываются только указатели выше него, следующие страницы не загружаются
+    assert table == full[:block_index(full, "Lift Service 2-0") + 1]
+    assert pages_loaded == 3
+
+
+def test_text_marker_outside_search_area_is_ignored():
+    full, _ = extract(generate(3), compile_config())
+    marker = {"type": "text", "text": MARKER_TEXT, "offset": {"x": 0, "y": 0},
+              "dimensions": {"width": 600, "height": 595}}
+    table, pages_loaded = extract(add_marker(generate(3), 1, "text"), compile_config(end_of_table_marker=marker))
+    assert table == full and pages_loaded == 3
+
+
+def test_text_marker_is_case_sensitive():
+    full, _ = extract(generate(3), compile_config())
+    marker = {"type": "text", "text": MARKER_TEXT.lower()}
+    table, _ = extract(add_marker(generate(3), 1, "text"), compile_config(end_of_table_marker=marker))
+    assert table == full
+
+
+def test_negative_page_range():
+    content = generate(5)
+    full, _ = extract(content, compile_config())
+    table, pages_loaded = extract(content, compile_config(pages={"start": 1, "end": -1}))
+    # Строки, перенесённые на страницу 1, относятся к блоку страницы 0 и пропадают вместе с ним,
+    # строки последней страницы не просматриваются
+    expected = [{"block": block["block"], "rows": [row for row in block["rows"] if 1 <= row_page(row) <= 3]}
+                for block in full if 1 <= int(block["block"]["company_name"].split()[-1].split("-")[0]) <= 3]
+    assert table == expected
+    # Время отчёта на странице 0 и страницы таблицы 1-3
+    assert pages_loaded == 4
+
+
+def test_page_parallel_stops_after_marker_range():
+    config = compile_config(end_of_table_marker=MARKERS["drawing"])
+    content = add_marker(generate(8), 3, "drawing")
+    serial, _ = extract(content, config)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        # Диапазоны [0, 2), [2, 4), [4, 6), [6, 8): после диапазона с маркером следующие не учитываются
+        table, pages_loaded = extract(content, config, PagePool(pool, workers=4))
+    assert table == serial
+    # Страница 0 в этом процессе (время отчёта) и страницы 0-3 в двух использованных диапазонах
+    assert pages_loaded == 5
@@ -0,0 +1,106 @@
+import pymupdf as fitz
+import pytest
+import yaml
+
+from app.exceptions import TemplateMismatchError
+from app.models.file_model import FileModel
+from app.services.config_compiler import compile_pdf_structure
+from app.services.config_registry import ConfigRegistry
+from app.services.template_detection import FingerprintIndex
+from benchmarks.generator import generate_lift_report
+
+CONFIG_PATH = "core/configs/pdf_structures/lift_report_v1.yml"
+PORTRAIT_TITLE = "Portrait report"
+
+# Размер страницы, высоты рисунков из критериев указателей (по умолчанию) и дата отчёта: 4 признака
+LIFT_FULL = {"page_size": {"width": 842, "height": 595},
+             "anchors": [{"pattern": r"\d{2}\.\d{2}\.\d{4}", "offset": {"x": 520, "y": 20},
+                          "dimensions": {"width": 130, "height": 20}}]}
+# Только полосы блоков: 1 признак, тоже выполнен на странице отчёта о простое лифтов
+LIFT_HEIGHTS = {"drawing_heights": [3.0]}
+# Книжная страница с заголовком, без высот рисунков по умолчанию: 2 признака
+PORTRAIT = {"page_size": {"width": 595, "height": 842}, "drawing_heights": [],
+            "anchors": [{"text": PORTRAIT_TITLE, "offset": {"x": 20, "y": 20},
+                         "dimensions": {"width": 200, "height": 30}}]}
+
+
+def raw_config(fingerprint: dict | None) -> dict:
+    """
+    lift_report_v1 с заданными признаками первой страницы (None - без признаков)
+    """
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config.pop("fingerprint")
+    if fingerprint is not None:
+        config["fingerprint"] = fingerprint
+    return config
+
+
+def structure(name: str, fingerprint: dict | None):
+    return compile_pdf_structure(name, "test", raw_config(fingerprint))
+
+
+def write_configs(directory, **fingerprints):
+    for name, fingerprint in fingerprints.items():
+        (directory / f"{name}.yml").write_text(yaml.safe_dump(raw_config(fingerprint), allow_unicode=True),
+                                               encoding="utf-8")
+
+
+def lift_report() -> FileModel:
+    return FileModel("lift.pdf", generate_lift_report(pages=1, rows_per_page=3, seed=2))
+
+
+def other_document(width: float = 595, height: float = 842, title: str = "") -> FileModel:
+    doc = fitz.open()
+    page = doc.new_page(width=width, height=height)
+    if title:
+        page.insert_text((25, 40), title)
+    content = doc.tobytes()
+    doc.close()
+    return FileModel("other.pdf", content)
+
+
+def test_scores_count_passed_checks():
+    index = FingerprintIndex([structure("portrait", PORTRAIT), structure("lift_full", LIFT_FULL)])
+    assert index.match(index.signature(lift_report())) == [("lift_full", 4, 4), ("portrait", 0, 2)]
+    assert index.match(index.signature(other_document(title=PORTRAIT_TITLE))) == [("portrait", 2, 2),
+                                                                                  ("lift_full", 0, 4)]
+    # Выполнена часть признаков: конфигурация не подходит, но идёт выше конфигураций без совпадений
+    assert index.match(index.signature(other_document())) == [("portrait", 1, 2), ("lift_full", 0, 4)]
+    assert index.detect(lift_report()).name == "lift_full"
+    assert index.detect(other_document(title=PORTRAIT_TITLE)).name == "portrait"
+
+
+def test_tie_broken_by_most_checks():
+    index = FingerprintIndex([structure("lift_heights", LIFT_HEIGHTS), structure("lift_full", LIFT_FULL)])
+    assert index.detect(lift_report()).name == "lift_full"
+
+
+def test_ambiguous_match_is_rejected():
+    index = FingerprintIndex([structure("lift_a", LIFT_HEIGHTS), structure("lift_b", LIFT_HEIGHTS),
+                              structure("portrait", PORTRAIT)])
+    with pytest.raises(TemplateMismatchError, match="lift_a 1/1, lift_b 1/1"):
+        index.detect(lift_report())
+
+
+def test_unmatched_document_uses_default(tmp_path):
+    write_configs(tmp_path, lift_full=LIFT_FULL, portrait=PORTRAIT)
+    document = other_document(width=420, height=595)
+    assert ConfigRegistry(str(tmp_path), "lift_full").detect(document).name == "lift_full"
+    with pytest.raises(TemplateMismatchError):
+        ConfigRegistry(str(tmp_path)).detect(document)
+
+
+def test_single_candidate_skips_opening_document(tmp_path, monkeypatch):
+    def signature(self, file):
+        raise AssertionError("document must not be opened")
+
+    monkeypatch.setattr(FingerprintIndex, "signature", signature)
+    not_a_pdf = FileModel("report.pdf", b"not a pdf")
+    # Единственная конфигурация с признаками - она же конфигурация по умолчанию
+    write_configs(tmp_path, lift_full=LIFT_FULL, plain=None)
+    registry = ConfigRegistry(str(tmp_path), "lift_full")
+    assert not registry.fingerprint_index().needs_detection
+    assert registry.detect(not_a_pdf).name == "lift_full"
+    # Конфигурация по умолчанию без признаков: выбор зависит от документа, и его нужно открыть
+    assert ConfigRegistry(str(tmp_path), "plain").fingerprint_index().needs_detection
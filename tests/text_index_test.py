@@ -0,0 +1,56 @@
+import random
+
+import pymupdf as fitz
+
+import app.models.pdf_models as models
+from app.models.file_model import FileModel
+from app.repositories.pdf_repository import PDFRepository
+
+
+def create_pdf_with_overflowing_text() -> bytes:
+    """
+    Страница, на которой часть строк выходит за правый край (как дата в отчётах с обрезанной рамкой)
+    """
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=200)
+    page.insert_text((230, 30), "01.09.2024 10:00")
+    page.insert_text((20, 60), "Короткая строка", fontname="helv")
+    page.insert_text((150, 90), "Длинная строка за краем страницы", fontname="helv")
+    page.insert_text((20, 120), "Lift 123 / ООО Лифт", fontname="helv")
+    page.insert_text((260, 150), "END OF TABLE", fontname="helv")
+    try:
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def load(use_text_index: bool) -> PDFRepository:
+    repository = PDFRepository(use_text_index=use_text_index)
+    repository.load_pdf(FileModel("overflow.pdf", create_pdf_with_overflowing_text()))
+    return repository
+
+
+def test_text_index_keeps_text_outside_page():
+    with load(True) as repository:
+        assert repository.get_text(models.Rect(220, 15, 400, 35, 0)) == "01.09.2024 10:00"
+
+
+def test_text_index_matches_get_textbox():
+    rnd = random.Random(0)
+    with load(True) as indexed, load(False) as plain:
+        for _ in range(3000):
+            x0, x1 = sorted(rnd.uniform(-20, 450) for _ in range(2))
+            y0, y1 = sorted(rnd.uniform(-20, 220) for _ in range(2))
+            rect = models.Rect(x0, y0, x1, y1, 0)
+            assert indexed.get_text(rect) == plain.get_text(rect), rect
+
+
+def test_find_text_same_rule_with_and_without_index():
+    # Маркер конца таблицы ищется одинаково: подстрока одной строки с учётом регистра
+    with load(True) as indexed, load(False) as plain:
+        for text, rect in (("END OF TABLE", None), ("end of table", None), ("OF TAB", None),
+                           ("END", models.Rect(250, 130, 300, 160, 0)), ("END", models.Rect(0, 0, 100, 200, 0)),
+                           ("строка\nLift", None), ("Lift 123", models.Rect(0, 100, 300, 130, 0))):
+            assert indexed.find_text(0, text, rect) == plain.find_text(0, text, rect), (text, rect)
+        assert indexed.find_text(0, "END OF TABLE") is not None
+        assert plain.find_text(0, "end of table") is None